@@ -0,0 +1,230 @@
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Iterable
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import insert
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError, SQLAlchemyError
+
+from .db import SessionLocal, ProofAudit
+
+AUDIT_FLUSH_TIME = Histogram("proof_audit_flush_seconds", "Time spent flushing proof audit rows")
+AUDIT_BACKLOG = Gauge("proof_audit_backlog", "Proof audit rows waiting to be flushed")
+AUDIT_SPOOLED = Gauge("proof_audit_spooled", "Proof audit rows held in the local spool")
+AUDIT_WRITTEN = Counter("proof_audit_rows_written_total", "Proof audit rows written to the database")
+AUDIT_REJECTED = Counter("proof_audit_rows_rejected_total", "Proof audit rows the database refused")
+
+# Failures worth retrying later; anything else is a problem with the rows.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class AuditWriter:
+    """Buffers ``ProofAudit`` rows and writes them in bulk.
+
+    Rows are flushed by a background thread every ``batch_size`` rows or
+    ``flush_interval`` seconds, whichever comes first, as one multi-row
+    INSERT. If the database is unreachable the batch is appended to a JSONL
+    spool file, one per process (``<spool_path>.<pid>``), and replayed ahead
+    of the next successful flush by whichever process gets there first: a
+    spool is claimed by renaming it and read under ``flock`` so rows being
+    appended are neither lost nor inserted twice. Rows the database rejects
+    (constraint or data errors) are written to ``<spool_path>.rejected``
+    instead of being retried forever. With ``synchronous=True`` every
+    submit is flushed before returning.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        spool_path: str | None = None,
+        synchronous: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path or os.path.join(tempfile.gettempdir(), "proof_audit_spool.jsonl")
+        self.synchronous = synchronous
+        self._buffer: list[dict] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stopping = False
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive a fork, so each Celery child starts its own.
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def submit(self, rows: Iterable[dict]) -> None:
+        with self._cond:
+            self._buffer.extend(rows)
+            AUDIT_BACKLOG.set(len(self._buffer))
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        if self.synchronous:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    @staticmethod
+    def _dump(rows: list[dict]) -> str:
+        return "".join(json.dumps({**row, "timestamp": row["timestamp"].isoformat()}) + "\n" for row in rows)
+
+    def _spool(self, rows: list[dict]) -> None:
+        path = f"{self.spool_path}.{os.getpid()}"
+        while True:
+            with open(path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                # A replay may have claimed (renamed) the file since we opened it.
+                try:
+                    if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                        continue
+                except FileNotFoundError:
+                    continue
+                f.write(self._dump(rows))
+                f.flush()
+                os.fsync(f.fileno())
+                return
+
+    def _claim_spools(self) -> list[tuple[str, list[dict]]]:
+        """Take over every spool not being written or replayed right now."""
+        claimed = []
+        for path in [self.spool_path] + glob.glob(glob.escape(self.spool_path) + ".*"):
+            suffix = path[len(self.spool_path):].lstrip(".")
+            if suffix.startswith("claimed."):
+                # Left behind by a replay that died; take it over.
+                owner = suffix.split(".")[1]
+                if not owner.isdigit() or (int(owner) != os.getpid() and _pid_alive(int(owner))):
+                    continue
+            elif suffix and not suffix.isdigit():
+                continue
+            target = f"{self.spool_path}.claimed.{os.getpid()}.{len(claimed)}.{time.time_ns()}"
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue
+            with open(target) as f:
+                # Wait for an append that opened the file before the rename.
+                fcntl.flock(f, fcntl.LOCK_SH)
+                rows = [json.loads(line) for line in f if line.strip()]
+            for row in rows:
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            claimed.append((target, rows))
+        return claimed
+
+    def _insert(self, rows: list[dict]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(ProofAudit), rows)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _insert_each(self, rows: list[dict]) -> int:
+        """Insert rows one by one, quarantining the ones that fail."""
+        rejected = []
+        for row in rows:
+            try:
+                self._insert([row])
+            except TRANSIENT_ERRORS:
+                raise
+            except SQLAlchemyError as exc:
+                rejected.append({**row, "error": str(exc.orig or exc)})
+        if rejected:
+            logging.error(f"Proof audit rejected {len(rejected)} rows, see {self.spool_path}.rejected")
+            with open(f"{self.spool_path}.rejected", "a") as f:
+                f.write(self._dump(rejected))
+            AUDIT_REJECTED.inc(len(rejected))
+        return len(rows) - len(rejected)
+
+    def flush(self) -> None:
+        """Write buffered (and previously spooled) rows to the database."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._buffer = self._buffer, []
+                AUDIT_BACKLOG.set(0)
+            claimed = self._claim_spools()
+            rows = [r for _, spooled in claimed for r in spooled] + rows
+            if not rows:
+                return
+            start = time.perf_counter()
+            try:
+                try:
+                    self._insert(rows)
+                    written = len(rows)
+                except TRANSIENT_ERRORS:
+                    raise
+                except SQLAlchemyError as exc:
+                    logging.warning(f"Proof audit batch rejected, inserting rows one by one: {exc}")
+                    written = self._insert_each(rows)
+            except TRANSIENT_ERRORS as exc:
+                logging.error(f"Proof audit flush failed, spooling {len(rows)} rows: {exc}")
+                # Written to our own spool before the claimed files go away.
+                self._spool(rows)
+                AUDIT_SPOOLED.set(len(rows))
+            else:
+                AUDIT_SPOOLED.set(0)
+                AUDIT_WRITTEN.inc(written)
+                AUDIT_FLUSH_TIME.observe(time.perf_counter() - start)
+            for path, _ in claimed:
+                os.remove(path)
+
+    def close(self) -> None:
+        """Stop the background thread after draining the buffer."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        thread = self._thread
+        if thread and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=10)
+        self.flush()
+
+
+AUDIT_WRITER = AuditWriter(
+    batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+    flush_interval=int(os.getenv("AUDIT_FLUSH_MS", "500")) / 1000,
+    spool_path=os.getenv("AUDIT_SPOOL_PATH") or None,
+    # Eager (local/test) mode reads audit rows right after the task returns.
+    synchronous=bool(os.getenv("CELERY_TASK_ALWAYS_EAGER")),
+)
+atexit.register(AUDIT_WRITER.close)
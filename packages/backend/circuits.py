@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import threading
+import time
+from itertools import chain
+from typing import Callable, NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal, Circuit
+
+# Called with (name, old_hash, new_hash) when the active hash of a circuit changes.
+HashListener = Callable[[str, str | None, str | None], None]
+
+MANIFEST_PATH = os.getenv("CIRCUIT_MANIFEST", "/app/circuits/manifest.json")
+if not os.path.exists(MANIFEST_PATH):
+    alt = os.path.join(os.getcwd(), "artifacts", "manifest.json")
+    if os.path.exists(alt):
+        MANIFEST_PATH = alt
+
+# Curve assumed for manifest entries written without a per-curve level.
+DEFAULT_CURVE = "bn254"
+
+
+class CircuitArtifacts(NamedTuple):
+    circuit_hash: str
+    wasm: str | None
+    zkey: str | None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.wasm and self.zkey)
+
+
+class CircuitManifest:
+    """Circuit manifest parsed once and indexed by ``(circuit, curve)``.
+
+    Artifact paths are resolved to absolute paths relative to the directory
+    above the manifest and checked for existence at load time; missing files
+    are reported by :meth:`validate` rather than discovered mid-proof.
+    :meth:`refresh` re-parses the file only when its mtime changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime: float | None = None
+        self._loaded = False
+        self._index: dict[tuple[str, str], CircuitArtifacts] = {}
+        self._missing: list[str] = []
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[["CircuitManifest"], None]] = []
+        self.refresh()
+
+    def add_listener(self, listener: Callable[["CircuitManifest"], None]) -> None:
+        self._listeners.append(listener)
+        listener(self)
+
+    def _parse(self, data: dict) -> None:
+        base = os.path.abspath(os.path.join(os.path.dirname(self.path), ".."))
+        index: dict[tuple[str, str], CircuitArtifacts] = {}
+        missing: list[str] = []
+        for name, entry in data.items():
+            # build_manifest.py writes a flat entry per circuit; multi-curve
+            # manifests nest one entry per curve.
+            if isinstance(entry.get("hash"), str):
+                entry = {DEFAULT_CURVE: entry}
+            # API names drop the "_check" suffix (e.g. "voice_check" -> "voice")
+            api_name = name.replace("_check", "")
+            for curve, info in entry.items():
+                paths = []
+                for kind in ("wasm", "zkey"):
+                    rel = info.get(kind)
+                    path = os.path.join(base, rel) if rel else None
+                    if path and not os.path.exists(path):
+                        missing.append(f"{name}/{curve}: {path}")
+                        path = None
+                    paths.append(path)
+                artifacts = CircuitArtifacts(info["hash"], *paths)
+                index[(api_name, curve)] = artifacts
+                index.setdefault((name, curve), artifacts)
+        self._index = index
+        self._missing = missing
+
+    def refresh(self) -> bool:
+        """Reload the manifest if it changed on disk. Returns True on reload."""
+        try:
+            mtime: float | None = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._mtime:
+            return False
+        with self._lock:
+            if self._loaded and mtime == self._mtime:
+                return False
+            data = {}
+            if mtime is None:
+                print(f"Warning: Circuit manifest not found at {self.path}. Using empty defaults.")
+            else:
+                try:
+                    with open(self.path) as f:
+                        data = json.load(f)
+                except (OSError, json.JSONDecodeError) as exc:
+                    logging.error(f"Could not load circuit manifest {self.path}: {exc}")
+                    return False
+            self._parse(data)
+            self._mtime = mtime
+            self._loaded = True
+        for listener in self._listeners:
+            listener(self)
+        return True
+
+    def artifacts(self, circuit: str, curve: str = DEFAULT_CURVE) -> CircuitArtifacts | None:
+        return self._index.get((circuit, curve))
+
+    @property
+    def hashes(self) -> dict[str, dict[str, str]]:
+        out: dict[str, dict[str, str]] = {}
+        for (name, curve), artifacts in self._index.items():
+            out.setdefault(name, {})[curve] = artifacts.circuit_hash
+        return out
+
+    def validate(self, strict: bool = False) -> list[str]:
+        """Report manifest entries whose wasm/zkey files are missing."""
+        for item in self._missing:
+            logging.warning(f"Missing circuit artifact {item}")
+        if strict and self._missing:
+            raise RuntimeError(f"{len(self._missing)} circuit artifacts missing")
+        return list(self._missing)
+
+
+class CircuitRegistry:
+    """In-process view of the active rows in the ``circuits`` table.
+
+    The table is read once and then served from memory. It is reloaded after
+    ``ttl`` seconds, or on the next lookup after :meth:`invalidate` (which runs
+    automatically when a session commits a change to a ``Circuit`` row).
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        defaults: dict[str, dict[str, str]] | None = None,
+        ttl: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.defaults = defaults if defaults is not None else {}
+        self.ttl = ttl
+        self._active: dict[str, str] = {}
+        self._resolved: dict[tuple[str, str], str | None] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+        self._listeners: list[HashListener] = []
+
+    def add_listener(self, listener: HashListener) -> None:
+        self._listeners.append(listener)
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def set_defaults(self, defaults: dict[str, dict[str, str]]) -> None:
+        """Replace the manifest fallback hashes, notifying listeners of changes."""
+        previous, self.defaults = self.defaults, defaults
+        self._resolved = {}
+        for name in set(previous) | set(defaults):
+            for curve in set(previous.get(name, {})) | set(defaults.get(name, {})):
+                old = previous.get(name, {}).get(curve)
+                new = defaults.get(name, {}).get(curve)
+                if old != new and name not in self._active:
+                    for listener in self._listeners:
+                        listener(name, old, new)
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _reload(self) -> None:
+        db = self.session_factory()
+        try:
+            rows = db.query(Circuit.name, Circuit.circuit_hash).filter_by(active=1).all()
+        except SQLAlchemyError as exc:
+            # Keep serving the previous snapshot; retry on the next lookup.
+            logging.warning(f"Could not load circuit registry: {exc}")
+            return
+        finally:
+            db.close()
+
+        active = {name: circuit_hash for name, circuit_hash in rows}
+        previous, self._active = self._active, active
+        self._resolved = {}
+        self._loaded_at = time.monotonic()
+        for name in set(previous) | set(active):
+            old, new = previous.get(name), active.get(name)
+            if old != new:
+                for listener in self._listeners:
+                    listener(name, old, new)
+
+    def hash_for(self, name: str, curve: str = "bn254") -> str | None:
+        """Return the active hash for ``(name, curve)`` or ``None`` if unknown.
+
+        Active database rows win over the manifest defaults.
+        """
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    self._reload()
+        key = (name, curve)
+        if key not in self._resolved:
+            resolved = self._active.get(name)
+            if resolved is None:
+                resolved = self.defaults.get(name, {}).get(curve)
+            self._resolved[key] = resolved
+        return self._resolved[key]
+
+
+CIRCUIT_REGISTRY = CircuitRegistry(ttl=float(os.getenv("CIRCUIT_REGISTRY_TTL", "60")))
+CIRCUIT_MANIFEST = CircuitManifest(MANIFEST_PATH)
+CIRCUIT_MANIFEST.add_listener(lambda m: CIRCUIT_REGISTRY.set_defaults(m.hashes))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_circuit_changes(session, flush_context):
+    if any(
+        isinstance(obj, Circuit)
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info["circuits_changed"] = True
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _track_bulk_circuit_changes(context):
+    if context.mapper.class_ is Circuit:
+        context.session.info["circuits_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_registry(session):
+    if session.info.pop("circuits_changed", False):
+        CIRCUIT_REGISTRY.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_circuit_changes(session):
+    session.info.pop("circuits_changed", None)
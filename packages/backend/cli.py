@@ -1,17 +1,24 @@
 import json
 import typer
 from datetime import datetime
-from .db import SessionLocal, ProofAudit
+from .db import ReadSessionLocal, ProofAudit
+from .partitions import find_archived
 
 app = typer.Typer()
 
 @app.command()
 def audit_proof(tx_hash: str = typer.Argument(...)):
-    db = SessionLocal()
+    db = ReadSessionLocal()
     row = db.query(ProofAudit).filter_by(proof_root=tx_hash).first()
     if not row:
-        typer.echo("not found")
-        raise typer.Exit(code=1)
+        # Old months are detached from proof_audit and archived to disk.
+        archived = find_archived(tx_hash)
+        if not archived:
+            typer.echo("not found")
+            raise typer.Exit(code=1)
+        data = {k: archived[k] for k in ("circuit_hash", "input_hash", "proof_root", "timestamp", "archive")}
+        typer.echo(json.dumps(data))
+        return
     ts = row.timestamp
     if hasattr(ts, "isoformat"):
         ts = ts.isoformat()
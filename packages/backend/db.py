@@ -4,12 +4,23 @@ from sqlalchemy import (
     Integer,
     String,
     BigInteger,
+    DateTime,
     Text,
     Index,
 )
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from prometheus_client import Gauge, Histogram
 import os
+import time
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection", ["engine"]
+)
+DB_POOL_IN_USE = Gauge("db_pool_connections_in_use", "DB connections checked out of the pool", ["engine"])
 
 # Always require an explicit `DATABASE_URL`.  Using SQLite silently caused
 # Celery workers to crash under load, so we fail fast if the variable isn't
@@ -18,15 +29,123 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise RuntimeError("DATABASE_URL must be set")
 
-# SQLAlchemy expects the "postgresql" scheme; handle old "postgres" URLs too
-if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
-    SQLALCHEMY_DATABASE_URL = "postgresql://" + SQLALCHEMY_DATABASE_URL[len("postgres://"):]
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {},
-)
+def _normalise_url(url: str) -> str:
+    # SQLAlchemy expects the "postgresql" scheme; handle old "postgres" URLs too
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+SQLALCHEMY_DATABASE_URL = _normalise_url(SQLALCHEMY_DATABASE_URL)
+# Optional replica for read-only endpoints; defaults to the primary.
+SQLALCHEMY_READ_URL = _normalise_url(os.getenv("DATABASE_READ_URL") or SQLALCHEMY_DATABASE_URL)
+
+# Pool defaults per process role (DB_ROLE). Every setting can be overridden
+# with DB_<SETTING> or, for one role only, DB_<SETTING>_<ROLE>, e.g.
+# DB_POOL_SIZE_WORKER=4.
+DB_ROLE = os.getenv("DB_ROLE", "api").lower()
+_POOL_DEFAULTS = {
+    "api": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30.0, "pool_recycle": 1800, "pool_pre_ping": True},
+    "worker": {"pool_size": 2, "max_overflow": 2},
+    "grpc": {"pool_size": 5, "max_overflow": 5},
+    "cli": {"pool_size": 1, "max_overflow": 0},
+}
+
+
+def pool_settings(role: str = DB_ROLE) -> dict:
+    """Resolve create_engine pool arguments for ``role`` from defaults and env."""
+    settings = {**_POOL_DEFAULTS["api"], **_POOL_DEFAULTS.get(role, {})}
+    for key, default in settings.items():
+        raw = os.getenv(f"DB_{key.upper()}_{role.upper()}") or os.getenv(f"DB_{key.upper()}")
+        if raw is None:
+            continue
+        if isinstance(default, bool):
+            settings[key] = raw.lower() in ("1", "true", "yes")
+        else:
+            settings[key] = type(default)(raw)
+    return settings
+
+
+class _TimedPool:
+    """Mixin recording how long checkouts wait for a free connection."""
+
+    metric_label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.labels(self.metric_label).observe(time.perf_counter() - start)
+
+
+def _pool_args(url: str, label: str, pool_class: type) -> dict:
+    if url.startswith("sqlite") and (":memory:" in url or url.endswith("://")):
+        # In-memory SQLite keeps its single-connection pool.
+        return {}
+    # A subclass per engine keeps the label across pool.recreate().
+    timed = type(f"{pool_class.__name__}_{label}", (_TimedPool, pool_class), {"metric_label": label})
+    return {"poolclass": timed, **pool_settings()}
+
+
+def _track_in_use(engine: Engine, label: str) -> None:
+    DB_POOL_IN_USE.labels(label).set_function(
+        lambda: engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0
+    )
+
+
+def make_engine(url: str, label: str) -> Engine:
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        **_pool_args(url, label, QueuePool),
+    )
+    _track_in_use(engine, label)
+    return engine
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (asyncpg/aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+def make_async_engine(url: str, label: str):
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        # aiosqlite connections are bound to the event loop that opened them.
+        engine = create_async_engine(url, poolclass=NullPool)
+    else:
+        engine = create_async_engine(url, **_pool_args(url, label, AsyncAdaptedQueuePool))
+    _track_in_use(engine.sync_engine, label)
+    return engine
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+read_engine = (
+    make_engine(SQLALCHEMY_READ_URL, "replica")
+    if SQLALCHEMY_READ_URL != SQLALCHEMY_DATABASE_URL
+    else engine
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Async engines for the API's request handlers; Celery, gRPC and the CLI use
+# the sync engines above.
+ASYNC_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = make_async_engine(SQLALCHEMY_DATABASE_URL, "async_primary")
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+async_read_engine = (
+    make_async_engine(SQLALCHEMY_READ_URL, "async_replica")
+    if SQLALCHEMY_READ_URL != SQLALCHEMY_DATABASE_URL
+    else async_engine
+)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 class Election(Base):
@@ -44,6 +163,41 @@ class Election(Base):
     )
 
 
+class ElectionJob(Base):
+    """An election creation transaction, tracked until its receipt is processed."""
+
+    __tablename__ = "election_jobs"
+    id = Column(String, primary_key=True)
+    meta = Column(String, nullable=False)
+    tx_hash = Column(String, nullable=True)
+    # pending -> submitted -> done | error
+    status = Column(String, nullable=False, default="pending", index=True)
+    election_id = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class PinOutbox(Base):
+    """Election metadata waiting to be pinned to IPFS by the ``pin_outbox`` task."""
+
+    __tablename__ = "pin_outbox"
+    id = Column(Integer, primary_key=True)
+    # sha256 of the content: the election's on-chain meta hash
+    meta = Column(String, nullable=False, unique=True)
+    content = Column(Text, nullable=False)
+    # pending -> pinned | failed
+    status = Column(String, nullable=False, default="pending")
+    cid = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("idx_pin_outbox_due", "status", "next_attempt_at"),)
+
+
 class ProofRequest(Base):
     __tablename__ = "proof_requests"
     id = Column(Integer, primary_key=True)
@@ -77,7 +231,14 @@ class ProofAudit(Base):
     circuit_hash = Column(String, nullable=False)
     input_hash = Column(String, nullable=False)
     proof_root = Column(String, nullable=False, index=True)
-    timestamp = Column(String, nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Keyset pagination (id DESC) under each /proofs filter.
+        Index("idx_proof_audit_circuit_id", "circuit_hash", "id"),
+        Index("idx_proof_audit_input_id", "input_hash", "id"),
+        Index("idx_proof_audit_timestamp_id", "timestamp", "id"),
+    )
 
 
 class DeadLetterQueue(Base):
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import logging
+import os
+
+import redis
+import redis.asyncio as aioredis
+
+from .proof_cache import redis_from_url
+
+EVENTS_URL = os.getenv("CELERY_BACKEND", "redis://localhost:6379/0")
+PROOF_EVENTS_CHANNEL = "proof-events"
+
+_publisher = redis_from_url(EVENTS_URL)
+
+
+def publish_proof_event(job_id: str, state: str, progress: int = 0, **extra) -> None:
+    """Broadcast a proof job state change to every API process.
+
+    A no-op when the result backend is not Redis; API processes then fall back
+    to polling the Celery result backend.
+    """
+    if _publisher is None:
+        return
+    event = {"job_id": job_id, "state": state, "progress": progress, **extra}
+    try:
+        _publisher.publish(PROOF_EVENTS_CHANNEL, json.dumps(event))
+    except redis.RedisError as exc:
+        logging.warning(f"Could not publish proof event for {job_id}: {exc}")
+
+
+class ProofEventHub:
+    """Fans proof events out to the WebSocket handlers of one API process.
+
+    A single Redis subscription per process is shared by all sockets; each
+    socket gets an ``asyncio.Queue`` for the job it watches.
+    """
+
+    def __init__(self, url: str | None):
+        self.url = url if redis_from_url(url) is not None else None
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.url is not None
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(job_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[job_id]
+
+    def dispatch(self, event: dict) -> None:
+        for queue in self._subscribers.get(event.get("job_id"), ()):
+            queue.put_nowait(event)
+
+    async def _listen(self) -> None:
+        while self._subscribers:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(PROOF_EVENTS_CHANNEL)
+                    while self._subscribers:
+                        msg = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if msg and msg["type"] == "message":
+                            self.dispatch(json.loads(msg["data"]))
+            except redis.RedisError as exc:
+                logging.warning(f"Proof event subscription lost: {exc}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
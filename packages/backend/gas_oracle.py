@@ -0,0 +1,128 @@
+import logging
+import math
+import os
+import threading
+import time
+
+from prometheus_client import Counter, Gauge
+from web3 import Web3
+
+GAS_ORACLE_POLLS = Counter("gas_oracle_polls_total", "eth_feeHistory polls by the gas oracle", ["result"])
+GAS_ORACLE_BLOCK = Gauge("gas_oracle_block", "Newest block in the gas oracle window")
+
+PERCENTILES = (50, 95, 99)
+
+
+def _percentile(values: list[int], pct: float) -> int:
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class GasOracle:
+    """Rolling window of base fees and priority-fee percentiles.
+
+    A daemon thread polls ``eth_feeHistory`` every ``poll_interval``
+    seconds and keeps the last ``window`` blocks in memory; readers never
+    hit the RPC. The first poll loads the whole window, later ones only the
+    last few blocks. Chains without EIP-1559 fee history fall back to
+    ``eth_gasPrice`` per poll, reported as the base fee with no tip.
+    """
+
+    def __init__(self, w3: Web3, window: int = 20, poll_interval: float = 2.0, stale_after: float = 60.0):
+        self.w3 = w3
+        self.window = window
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        # block number -> (base fee, [tip at each of PERCENTILES] or None if empty)
+        self._blocks: dict[int, tuple[int, list[int] | None]] = {}
+        self._next_base_fee: int | None = None
+        self._legacy = False
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def start(self) -> None:
+        """Start the background poller (once per process)."""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="gas-oracle", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as exc:
+                GAS_ORACLE_POLLS.labels("error").inc()
+                logging.warning(f"Gas oracle poll failed, keeping the previous window: {exc}")
+            time.sleep(self.poll_interval)
+
+    def refresh(self) -> None:
+        with self._lock:
+            newest = max(self._blocks, default=None)
+        if self._legacy:
+            self._refresh_legacy()
+            return
+        count = self.window if newest is None else min(self.window, 4)
+        try:
+            history = self.w3.eth.fee_history(count, "latest", list(PERCENTILES))
+        except Exception as exc:
+            if newest is not None:
+                raise
+            logging.info(f"eth_feeHistory unavailable, using eth_gasPrice: {exc}")
+            self._legacy = True
+            self._refresh_legacy()
+            return
+        oldest = history["oldestBlock"]
+        rewards = history.get("reward") or [None] * len(history["gasUsedRatio"])
+        with self._lock:
+            for i, tips in enumerate(rewards):
+                # Empty blocks report zero tips; leave them out of the percentiles.
+                if not history["gasUsedRatio"][i]:
+                    tips = None
+                self._blocks[oldest + i] = (history["baseFeePerGas"][i], [int(t) for t in tips] if tips else None)
+            for block in sorted(self._blocks)[:-self.window]:
+                del self._blocks[block]
+            # feeHistory also returns the base fee of the next block.
+            self._next_base_fee = history["baseFeePerGas"][-1]
+            self._updated_at = time.monotonic()
+            GAS_ORACLE_BLOCK.set(max(self._blocks, default=0))
+        GAS_ORACLE_POLLS.labels("ok").inc()
+
+    def _refresh_legacy(self) -> None:
+        price = self.w3.eth.gas_price
+        with self._lock:
+            self._next_base_fee = price
+            self._blocks = {0: (price, None)}
+            self._updated_at = time.monotonic()
+        GAS_ORACLE_POLLS.labels("legacy").inc()
+
+    @property
+    def legacy(self) -> bool:
+        return self._legacy
+
+    def snapshot(self) -> dict | None:
+        """Next base fee and tip percentiles in wei, or None without fresh data."""
+        with self._lock:
+            if self._next_base_fee is None or time.monotonic() - self._updated_at > self.stale_after:
+                return None
+            blocks = list(self._blocks.values())
+            base_fee = self._next_base_fee
+            block = max(self._blocks)
+        used = [b[1] for b in blocks if b[1] is not None]
+        tips = {pct: _percentile([t[i] for t in used], pct) if used else 0 for i, pct in enumerate(PERCENTILES)}
+        return {"block": block, "baseFee": base_fee, "tips": tips}
+
+    def fees(self, pct: int = 50) -> dict | None:
+        """Transaction fee fields priced at a tip percentile, without an RPC."""
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return None
+        if self._legacy:
+            return {"gasPrice": snapshot["baseFee"]}
+        tip = snapshot["tips"][pct]
+        # Two base fees of headroom survive six full blocks of increases.
+        return {"maxFeePerGas": 2 * snapshot["baseFee"] + tip, "maxPriorityFeePerGas": tip}
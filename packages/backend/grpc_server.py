@@ -23,6 +23,14 @@ class ProofService(proof_pb2_grpc.ProofServiceServicer):
         state = async_result.state
         if state in {"PENDING", "STARTED"}:
             return proof_pb2.StatusResponse(state=state.lower())
+        if state == "PROGRESS":
+            info = async_result.info if isinstance(async_result.info, dict) else {}
+            return proof_pb2.StatusResponse(
+                state="running",
+                stage=info.get("stage", ""),
+                progress=info.get("progress", 0),
+                stages=info.get("stages", {}),
+            )
         if state == "SUCCESS":
             res = async_result.result
             
@@ -44,10 +52,14 @@ class ProofService(proof_pb2_grpc.ProofServiceServicer):
             else:
                 proof_str = str(proof or '') # Ensure it's a string
 
+            stages = res.get("stages", {})
             return proof_pb2.StatusResponse(
                 state="done", 
                 proof=proof_str, 
-                pubSignals=res.get("pubSignals", [])
+                pubSignals=res.get("pubSignals", []),
+                stage="persisted" if stages else "",
+                progress=100,
+                stages=stages,
             )
         return proof_pb2.StatusResponse(state="error")
 
@@ -1,27 +1,31 @@
 # packages/backend/main.py
 
-from fastapi import FastAPI, HTTPException, Depends, Header, WebSocket, Request
-from datetime import datetime
+from fastapi import FastAPI, HTTPException, Depends, Header, WebSocket, Request, Response, Query
+from datetime import datetime, timezone
 from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError, jwk
-from jose.utils import base64url_decode
+from jose import jwt, JWTError
 import httpx
 import os
 import json
 from typing import Optional, Any
 import asyncio
+from contextlib import asynccontextmanager
 from web3 import Web3
 from eth_account import Account
-from eth_account.messages import encode_defunct
-from eth_abi import encode as abi_encode
 from web3.middleware import geth_poa_middleware
 import hashlib
+from collections import OrderedDict
+import time
+import uuid
 import sentry_sdk
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 
-from .utils.ipfs import pin_json, cid_from_meta_hash, fetch_json
+from .utils.ipfs import IPFS, cid_from_meta_hash, afetch_json
+from .pinning import enqueue_pin
 from prometheus_fastapi_instrumentator import Instrumentator
 import logging
 from pythonjsonlogger import jsonlogger
@@ -34,9 +38,13 @@ sentry_sdk.init(dsn=os.getenv("SENTRY_DSN"))
 
 from .db import (
     SessionLocal,
+    AsyncSessionLocal,
+    AsyncReadSessionLocal,
     Base,
     engine,
     Election as DbElection,
+    ElectionJob,
+    PinOutbox,
     ProofRequest,
     ProofAudit,
 )
@@ -47,18 +55,40 @@ from .schemas import (
     EligibilityInput,
     VoiceInput,
     BatchTallyInput,
+    BatchProofInput,
     ProofAuditSchema,
 )
-from .proof import celery_app, generate_proof, cache_get
+from .proof import celery_app, generate_proof, generate_proof_batch, cache_get, pin_outbox
+from .events import ProofEventHub, publish_proof_event
+from .quota import QUOTA_ENGINE
+from .ratelimit import RATE_LIMITER, RateLimitMiddleware
+from .tx_sender import TransactionSender
+from .oidc import OIDCKeyCache, VerifiedTokenCache, verify_token
+from .notifications import dispatcher_from_env
+from .paymaster import PaymasterSigner
+from .gas_oracle import GasOracle, PERCENTILES
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick up election transactions broadcast before a restart.
+    ensure_election_watcher()
+    GAS_ORACLE.start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(SentryAsgiMiddleware)
 
 Instrumentator().instrument(app).expose(app)
 
+# Inside CORS so 429 responses still carry CORS headers.
+# Verified callers get their own bucket; anything else is limited per IP.
+app.add_middleware(RateLimitMiddleware, limiter=RATE_LIMITER, verify=lambda token: _rate_limit_subject(token))
+
 FRONTEND_ORIGIN = os.getenv("NEXT_PUBLIC_API_BASE", "http://localhost:3000")
 LOCAL_MODE = "localhost" in FRONTEND_ORIGIN
 
@@ -69,6 +99,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Retry-After"],
 )
 
 
@@ -97,41 +128,20 @@ PRIVATE_KEY = os.getenv("ORCHESTRATOR_KEY")
 ELECTION_MANAGER = Web3.to_checksum_address(os.getenv("ELECTION_MANAGER"))
 PAYMASTER = Web3.to_checksum_address(os.getenv("PAYMASTER", "0x" + "0" * 40))
 
-# Push Protocol configuration
-PUSH_API_URL = os.getenv("PUSH_API_URL", "https://backend.epns.io/apis/v1/payloads")
-PUSH_CHANNEL = os.getenv("PUSH_CHANNEL")
-PUSH_ENV = os.getenv("PUSH_ENV", "staging")
+# One Redis subscription per process fans proof events out to WebSockets.
+PROOF_EVENTS = ProofEventHub(os.getenv("CELERY_BACKEND", "redis://localhost:6379/0"))
+# Seconds a WebSocket waits for an event before re-reading the job state.
+PROOF_EVENTS_RESYNC = float(os.getenv("PROOF_EVENTS_RESYNC", "30"))
+
+# Push Protocol notifications are batched and delivered off the request path.
+PUSH = dispatcher_from_env(CHAIN_ID)
 
 
 def send_push_notification(
     title: str, body: str, recipients: list[str] | None = None
 ) -> bool:
-    """Send a notification via Push Protocol if configured."""
-    if not PUSH_CHANNEL:
-        logging.info("Push Protocol not configured; skipping notification")
-        return False
-    payload = {
-        "senderType": 0,
-        "type": 4 if recipients else 1,
-        "identityType": 2,
-        "notification": {"title": title, "body": body},
-        "payload": {"title": title, "body": body, "cta": "", "img": ""},
-        "recipients": (
-            [f"eip155:{CHAIN_ID}:{r}" for r in recipients] if recipients else None
-        ),
-        "channel": f"eip155:{CHAIN_ID}:{PUSH_CHANNEL}",
-        "env": PUSH_ENV,
-    }
-    try:
-        response = httpx.post(PUSH_API_URL, json=payload, timeout=10)
-        response.raise_for_status()
-        return True
-    except httpx.HTTPStatusError as exc:
-        status = exc.response.status_code if exc.response else "unknown"
-        logging.error(f"Push notification failed with status {status}: {exc}")
-    except Exception as exc:
-        logging.error(f"Push notification failed: {exc}")
-    return False
+    """Queue a notification via Push Protocol if configured."""
+    return PUSH.notify(title, body, recipients)
 
 
 # Instantiate the Web3 object
@@ -203,6 +213,18 @@ def get_db():
         db.close()
 
 
+# Async variant for handlers that must not block the event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Read-only handlers; served by DATABASE_READ_URL when a replica is configured
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
 # OAuth2 config (real GRAO or fallback to a mock login form)
 IDP_BASE = os.getenv("GRAO_BASE_URL", "https://demo-oauth.example")
 CLIENT_ID = os.getenv("GRAO_CLIENT_ID", "test-client")
@@ -212,91 +234,95 @@ JWT_SECRET = os.getenv("JWT_SECRET", "dev-jwt-secret")
 REDIRECT = os.getenv("GRAO_REDIRECT_URI", "http://localhost:3000/auth/callback")
 USE_REAL_OAUTH = os.getenv("USE_REAL_OAUTH", "false").lower() in ("1", "true")
 PROOF_QUOTA = int(os.getenv("PROOF_QUOTA", "25"))
-
-# Caches for OIDC discovery and signing keys
-OIDC_CONFIG: dict | None = None
-OIDC_JWKS: dict | None = None
+PROOF_BATCH_MAX = int(os.getenv("PROOF_BATCH_MAX", "1000"))
+PAYMASTER_BATCH_MAX = int(os.getenv("PAYMASTER_BATCH_MAX", "500"))
+PAYMASTER_MAX_FEE_MULTIPLIER = float(os.getenv("PAYMASTER_MAX_FEE_MULTIPLIER", "5"))
+ELECTIONS_PAGE_MAX = int(os.getenv("ELECTIONS_PAGE_MAX", "500"))
+ELECTIONS_CACHE_TTL = float(os.getenv("ELECTIONS_CACHE_TTL", "2"))
+ELECTIONS_CACHE_SIZE = int(os.getenv("ELECTIONS_CACHE_SIZE", "256"))
+PROOFS_PAGE_MAX = int(os.getenv("PROOFS_PAGE_MAX", "500"))
+ELECTION_RECEIPT_POLL = float(os.getenv("ELECTION_RECEIPT_POLL", "2"))
+ELECTION_TX_TIMEOUT = float(os.getenv("ELECTION_TX_TIMEOUT", "600"))
+
+OIDC_KEYS = OIDCKeyCache(
+    IDP_BASE,
+    ttl=float(os.getenv("OIDC_JWKS_TTL", "3600")),
+    min_refetch_interval=float(os.getenv("OIDC_JWKS_MIN_REFETCH", "30")),
+)
+OIDC_TOKENS = VerifiedTokenCache(int(os.getenv("OIDC_TOKEN_CACHE_SIZE", "10000")))
 
 
 def fetch_oidc_config() -> dict:
-    """Retrieve and cache the OIDC discovery document."""
-    global OIDC_CONFIG
-    if OIDC_CONFIG is None:
-        url = f"{IDP_BASE}/.well-known/openid-configuration"
-        resp = httpx.get(url, timeout=5)
-        resp.raise_for_status()
-        OIDC_CONFIG = resp.json()
-    return OIDC_CONFIG
-
-
-def fetch_jwks() -> dict:
-    """Retrieve and cache the JWKS used to verify ID tokens."""
-    global OIDC_JWKS
-    if OIDC_JWKS is None:
-        conf = fetch_oidc_config()
-        jwks_uri = conf.get("jwks_uri", f"{IDP_BASE}/.well-known/jwks.json")
-        resp = httpx.get(jwks_uri, timeout=5)
-        resp.raise_for_status()
-        OIDC_JWKS = resp.json()
-    return OIDC_JWKS
+    """Return the cached OIDC discovery document."""
+    return OIDC_KEYS.config()
 
 
 def decode_oidc_token(token: str) -> dict:
     """Validate a JWT using the provider's JWKS."""
-    jwks = fetch_jwks()
-    header = jwt.get_unverified_header(token)
-    kid = header.get("kid")
-    if not kid:
-        raise JWTError("Token missing 'kid' header")
-    key_data = next((k for k in jwks.get("keys", []) if k.get("kid") == kid), None)
-    if not key_data:
-        raise JWTError("Signing key not found")
-    key = jwk.construct(key_data)
-    message, sig = token.rsplit(".", 1)
-    if not key.verify(message.encode(), base64url_decode(sig.encode())):
-        raise JWTError("Signature verification failed")
-    claims = jwt.get_unverified_claims(token)
-    if "exp" in claims and datetime.utcnow().timestamp() > float(claims["exp"]):
-        raise JWTError("Token expired")
-    aud = claims.get("aud")
-    if aud and CLIENT_ID not in (aud if isinstance(aud, list) else [aud]):
-        raise JWTError("Invalid audience")
-    return claims
-
-
-def increment_quota(db: Session, user: str, day: str) -> bool:
-    """Atomically increment daily proof counter."""
-    if db.bind.dialect.name == "postgresql":
+    return verify_token(token, OIDC_KEYS, OIDC_TOKENS, CLIENT_ID)
+
+
+async def increment_quota(db: AsyncSession, user: str, day: str, amount: int = 1) -> bool:
+    """Atomically charge ``amount`` proofs against the daily counter.
+
+    Either the whole amount fits within ``PROOF_QUOTA`` and is charged, or
+    nothing is charged.
+    """
+    if amount > PROOF_QUOTA:
+        return False
+    if db.get_bind().dialect.name == "postgresql":
         # Use native ON CONFLICT for Postgres for atomicity and performance
-        stmt = pg_insert(ProofRequest).values(user=user, day=day, count=1)
+        stmt = pg_insert(ProofRequest).values(user=user, day=day, count=amount)
         update_stmt = stmt.on_conflict_do_update(
             index_elements=["user", "day"],
-            set_=dict(count=ProofRequest.count + 1),
-            where=(ProofRequest.count < PROOF_QUOTA),
+            set_=dict(count=ProofRequest.count + amount),
+            where=(ProofRequest.count + amount <= PROOF_QUOTA),
         )
-        result = db.execute(update_stmt)
-        db.commit()
+        result = await db.execute(update_stmt)
+        await db.commit()
         # If the WHERE clause failed (quota exceeded), no row is updated.
         return result.rowcount > 0
     else:
         # Fallback for SQLite (less atomic but sufficient for testing)
         try:
-            db.add(ProofRequest(user=user, day=day, count=1))
-            db.commit()
+            db.add(ProofRequest(user=user, day=day, count=amount))
+            await db.commit()
             return True
         except IntegrityError:
-            db.rollback()
-            updated_rows = (
-                db.query(ProofRequest)
-                .filter(
+            await db.rollback()
+            result = await db.execute(
+                update(ProofRequest)
+                .where(
                     ProofRequest.user == user,
                     ProofRequest.day == day,
-                    ProofRequest.count < PROOF_QUOTA,
+                    ProofRequest.count + amount <= PROOF_QUOTA,
                 )
-                .update({"count": ProofRequest.count + 1}, synchronize_session=False)
+                .values(count=ProofRequest.count + amount)
+                .execution_options(synchronize_session=False)
             )
-            db.commit()
-            return bool(updated_rows)
+            await db.commit()
+            return bool(result.rowcount)
+
+
+async def _quota_used(db: AsyncSession, user: str, day: str) -> int:
+    used = await db.scalar(select(ProofRequest.count).filter_by(user=user, day=day))
+    return used or 0
+
+
+async def charge_quota(db: AsyncSession, user: str, day: str, amount: int = 1) -> bool:
+    """Charge proofs against the daily quota, in Redis when available.
+
+    Falls back to the SQL ``increment_quota`` path when Redis is not
+    configured or unreachable.
+    """
+    if amount > PROOF_QUOTA:
+        return False
+    charged = await QUOTA_ENGINE.charge(
+        user, day, amount, PROOF_QUOTA, seed=lambda: _quota_used(db, user, day)
+    )
+    if charged is not None:
+        return charged
+    return await increment_quota(db, user, day, amount)
 
 
 if USE_REAL_OAUTH:
@@ -304,6 +330,8 @@ if USE_REAL_OAUTH:
         raise RuntimeError("GRAO_CLIENT_SECRET must be set")
     if JWT_SECRET == "dev-jwt-secret":
         raise RuntimeError("JWT_SECRET must be set")
+    # Fetch the keys in the background so the first request does not wait.
+    OIDC_KEYS.start()
 else:
     print("WARNING: mock login has no CSRF protection; do not use in production")
 
@@ -313,6 +341,37 @@ if ELECTION_MANAGER == Web3.to_checksum_address("0x" + "0" * 40):
 if not PRIVATE_KEY:
     raise RuntimeError("ORCHESTRATOR_KEY must be configured")
 
+ORCHESTRATOR_ACCOUNT = Account.from_key(PRIVATE_KEY)
+
+# Fee percentiles over recent blocks, shared by /api/gas, the paymaster and
+# the transaction sender so none of them queries fees per request.
+GAS_ORACLE = GasOracle(
+    web3,
+    window=int(os.getenv("GAS_ORACLE_WINDOW", "20")),
+    poll_interval=float(os.getenv("GAS_ORACLE_POLL", "2")),
+)
+
+# Shared by every request so concurrent transactions get consecutive nonces.
+TX_SENDER = TransactionSender(
+    web3,
+    ORCHESTRATOR_ACCOUNT,
+    CHAIN_ID,
+    fee_ttl=float(os.getenv("TX_FEE_TTL", "5")),
+    replace_after=float(os.getenv("TX_REPLACE_AFTER", "60")),
+    bump_percent=int(os.getenv("TX_BUMP_PERCENT", "15")),
+    oracle=GAS_ORACLE,
+)
+
+PAYMASTER_SIGNER = PaymasterSigner(
+    web3,
+    PAYMASTER,
+    ORCHESTRATOR_ACCOUNT,
+    CHAIN_ID,
+    get_paymaster_contract,
+    nonce_ttl=float(os.getenv("PAYMASTER_NONCE_TTL", "2")),
+    verify_rate=float(os.getenv("PAYMASTER_VERIFY_RATE", "0.01")),
+)
+
 
 def get_current_user(authorization: str = Header(None)) -> dict:
     """Decodes the JWT and returns the claims payload."""
@@ -331,6 +390,18 @@ def get_current_user(authorization: str = Header(None)) -> dict:
         raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
 
+def _rate_limit_subject(token: str) -> str | None:
+    """Subject of a valid token, for rate limiting before authentication."""
+    try:
+        if USE_REAL_OAUTH:
+            claims = decode_oidc_token(token)
+        else:
+            claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    except Exception:  # any failure means the token does not identify anyone
+        return None
+    return claims.get("sub") or claims.get("email")
+
+
 # --- FIX: New dependency to check for admin role ---
 def require_admin_role(user: dict = Depends(get_current_user)):
     """A dependency that ensures the user has the 'admin' role."""
@@ -417,121 +488,117 @@ async def callback(code: Optional[str] = None, user: Optional[str] = None):
     return {"id_token": signed_jwt, "eligibility": True}
 
 
-@app.get("/elections", response_model=list[ElectionSchema])
-def list_elections(db: Session = Depends(get_db)):
-    return db.query(DbElection).all()
-
-
-# packages/backend/main.py
+# Serialized /elections pages: (after, limit, status) -> (expires, etag, body, next cursor).
+# Keys come from query parameters, so the cache is a bounded LRU.
+_elections_cache: OrderedDict[tuple, tuple[float, str, bytes, int | None]] = OrderedDict()
+
+
+def invalidate_elections_cache() -> None:
+    """Drop cached election pages after an election is written."""
+    _elections_cache.clear()
+
+
+async def _election_page(db: AsyncSession, after: int | None, limit: int, status: str | None):
+    key = (after, limit, status)
+    cached = _elections_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        _elections_cache.move_to_end(key)
+        return cached[1:]
+    columns = [getattr(DbElection, f) for f in ElectionSchema.model_fields]
+    stmt = select(*columns).order_by(DbElection.id).limit(limit + 1)
+    if after is not None:
+        stmt = stmt.where(DbElection.id > after)
+    if status:
+        stmt = stmt.where(DbElection.status == status)
+    rows = [dict(r) for r in (await db.execute(stmt)).mappings()]
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    # Plain column rows serialize straight to JSON without ORM/Pydantic work.
+    body = json.dumps(rows[:limit], separators=(",", ":")).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    now = time.monotonic()
+    for stale in [k for k, v in _elections_cache.items() if v[0] <= now]:
+        del _elections_cache[stale]
+    _elections_cache[key] = (now + ELECTIONS_CACHE_TTL, etag, body, next_cursor)
+    while len(_elections_cache) > ELECTIONS_CACHE_SIZE:
+        _elections_cache.popitem(last=False)
+    return etag, body, next_cursor
 
 
-@app.post("/elections", response_model=ElectionSchema, status_code=201)
-def create_election(
-    payload: CreateElectionSchema,
-    db: Session = Depends(get_db),
-    admin_user: dict = Depends(require_admin_role),
+@app.get("/elections", response_model=list[ElectionSchema])
+async def list_elections(
+    after: int | None = None,
+    limit: int = Query(100, ge=1),
+    status: str | None = None,
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    print(f"Admin user '{admin_user.get('email')}' is creating an election.")
+    """Return elections in id order, one keyset page at a time.
 
-    # 1. Pin the metadata to IPFS and derive the on-chain hash (sha256 digest)
-    cid = pin_json(payload.metadata)
-    digest = hashlib.sha256(payload.metadata.encode()).digest()
-    meta_hash = digest
-    verifier_addr = (
-        Web3.to_checksum_address(payload.verifier)
-        if payload.verifier
-        else Web3.to_checksum_address("0x" + "0" * 40)
+    Pass the ``X-Next-Cursor`` response header as ``after`` to fetch the next
+    page; the header is absent on the last page.
+    """
+    etag, body, next_cursor = await _election_page(
+        db, after, min(limit, ELECTIONS_PAGE_MAX), status
     )
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
-    # 2. Build & send the on-chain transaction
-    account = Account.from_key(PRIVATE_KEY)
-    contract = get_manager_contract()
-
-    try:
 
-        try:
-            encoded_calldata = contract.encodeABI(
-                fn_name="createElection", args=[meta_hash, verifier_addr]
-            )
-        except Exception:
-            encoded_calldata = "0x"
-        if not (
-            isinstance(encoded_calldata, (bytes, str))
-            and str(encoded_calldata).startswith("0x")
-        ):
-            # In tests the mocked method may return a MagicMock object instead of
-            # real calldata. Replace it with a trivial value so signing succeeds.
-            encoded_calldata = "0x"
-
-        tx = {
-            "to": ELECTION_MANAGER,  # The address of the proxy contract
-            "from": account.address,
-            "data": encoded_calldata,
-            "chainId": CHAIN_ID,
-            "gas": 3_000_000,
-            "gasPrice": web3.eth.gas_price,
-            "nonce": web3.eth.get_transaction_count(account.address),
-        }
-        # --- END OF FIX ---
-
-        signed = account.sign_transaction(tx)
-        raw = getattr(signed, "rawTransaction", None)
-        if raw is None:
-            raw = signed.raw_transaction
-        tx_hash = web3.eth.send_raw_transaction(raw)
-        receipt = web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-        if receipt.status != 1:
-            # This will now give a more direct error if the transaction reverts
-            raise HTTPException(
-                status_code=500,
-                detail=f"On-chain transaction reverted. Tx hash: {tx_hash.hex()}",
-            )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"On-chain transaction failed: {e}")
-
-    # 3. Parse the ElectionCreated event
-    try:
-        # This part should now succeed because the transaction no longer reverts
-        events = contract.events.ElectionCreated().process_receipt(receipt)
-        if not events:
-            # This is the error you were seeing
-            raise ValueError("ElectionCreated event not found in transaction logs")
-        args_data = events[0].args
-        if isinstance(args_data, dict):
-            on_chain_id = args_data.get("id")
-            event_meta_bytes = args_data.get("meta")
-        else:
-            on_chain_id = args_data.id
-            event_meta_bytes = args_data.meta
-        meta_hex_string = Web3.to_hex(event_meta_bytes)
+# packages/backend/main.py
 
-        if meta_hex_string != Web3.to_hex(meta_hash):
-            # In unit tests the event metadata is mocked and may not match the
-            # calculated hash. Skip the strict check in that case.
-            logging.warning("Mismatch between emitted meta hash and calculated value")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Event parsing failed: {e}")
+def _broadcast_election(meta_hash: bytes, verifier_addr: str) -> str:
+    """Sign and send the ``createElection`` transaction; return its hash."""
+    contract = get_manager_contract()
 
-    # 4. Read the start/end from the contract
     try:
-        election_data = contract.functions.elections(on_chain_id).call()
-        start_block, end_block, chain_verifier = (
-            election_data[0],
-            election_data[1],
-            election_data[2],
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Could not read election state from contract: {e}"
+        encoded_calldata = contract.encodeABI(
+            fn_name="createElection", args=[meta_hash, verifier_addr]
         )
+    except Exception:
+        encoded_calldata = "0x"
+    if not (
+        isinstance(encoded_calldata, (bytes, str))
+        and str(encoded_calldata).startswith("0x")
+    ):
+        # In tests the mocked method may return a MagicMock object instead of
+        # real calldata. Replace it with a trivial value so signing succeeds.
+        encoded_calldata = "0x"
+
+    # Nonce, fees and chain id are filled in by the shared sender.
+    return TX_SENDER.send({
+        "to": ELECTION_MANAGER,  # The address of the proxy contract
+        "data": encoded_calldata,
+        "gas": 3_000_000,
+    })
+
+
+def _election_from_receipt(receipt, meta: str) -> DbElection:
+    """Build the election row from an ``ElectionCreated`` receipt."""
+    contract = get_manager_contract()
+    events = contract.events.ElectionCreated().process_receipt(receipt)
+    if not events:
+        raise ValueError("ElectionCreated event not found in transaction logs")
+    args_data = events[0].args
+    if isinstance(args_data, dict):
+        on_chain_id = args_data.get("id")
+        event_meta_bytes = args_data.get("meta")
+    else:
+        on_chain_id = args_data.id
+        event_meta_bytes = args_data.meta
+    meta_hex_string = Web3.to_hex(event_meta_bytes)
+
+    if meta_hex_string != meta:
+        # In unit tests the event metadata is mocked and may not match the
+        # calculated hash. Skip the strict check in that case.
+        logging.warning("Mismatch between emitted meta hash and calculated value")
 
-    # 5. Persist in Postgres
-    db_election = DbElection(
+    start_block, end_block, chain_verifier = contract.functions.elections(on_chain_id).call()[:3]
+    return DbElection(
         id=on_chain_id,
         meta=meta_hex_string,
         start=start_block,
@@ -539,29 +606,253 @@ def create_election(
         status="pending",
         verifier=Web3.to_checksum_address(chain_verifier),
     )
-    db.add(db_election)
+
+
+ELECTION_JOB_PROGRESS = {"pending": 0, "submitted": 50, "done": 100, "error": 100}
+
+
+def _election_job_view(job: ElectionJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "tx_hash": job.tx_hash,
+        "election_id": job.election_id,
+        "error": job.error,
+    }
+
+
+def _election_job_event(job: ElectionJob) -> dict:
+    """Render a job as a WS event shaped like the proof job events."""
+    view = _election_job_view(job)
+    return {"state": view.pop("status"), "progress": ELECTION_JOB_PROGRESS[job.status], **view}
+
+
+def _publish_election_job(job: ElectionJob) -> None:
+    event = _election_job_event(job)
+    del event["job_id"]
+    publish_proof_event(job.id, **event)
+
+
+async def _finish_election_job(db: AsyncSession, job: ElectionJob, status: str, **values) -> bool:
+    """Move a submitted job to a final state; False if another worker did first."""
+    result = await db.execute(
+        update(ElectionJob)
+        .where(ElectionJob.id == job.id, ElectionJob.status == "submitted")
+        .values(status=status, updated_at=datetime.now(timezone.utc), **values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if not result.rowcount:
+        return False
+    await db.refresh(job)
+    await run_in_threadpool(_publish_election_job, job)
+    return True
+
+
+async def _record_election_tx(db: AsyncSession, job: ElectionJob, tx_hash: str) -> None:
+    """Store a replacement transaction hash on the job.
+
+    The sender only tracks replacements in memory; after a restart the
+    watcher looks the job up by this hash.
+    """
+    result = await db.execute(
+        update(ElectionJob)
+        .where(ElectionJob.id == job.id, ElectionJob.status == "submitted")
+        .values(tx_hash=tx_hash, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount:
+        await db.refresh(job)
+        await run_in_threadpool(_publish_election_job, job)
+
+
+async def _settle_election_job(db: AsyncSession, job: ElectionJob) -> bool:
+    """Process a submitted job's receipt; return False while it is still unmined."""
+    # Also replaces the transaction with a higher fee when it is stuck.
+    receipt, tx_hash = await run_in_threadpool(TX_SENDER.poll, job.tx_hash)
+    if tx_hash != job.tx_hash:
+        await _record_election_tx(db, job, tx_hash)
+    if receipt is None:
+        created = job.created_at
+        if created.tzinfo is None:  # SQLite drops the offset
+            created = created.replace(tzinfo=timezone.utc)
+        age = datetime.now(timezone.utc) - created
+        if age.total_seconds() < ELECTION_TX_TIMEOUT:
+            return False
+        await _finish_election_job(
+            db, job, "error", error=f"No receipt after {ELECTION_TX_TIMEOUT:.0f}s for {job.tx_hash}"
+        )
+        return True
+    if receipt.status != 1:
+        await _finish_election_job(
+            db, job, "error", error=f"On-chain transaction reverted. Tx hash: {job.tx_hash}"
+        )
+        return True
     try:
-        db.commit()
+        election = await run_in_threadpool(_election_from_receipt, receipt, job.meta)
+    except Exception as e:
+        await _finish_election_job(db, job, "error", error=f"Event parsing failed: {e}")
+        return True
+
+    db.add(election)
+    try:
+        await db.commit()
     except IntegrityError:
-        db.rollback()
-        existing = db.query(DbElection).filter_by(id=on_chain_id).first()
-        if existing:
-            return existing
-        raise HTTPException(
-            status_code=500,
-            detail=f"Database commit failed for election ID {on_chain_id}.",
-        )
+        # Already persisted by another API process watching the same job.
+        await db.rollback()
+    invalidate_elections_cache()
+    if await _finish_election_job(db, job, "done", election_id=election.id):
+        send_push_notification("New Election Created", f"Election {election.id} is now open")
+    return True
+
+
+async def poll_election_jobs() -> int:
+    """Settle every submitted election job; return how many are still unmined."""
+    async with AsyncSessionLocal() as db:
+        jobs = (
+            await db.scalars(
+                select(ElectionJob).where(ElectionJob.status == "submitted").order_by(ElectionJob.created_at)
+            )
+        ).all()
+        waiting = 0
+        for job in jobs:
+            try:
+                if not await _settle_election_job(db, job):
+                    waiting += 1
+            except Exception as exc:
+                # RPC or database hiccup: try again on the next pass.
+                await db.rollback()
+                logging.warning(f"Could not check election job {job.id}: {exc}")
+                waiting += 1
+    return waiting
+
+
+_election_watcher: asyncio.Task | None = None
+_election_jobs_submitted = 0
+
+
+async def _watch_election_jobs() -> None:
+    while True:
+        await asyncio.sleep(ELECTION_RECEIPT_POLL)
+        submitted = _election_jobs_submitted
+        try:
+            waiting = await poll_election_jobs()
+        except Exception:
+            # E.g. the database is unreachable; the jobs are still submitted.
+            logging.exception("Election receipt watcher pass failed")
+            continue
+        if not waiting and submitted == _election_jobs_submitted:
+            return
+
+
+def ensure_election_watcher() -> None:
+    """Start the receipt watcher on the running loop unless it is already polling."""
+    global _election_watcher, _election_jobs_submitted
+    _election_jobs_submitted += 1
+    if _election_watcher is None or _election_watcher.done():
+        _election_watcher = asyncio.get_running_loop().create_task(_watch_election_jobs())
+
+
+@app.post("/elections", status_code=202)
+async def create_election(
+    payload: CreateElectionSchema,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: dict = Depends(require_admin_role),
+):
+    """Broadcast the ``createElection`` transaction and return a job to track.
+
+    The receipt is processed in the background: once mined the election is
+    persisted and the job moves to ``done`` with its ``election_id``. Follow
+    it at ``GET /elections/jobs/{job_id}`` or ``/ws/elections/jobs/{job_id}``.
+    """
+    print(f"Admin user '{admin_user.get('email')}' is creating an election.")
 
-    db.refresh(db_election)
-    send_push_notification(
-        "New Election Created", f"Election {on_chain_id} is now open"
+    # 1. Derive the on-chain hash (sha256 digest); pinning happens in the
+    # background, meanwhile the metadata is served from the local cache.
+    meta_hash = hashlib.sha256(payload.metadata.encode()).digest()
+    await run_in_threadpool(IPFS.cache.put, cid_from_meta_hash(meta_hash.hex()), payload.metadata.encode())
+    verifier_addr = (
+        Web3.to_checksum_address(payload.verifier)
+        if payload.verifier
+        else Web3.to_checksum_address("0x" + "0" * 40)
+    )
+    now = datetime.now(timezone.utc)
+    job = ElectionJob(
+        id=uuid.uuid4().hex,
+        meta=Web3.to_hex(meta_hash),
+        status="pending",
+        created_at=now,
+        updated_at=now,
     )
-    return db_election
+    db.add(job)
+    await enqueue_pin(db, meta_hash.hex(), payload.metadata)
+    await db.commit()
+    try:
+        await run_in_threadpool(pin_outbox.delay)
+    except Exception as e:
+        # The beat schedule drains the outbox anyway.
+        logging.warning(f"Could not queue pin_outbox: {e}")
+
+    # 2. Build & send the on-chain transaction; the receipt is awaited elsewhere
+    try:
+        job.tx_hash = await run_in_threadpool(_broadcast_election, meta_hash, verifier_addr)
+    except Exception as e:
+        job.status, job.error = "error", f"On-chain transaction failed: {e}"
+        job.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        raise HTTPException(status_code=500, detail=job.error)
+    job.status = "submitted"
+    job.updated_at = datetime.now(timezone.utc)
+    await db.commit()
+    await run_in_threadpool(_publish_election_job, job)
+    ensure_election_watcher()
+
+    response.headers["Location"] = f"/elections/jobs/{job.id}"
+    return _election_job_view(job)
+
+
+@app.get("/elections/jobs/{job_id}")
+async def get_election_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(ElectionJob, job_id)
+    if not job:
+        raise HTTPException(404, "election job not found")
+    return _election_job_view(job)
+
+
+@app.websocket("/ws/elections/jobs/{job_id}")
+async def ws_election_job(websocket: WebSocket, job_id: str):
+    await websocket.accept()
+    # Subscribe before reading the current state so no transition is missed.
+    queue = PROOF_EVENTS.subscribe(job_id) if PROOF_EVENTS.enabled else None
+    try:
+        while True:
+            async with AsyncSessionLocal() as db:
+                job = await db.get(ElectionJob, job_id)
+            if job is None:
+                msg = {"state": "error", "progress": 0, "error": "election job not found"}
+            else:
+                msg = _election_job_event(job)
+            await websocket.send_json(msg)
+            if msg["state"] in {"done", "error"}:
+                break
+            if queue is None:
+                await asyncio.sleep(2)
+                continue
+            try:
+                await asyncio.wait_for(queue.get(), PROOF_EVENTS_RESYNC)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if queue is not None:
+            PROOF_EVENTS.unsubscribe(job_id, queue)
+    await websocket.close()
 
 
 @app.get("/elections/{election_id}", response_model=ElectionSchema)
-def get_election(election_id: int, db: Session = Depends(get_db)):
-    election = db.query(DbElection).filter(DbElection.id == election_id).first()
+async def get_election(election_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    election = await db.get(DbElection, election_id)
     if not election:
         raise HTTPException(404, "election not found")
     return election
@@ -569,8 +860,10 @@ def get_election(election_id: int, db: Session = Depends(get_db)):
 
 # --- NEW ENDPOINT TO SERVE METADATA ---
 @app.get("/elections/{election_id}/meta", response_model=Any)
-def get_election_metadata(election_id: int, db: Session = Depends(get_db)):
-    election = db.query(DbElection).filter(DbElection.id == election_id).first()
+async def get_election_metadata(
+    election_id: int, db: AsyncSession = Depends(get_async_read_db)
+):
+    election = await db.get(DbElection, election_id)
     if not election:
         raise HTTPException(404, "metadata for election not found")
     try:
@@ -578,11 +871,31 @@ def get_election_metadata(election_id: int, db: Session = Depends(get_db)):
     except ValueError:
         raise HTTPException(400, "invalid metadata hash")
     try:
-        return fetch_json(cid)
+        # The meta hash is the sha256 of the pinned JSON, so gateway answers
+        # are verified before being cached for good.
+        return await afetch_json(cid, sha256=bytes.fromhex(election.meta.removeprefix("0x")))
     except Exception as e:
         raise HTTPException(500, f"failed to fetch metadata: {e}")
 
 
+@app.get("/elections/{election_id}/pin")
+async def get_election_pin(election_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """IPFS pin status of an election's metadata."""
+    election = await db.get(DbElection, election_id)
+    if not election:
+        raise HTTPException(404, "election not found")
+    pin = await db.scalar(select(PinOutbox).filter_by(meta=election.meta.removeprefix("0x")))
+    if pin is None:
+        return {"status": "unknown"}
+    return {
+        "status": pin.status,
+        "cid": pin.cid,
+        "attempts": pin.attempts,
+        "next_attempt_at": pin.next_attempt_at if pin.status == "pending" else None,
+        "error": pin.error,
+    }
+
+
 @app.patch("/elections/{election_id}", response_model=ElectionSchema)
 def update_election(
     election_id: int, payload: UpdateElectionSchema, db: Session = Depends(get_db)
@@ -594,22 +907,26 @@ def update_election(
     for key, value in data_to_update.items():
         setattr(election, key, value)
     db.commit()
+    invalidate_elections_cache()
     db.refresh(election)
     return election
 
 
 @app.get("/api/gas")
 async def gas_estimate():
-    """Return a fake 95th percentile gas fee in gwei."""
-    return {"p95": 42}
-
-
-@app.post("/api/paymaster")
-async def paymaster_data(user_op: dict):
-    """Sign a UserOperation for the VerifyingPaymaster."""
-    if PAYMASTER == Web3.to_checksum_address("0x" + "0" * 40):
-        raise HTTPException(500, "Paymaster not configured")
-
+    """Return the next base fee plus p50/p95/p99 priority fees, in gwei."""
+    snapshot = GAS_ORACLE.snapshot()
+    if snapshot is None:
+        raise HTTPException(503, "gas oracle has no recent blocks")
+    base_fee = snapshot["baseFee"]
+    estimate = {"block": snapshot["block"], "baseFee": round(base_fee / 10**9, 3)}
+    for pct in PERCENTILES:
+        estimate[f"p{pct}"] = round((base_fee + snapshot["tips"][pct]) / 10**9, 3)
+    return estimate
+
+
+def _paymaster_op(user_op: dict) -> tuple:
+    """Validate a UserOperation for sponsorship and return it as a tuple."""
     target = Web3.to_checksum_address(user_op.get("target", ELECTION_MANAGER))
     if target != ELECTION_MANAGER:
         raise HTTPException(400, "unsupported target")
@@ -618,42 +935,70 @@ async def paymaster_data(user_op: dict):
     if not call_data.startswith("0x7cb85bf8"):
         raise HTTPException(400, "invalid callData")
 
-    op_tuple = (
+    # Sponsors pay the fee the operation asks for; refuse outliers.
+    ceiling = GAS_ORACLE.fees(99)
+    max_fee = int(user_op["maxFeePerGas"], 16)
+    if ceiling and PAYMASTER_MAX_FEE_MULTIPLIER:
+        limit = ceiling.get("maxFeePerGas", ceiling.get("gasPrice"))
+        if max_fee > PAYMASTER_MAX_FEE_MULTIPLIER * limit:
+            raise HTTPException(400, "maxFeePerGas too high")
+
+    return (
         Web3.to_checksum_address(user_op["sender"]),
         int(user_op["nonce"], 16),
-        user_op.get("initCode", "0x"),
-        call_data,
+        Web3.to_bytes(hexstr=user_op.get("initCode", "0x")),
+        Web3.to_bytes(hexstr=call_data),
         int(user_op["callGasLimit"], 16),
         int(user_op["verificationGasLimit"], 16),
         int(user_op["preVerificationGas"], 16),
-        int(user_op["maxFeePerGas"], 16),
+        max_fee,
         int(user_op["maxPriorityFeePerGas"], 16),
         b"",
         b"",
     )
 
-    paymaster = get_paymaster_contract()
-    valid_until = (1 << 48) - 1
-    valid_after = 0
-    h = paymaster.functions.getHash(op_tuple, valid_until, valid_after).call()
-    msg = encode_defunct(hexstr=Web3.to_hex(h))
-    sig = Account.sign_message(msg, private_key=PRIVATE_KEY).signature.hex()
-    timestamp_bytes = abi_encode(["uint48", "uint48"], [valid_until, valid_after]).hex()
-    paymaster_and_data = "0x" + PAYMASTER[2:] + timestamp_bytes + sig[2:]
+
+def _check_paymaster_configured():
+    if PAYMASTER == Web3.to_checksum_address("0x" + "0" * 40):
+        raise HTTPException(500, "Paymaster not configured")
+
+
+@app.post("/api/paymaster")
+async def paymaster_data(user_op: dict):
+    """Sign a UserOperation for the VerifyingPaymaster."""
+    _check_paymaster_configured()
+    op = _paymaster_op(user_op)
+    paymaster_and_data = await run_in_threadpool(PAYMASTER_SIGNER.sign, op)
     return {"paymaster": PAYMASTER, "paymasterAndData": paymaster_and_data}
 
 
+@app.post("/api/paymaster/batch")
+async def paymaster_batch(user_ops: list[dict]):
+    """Sign many UserOperations at once; results keep the request order."""
+    _check_paymaster_configured()
+    if len(user_ops) > PAYMASTER_BATCH_MAX:
+        raise HTTPException(413, f"batch exceeds {PAYMASTER_BATCH_MAX} operations")
+    ops = []
+    for i, user_op in enumerate(user_ops):
+        try:
+            ops.append(_paymaster_op(user_op))
+        except HTTPException as exc:
+            raise HTTPException(exc.status_code, f"userOp {i}: {exc.detail}")
+    signed = await run_in_threadpool(PAYMASTER_SIGNER.sign_many, ops)
+    return [{"paymaster": PAYMASTER, "paymasterAndData": data} for data in signed]
+
+
 @app.post("/api/zk/{circuit}")
 async def post_proof_generic(
     circuit: str,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
     x_curve: str | None = Header("bn254", alias="x-curve"),
 ):
     user_email = user.get("email")
     day = datetime.utcnow().strftime("%Y-%m-%d")
-    if not increment_quota(db, user_email, day):
+    if not await charge_quota(db, user_email, day):
         raise HTTPException(429, "proof quota exceeded")
 
     curve = x_curve.lower() if x_curve else "bn254"
@@ -663,7 +1008,8 @@ async def post_proof_generic(
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    cached = cache_get(circuit, payload, curve)
+    # Redis and the circuit table are read synchronously; keep them off the loop.
+    cached = await run_in_threadpool(cache_get, circuit, payload, curve)
     if cached:
         return {"status": "done", **cached}
 
@@ -671,11 +1017,35 @@ async def post_proof_generic(
     return {"job_id": job.id}
 
 
+@app.post("/api/zk/{circuit}/batch")
+async def post_proof_batch(
+    circuit: str,
+    payload: BatchProofInput,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+    x_curve: str | None = Header("bn254", alias="x-curve"),
+):
+    """Queue one task proving every input; poll it like a single proof job."""
+    if len(payload.inputs) > PROOF_BATCH_MAX:
+        raise HTTPException(413, f"batch exceeds {PROOF_BATCH_MAX} inputs")
+    user_email = user.get("email")
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    if not await charge_quota(db, user_email, day, amount=len(payload.inputs)):
+        raise HTTPException(429, "proof quota exceeded")
+
+    curve = x_curve.lower() if x_curve else "bn254"
+    job = generate_proof_batch.delay(circuit, payload.inputs, curve)
+    return {"job_id": job.id, "count": len(payload.inputs)}
+
+
 @app.get("/api/zk/{circuit}/{job_id}")
 def get_proof_generic(circuit: str, job_id: str):
     async_result = celery_app.AsyncResult(job_id)
     if async_result.state in {"PENDING", "STARTED"}:
         return {"status": async_result.state.lower()}
+    if async_result.state == "PROGRESS":
+        info = async_result.info if isinstance(async_result.info, dict) else {}
+        return {"status": "running", **info}
     if async_result.state == "SUCCESS":
         result_data = async_result.result
         if isinstance(result_data, str):
@@ -691,47 +1061,101 @@ def get_proof_generic(circuit: str, job_id: str):
     return {"status": "error"}
 
 
+def _job_event(job_id: str) -> dict:
+    """Read a job's current state from the result backend as a WS event."""
+    async_result = celery_app.AsyncResult(job_id)
+    if async_result.state == "PENDING":
+        return {"state": "queued", "progress": 0}
+    if async_result.state == "SUCCESS":
+        event = {"state": "done", "progress": 100}
+        if isinstance(async_result.result, dict) and "stages" in async_result.result:
+            event.update(stage="persisted", stages=async_result.result["stages"])
+        return event
+    if async_result.state in {"STARTED", "PROGRESS"}:
+        info = async_result.info if isinstance(async_result.info, dict) else {}
+        event = {"state": "running", "progress": info.get("progress", 0)}
+        if "stage" in info:
+            event.update(stage=info["stage"], stages=info.get("stages", {}))
+        return event
+    return {"state": "error", "progress": 0}
+
+
 @app.websocket("/ws/proofs/{job_id}")
 async def ws_proofs(websocket: WebSocket, job_id: str):
     await websocket.accept()
-    while True:
-        async_result = celery_app.AsyncResult(job_id)
-        if async_result.state in {"PENDING", "STARTED"}:
-            progress = (
-                async_result.info.get("progress", 0)
-                if isinstance(async_result.info, dict)
-                else 0
-            )
-            await websocket.send_json(
-                {"state": async_result.state.lower(), "progress": progress}
-            )
-        elif async_result.state == "SUCCESS":
-            await websocket.send_json({"state": "done", "progress": 100})
-            break
-        else:
-            await websocket.send_json({"state": "error", "progress": 0})
-            break
-        await asyncio.sleep(2)
+    if not PROOF_EVENTS.enabled:
+        # Without Redis pub/sub fall back to polling the result backend.
+        while True:
+            msg = await run_in_threadpool(_job_event, job_id)
+            await websocket.send_json(msg)
+            if msg["state"] in {"done", "error"}:
+                break
+            await asyncio.sleep(2)
+        await websocket.close()
+        return
+
+    # Subscribe before reading the current state so no transition is missed.
+    queue = PROOF_EVENTS.subscribe(job_id)
+    try:
+        msg = await run_in_threadpool(_job_event, job_id)
+        while True:
+            event = {"state": msg["state"], "progress": msg.get("progress", 0)}
+            if "stage" in msg:
+                event.update(stage=msg["stage"], stages=msg.get("stages", {}))
+            await websocket.send_json(event)
+            if msg["state"] in {"done", "error"}:
+                break
+            try:
+                msg = await asyncio.wait_for(queue.get(), PROOF_EVENTS_RESYNC)
+            except asyncio.TimeoutError:
+                msg = await run_in_threadpool(_job_event, job_id)
+    finally:
+        PROOF_EVENTS.unsubscribe(job_id, queue)
     await websocket.close()
 
 
 @app.get("/api/quota")
-def get_quota(db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
+async def get_quota(
+    db: AsyncSession = Depends(get_async_read_db), user: dict = Depends(get_current_user)
+):
     """Return remaining proof quota for the current user."""
     user_email = user.get("email")
     day = datetime.utcnow().strftime("%Y-%m-%d")
-    pr = db.query(ProofRequest).filter_by(user=user_email, day=day).first()
-    used = pr.count if pr else 0
+    used = await QUOTA_ENGINE.used(user_email, day)
+    if used is None:
+        used = await _quota_used(db, user_email, day)
     return {"left": PROOF_QUOTA - used}
 
 
 @app.get("/proofs", response_model=list[ProofAuditSchema])
-def list_proofs(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    """Return recent proof audit entries."""
-    return (
-        db.query(ProofAudit)
-        .order_by(ProofAudit.id.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+async def list_proofs(
+    response: Response,
+    before: int | None = None,
+    limit: int = Query(50, ge=1),
+    circuit_hash: str | None = None,
+    input_hash: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Return proof audit entries, newest first, one keyset page at a time.
+
+    Pass the ``X-Next-Cursor`` response header as ``before`` to fetch the next
+    page. ``since``/``until`` bound the timestamp (inclusive/exclusive).
+    """
+    limit = min(limit, PROOFS_PAGE_MAX)
+    stmt = select(ProofAudit).order_by(ProofAudit.id.desc()).limit(limit + 1)
+    if before is not None:
+        stmt = stmt.where(ProofAudit.id < before)
+    if circuit_hash:
+        stmt = stmt.where(ProofAudit.circuit_hash == circuit_hash)
+    if input_hash:
+        stmt = stmt.where(ProofAudit.input_hash == input_hash)
+    if since:
+        stmt = stmt.where(ProofAudit.timestamp >= since)
+    if until:
+        stmt = stmt.where(ProofAudit.timestamp < until)
+    rows = (await db.execute(stmt)).scalars().all()
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = str(rows[limit - 1].id)
+    return rows[:limit]
@@ -0,0 +1,63 @@
+"""proof_audit: typed timestamp and pagination indexes
+
+Tables were historically created by ``Base.metadata.create_all`` at startup,
+so this first revision inspects the live schema and only applies what is
+missing.
+
+Revision ID: 0001_proof_audit_timestamp
+Revises: 
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_proof_audit_timestamp'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "idx_proof_audit_circuit_id": ["circuit_hash", "id"],
+    "idx_proof_audit_input_id": ["input_hash", "id"],
+    "idx_proof_audit_timestamp_id": ["timestamp", "id"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("proof_audit"):
+        return  # created with the current schema on first startup
+    columns = {c["name"]: c for c in inspector.get_columns("proof_audit")}
+    if not isinstance(columns["timestamp"]["type"], sa.DateTime):
+        if bind.dialect.name == "postgresql":
+            # Stored values are naive UTC ISO strings.
+            op.execute(
+                'ALTER TABLE proof_audit ALTER COLUMN "timestamp" TYPE TIMESTAMPTZ '
+                "USING (\"timestamp\"::timestamp AT TIME ZONE 'UTC')"
+            )
+        else:
+            # SQLite is dynamically typed (and a batch copy would CAST the
+            # strings to numbers); just store the format DateTime expects.
+            op.execute("UPDATE proof_audit SET timestamp = replace(timestamp, 'T', ' ')")
+    existing = {ix["name"] for ix in inspector.get_indexes("proof_audit")}
+    for name, cols in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, "proof_audit", cols)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in INDEXES:
+        op.drop_index(name, table_name="proof_audit")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            'ALTER TABLE proof_audit ALTER COLUMN "timestamp" TYPE VARCHAR '
+            "USING to_char(\"timestamp\" AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS.US')"
+        )
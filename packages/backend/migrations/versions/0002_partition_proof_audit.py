@@ -0,0 +1,114 @@
+"""proof_audit: monthly range partitions on Postgres
+
+The existing table is attached, without copying, as the partition holding
+everything up to the end of the current month, which it is still being
+written for. Monthly partitions are created from next month on;
+``backend.partitions.maintain`` keeps creating them ahead of time and
+archives expired ones. SQLite is left unpartitioned.
+
+Revision ID: 0002_partition_proof_audit
+Revises: 0001_proof_audit_timestamp
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_partition_proof_audit'
+down_revision: Union[str, None] = '0001_proof_audit_timestamp'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+INDEXES = {
+    "ix_proof_audit_proof_root": ["proof_root"],
+    "idx_proof_audit_circuit_id": ["circuit_hash", "id"],
+    "idx_proof_audit_input_id": ["input_hash", "id"],
+    "idx_proof_audit_timestamp_id": ["timestamp", "id"],
+}
+
+
+def _month(offset: int) -> datetime:
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _relkind(bind) -> str | None:
+    return bind.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE relname = 'proof_audit' AND relkind IN ('r', 'p')")
+    ).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or _relkind(bind) != "r":
+        return
+    seq = bind.execute(sa.text("SELECT pg_get_serial_sequence('proof_audit', 'id')")).scalar()
+
+    op.execute("ALTER TABLE proof_audit RENAME TO proof_audit_legacy")
+    # The partition needs the parent's primary key, which includes the
+    # partition key.
+    op.execute("ALTER TABLE proof_audit_legacy DROP CONSTRAINT proof_audit_pkey")
+    op.execute('ALTER TABLE proof_audit_legacy ADD CONSTRAINT proof_audit_legacy_pkey PRIMARY KEY (id, "timestamp")')
+    # A validated CHECK matching the bound lets ATTACH (and SET NOT NULL)
+    # skip their own full scan under an exclusive lock; VALIDATE only
+    # blocks schema changes.
+    op.execute(
+        "ALTER TABLE proof_audit_legacy ADD CONSTRAINT proof_audit_legacy_bound "
+        f"""CHECK ("timestamp" IS NOT NULL AND "timestamp" < '{_month(1).isoformat()}') NOT VALID"""
+    )
+    op.execute("ALTER TABLE proof_audit_legacy VALIDATE CONSTRAINT proof_audit_legacy_bound")
+    op.execute('ALTER TABLE proof_audit_legacy ALTER COLUMN "timestamp" SET NOT NULL')
+    for index in sa.inspect(bind).get_indexes("proof_audit_legacy"):
+        op.execute(f'ALTER INDEX "{index["name"]}" RENAME TO "{index["name"]}_legacy"')
+
+    # Unique constraints on a partitioned table must include the partition key.
+    op.execute(
+        "CREATE TABLE proof_audit ("
+        f"id INTEGER NOT NULL DEFAULT nextval('{seq}'::regclass), "
+        "circuit_hash VARCHAR NOT NULL, "
+        "input_hash VARCHAR NOT NULL, "
+        "proof_root VARCHAR NOT NULL, "
+        '"timestamp" TIMESTAMPTZ NOT NULL, '
+        'PRIMARY KEY (id, "timestamp")'
+        ') PARTITION BY RANGE ("timestamp")'
+    )
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY proof_audit.id")
+    for name, cols in INDEXES.items():
+        op.create_index(name, "proof_audit", cols)
+
+    op.execute(
+        "ALTER TABLE proof_audit ATTACH PARTITION proof_audit_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{_month(1).isoformat()}')"
+    )
+    op.execute("ALTER TABLE proof_audit_legacy DROP CONSTRAINT proof_audit_legacy_bound")
+    for n in range(1, MONTHS_AHEAD + 1):
+        lower, upper = _month(n), _month(n + 1)
+        op.execute(
+            f"CREATE TABLE proof_audit_p{lower:%Y%m} PARTITION OF proof_audit "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or _relkind(bind) != "p":
+        return
+    seq = bind.execute(sa.text("SELECT pg_get_serial_sequence('proof_audit', 'id')")).scalar()
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    op.execute("CREATE TABLE proof_audit_flat (LIKE proof_audit INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO proof_audit_flat SELECT * FROM proof_audit")
+    op.execute("DROP TABLE proof_audit")
+    op.execute("ALTER TABLE proof_audit_flat RENAME TO proof_audit")
+    op.execute("ALTER TABLE proof_audit ADD CONSTRAINT proof_audit_pkey PRIMARY KEY (id)")
+    op.execute(f"ALTER SEQUENCE {seq} OWNED BY proof_audit.id")
+    for name, cols in INDEXES.items():
+        op.create_index(name, "proof_audit", cols)
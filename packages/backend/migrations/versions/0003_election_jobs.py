@@ -0,0 +1,42 @@
+"""election_jobs: track election creation transactions
+
+Revision ID: 0003_election_jobs
+Revises: 0002_partition_proof_audit
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_election_jobs'
+down_revision: Union[str, None] = '0002_partition_proof_audit'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("election_jobs"):
+        return  # created by Base.metadata.create_all on startup
+    op.create_table(
+        "election_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("meta", sa.String(), nullable=False),
+        sa.Column("tx_hash", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("election_id", sa.BigInteger(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_election_jobs_status", "election_jobs", ["status"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_election_jobs_status", table_name="election_jobs")
+    op.drop_table("election_jobs")
@@ -0,0 +1,44 @@
+"""pin_outbox: durable queue of IPFS pins
+
+Revision ID: 0004_pin_outbox
+Revises: 0003_election_jobs
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_pin_outbox'
+down_revision: Union[str, None] = '0003_election_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("pin_outbox"):
+        return  # created by Base.metadata.create_all on startup
+    op.create_table(
+        "pin_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("meta", sa.String(), nullable=False, unique=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("cid", sa.String(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("idx_pin_outbox_due", "pin_outbox", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_pin_outbox_due", table_name="pin_outbox")
+    op.drop_table("pin_outbox")
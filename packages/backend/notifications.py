@@ -0,0 +1,235 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+PUSH_QUEUED = Gauge("push_notifications_queued", "Notifications waiting for the Push dispatcher")
+PUSH_RESULTS = Counter(
+    "push_notifications_total", "Push Protocol deliveries by outcome", ["result"]
+)
+PUSH_COALESCED = Counter(
+    "push_notifications_coalesced_total", "Notifications merged into another delivery"
+)
+
+# Retrying these cannot succeed; the payload goes straight to the dead letters.
+PERMANENT_STATUS = range(400, 500)
+RETRY_STATUS = (408, 429)
+
+
+def coalesce(batch: list[tuple[str, str, tuple[str, ...] | None]]) -> list[tuple[str, str, list[str] | None]]:
+    """Merge notifications with the same title and body into one delivery.
+
+    Recipients are unioned; a broadcast (no recipients) absorbs targeted
+    copies of the same message.
+    """
+    groups: dict[tuple[str, str], set[str] | None] = {}
+    for title, body, recipients in batch:
+        key = (title, body)
+        if recipients is None:
+            groups[key] = None
+        elif key not in groups:
+            groups[key] = set(recipients)
+        elif groups[key] is not None:
+            groups[key].update(recipients)
+    PUSH_COALESCED.inc(len(batch) - len(groups))
+    return [(title, body, sorted(r) if r is not None else None) for (title, body), r in groups.items()]
+
+
+class PushDispatcher:
+    """Delivers Push Protocol notifications off the caller's path.
+
+    ``notify`` only enqueues and is safe to call from any thread. A daemon
+    thread runs an event loop with one pooled ``httpx.AsyncClient``: it
+    collects notifications for ``batch_window`` seconds, coalesces identical
+    messages, and sends the deliveries concurrently. Failures are retried
+    with exponential backoff; after ``max_attempts`` (or on a non-retryable
+    4xx) the payload is appended to a JSONL dead-letter file.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        channel: str | None,
+        env: str,
+        chain_id: int,
+        batch_window: float = 0.2,
+        max_batch: int = 100,
+        max_recipients: int = 1000,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 10.0,
+        max_queue: int = 10_000,
+        dead_letter_path: str | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.api_url = api_url
+        self.channel = channel
+        self.env = env
+        self.chain_id = chain_id
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_recipients = max_recipients
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.dead_letter_path = dead_letter_path or os.path.join(
+            tempfile.gettempdir(), "push_dead_letter.jsonl"
+        )
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.channel)
+
+    def payload(self, title: str, body: str, recipients: list[str] | None) -> dict:
+        return {
+            "senderType": 0,
+            "type": 4 if recipients else 1,
+            "identityType": 2,
+            "notification": {"title": title, "body": body},
+            "payload": {"title": title, "body": body, "cta": "", "img": ""},
+            "recipients": (
+                [f"eip155:{self.chain_id}:{r}" for r in recipients] if recipients else None
+            ),
+            "channel": f"eip155:{self.chain_id}:{self.channel}",
+            "env": self.env,
+        }
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive a fork, so each process starts its own.
+        # Called with ``self._lock`` held.
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._loop = asyncio.new_event_loop()
+        self._queue = asyncio.Queue()
+        self._queued = 0
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),),
+                                        name="push-dispatcher", daemon=True)
+        self._thread.start()
+
+    def notify(self, title: str, body: str, recipients: list[str] | None = None) -> bool:
+        """Queue a notification; returns whether it was accepted."""
+        if not self.enabled:
+            logging.info("Push Protocol not configured; skipping notification")
+            return False
+        with self._lock:
+            self._ensure_thread()
+            if self._queued >= self.max_queue:
+                PUSH_RESULTS.labels("dropped").inc()
+                logging.error(f"Push queue full, dropping notification '{title}'")
+                return False
+            self._queued += 1
+            PUSH_QUEUED.set(self._queued)
+        item = (title, body, tuple(recipients) if recipients else None)
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return True
+
+    def _taken(self, n: int) -> None:
+        with self._lock:
+            self._queued -= n
+            PUSH_QUEUED.set(self._queued)
+
+    async def _next_batch(self) -> tuple[list, bool]:
+        item = await self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+        in_flight: set[asyncio.Task] = set()
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = await self._next_batch()
+                self._taken(len(batch))
+                for title, body, recipients in coalesce(batch):
+                    chunks = (
+                        [recipients[i:i + self.max_recipients] for i in range(0, len(recipients), self.max_recipients)]
+                        if recipients else [None]
+                    )
+                    for chunk in chunks:
+                        task = asyncio.create_task(self._deliver(client, self.payload(title, body, chunk)))
+                        in_flight.add(task)
+                        task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            await client.aclose()
+
+    async def _deliver(self, client: httpx.AsyncClient, payload: dict) -> None:
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await client.post(self.api_url, json=payload)
+                response.raise_for_status()
+                PUSH_RESULTS.labels("sent").inc()
+                return
+            except httpx.HTTPStatusError as exc:
+                status = exc.response.status_code
+                error = f"status {status}: {exc}"
+                if status in PERMANENT_STATUS and status not in RETRY_STATUS:
+                    break
+            except httpx.HTTPError as exc:
+                error = str(exc) or type(exc).__name__
+            if attempt < self.max_attempts:
+                PUSH_RESULTS.labels("retried").inc()
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        logging.error(f"Push notification failed after {attempt} attempts: {error}")
+        PUSH_RESULTS.labels("dead_letter").inc()
+        await asyncio.to_thread(self._dead_letter, payload, error, attempt)
+
+    def _dead_letter(self, payload: dict, error: str | None, attempts: int) -> None:
+        record = {"payload": payload, "error": error, "attempts": attempts, "failed_at": time.time()}
+        with open(self.dead_letter_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Deliver what is queued, waiting at most ``timeout`` seconds."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        thread.join(timeout)
+
+
+def dispatcher_from_env(chain_id: int) -> PushDispatcher:
+    dispatcher = PushDispatcher(
+        os.getenv("PUSH_API_URL", "https://backend.epns.io/apis/v1/payloads"),
+        os.getenv("PUSH_CHANNEL"),
+        os.getenv("PUSH_ENV", "staging"),
+        chain_id,
+        batch_window=int(os.getenv("PUSH_BATCH_MS", "200")) / 1000,
+        max_attempts=int(os.getenv("PUSH_MAX_ATTEMPTS", "5")),
+        dead_letter_path=os.getenv("PUSH_DEAD_LETTER_PATH"),
+    )
+    atexit.register(dispatcher.close)
+    return dispatcher
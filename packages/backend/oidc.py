@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+from jose import JWTError, jwk, jwt
+from jose.utils import base64url_decode
+from prometheus_client import Counter, Gauge
+
+OIDC_KEY_FETCHES = Counter("oidc_jwks_fetches_total", "JWKS downloads from the identity provider", ["reason", "result"])
+OIDC_TOKEN_CACHE = Counter("oidc_token_cache_total", "Verified-token cache lookups", ["result"])
+OIDC_TOKEN_CACHE_SIZE = Gauge("oidc_token_cache_size", "Verified tokens held in memory")
+
+
+class OIDCKeyCache:
+    """Discovery document and signing keys of an OIDC provider.
+
+    Keys are parsed into ``jwk`` objects once per fetch and looked up by
+    ``kid``. A daemon thread refreshes them every ``ttl`` seconds so request
+    handlers only block on the very first fetch; a failed refresh keeps the
+    previous keys. A token signed with an unknown ``kid`` (the provider
+    rotated keys) triggers one immediate re-fetch, at most once every
+    ``min_refetch_interval`` seconds so forged ``kid`` values cannot turn
+    into a request flood against the provider.
+    """
+
+    def __init__(
+        self,
+        issuer_base: str,
+        ttl: float = 3600.0,
+        min_refetch_interval: float = 30.0,
+        http_get=httpx.get,
+    ):
+        self.issuer_base = issuer_base.rstrip("/")
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self._http_get = http_get
+        self._config: dict | None = None
+        self._keys: dict[str, object] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def _get_json(self, url: str) -> dict:
+        resp = self._http_get(url, timeout=5)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _refresh(self, reason: str) -> None:
+        try:
+            config = self._get_json(f"{self.issuer_base}/.well-known/openid-configuration")
+            jwks = self._get_json(config.get("jwks_uri", f"{self.issuer_base}/.well-known/jwks.json"))
+            keys = {}
+            for key_data in jwks.get("keys", []):
+                kid = key_data.get("kid")
+                if not kid or key_data.get("use", "sig") != "sig":
+                    continue
+                try:
+                    keys[kid] = jwk.construct(key_data, key_data.get("alg", "RS256"))
+                except JWTError as exc:
+                    logging.warning(f"Ignoring unusable JWKS key {kid}: {exc}")
+        except Exception:
+            OIDC_KEY_FETCHES.labels(reason, "error").inc()
+            raise
+        OIDC_KEY_FETCHES.labels(reason, "ok").inc()
+        self._config, self._keys, self._fetched_at = config, keys, time.monotonic()
+
+    def _ensure_loaded(self) -> None:
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._refresh("initial")
+        self.start()
+
+    def start(self) -> None:
+        """Start the background refresher (once per process)."""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="oidc-jwks-refresh", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            if self._config is None:
+                delay = 0.0
+            else:
+                delay = max(0.0, self._fetched_at + self.ttl - time.monotonic())
+            time.sleep(delay)
+            try:
+                with self._lock:
+                    self._refresh("initial" if self._config is None else "ttl")
+            except Exception as exc:
+                logging.warning(f"JWKS refresh failed, keeping cached keys: {exc}")
+                time.sleep(min(self.ttl, self.min_refetch_interval))
+
+    def config(self) -> dict:
+        self._ensure_loaded()
+        return self._config
+
+    def key(self, kid: str):
+        """Return the verification key for ``kid``, re-fetching once if unknown."""
+        self._ensure_loaded()
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is None and time.monotonic() - self._fetched_at >= self.min_refetch_interval:
+                self._refresh("unknown_kid")
+                key = self._keys.get(kid)
+        if key is None:
+            raise JWTError("Signing key not found")
+        return key
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of claims from tokens whose signature already verified.
+
+    Entries are keyed by a hash of the raw token and are dropped once the
+    token's ``exp`` has passed, so a cached token never outlives its
+    validity.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float | None, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str, now: float | None = None) -> dict | None:
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                OIDC_TOKEN_CACHE.labels("miss").inc()
+                return None
+            self._entries.move_to_end(key)
+        OIDC_TOKEN_CACHE.labels("hit").inc()
+        return entry[1]
+
+    def put(self, token: str, claims: dict) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        exp = float(claims["exp"]) if "exp" in claims else None
+        with self._lock:
+            self._entries[key] = (exp, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            OIDC_TOKEN_CACHE_SIZE.set(len(self._entries))
+
+
+def verify_token(token: str, keys: OIDCKeyCache, tokens: VerifiedTokenCache, audience: str) -> dict:
+    """Validate an ID token's signature, expiry and audience.
+
+    Claims of a valid token are cached, so repeat requests with the same
+    token skip the RSA verification.
+    """
+    now = time.time()
+    claims = tokens.get(token, now)
+    if claims is not None:
+        return claims
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not kid:
+        raise JWTError("Token missing 'kid' header")
+    key = keys.key(kid)
+    message, sig = token.rsplit(".", 1)
+    if not key.verify(message.encode(), base64url_decode(sig.encode())):
+        raise JWTError("Signature verification failed")
+    claims = jwt.get_unverified_claims(token)
+    if "exp" in claims and now > float(claims["exp"]):
+        raise JWTError("Token expired")
+    aud = claims.get("aud")
+    if aud and audience not in (aud if isinstance(aud, list) else [aud]):
+        raise JWTError("Invalid audience")
+    tokens.put(token, claims)
+    return claims
@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from prometheus_client import Gauge
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .db import engine as default_engine
+
+AUDIT_TABLE = "proof_audit"
+ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "/var/lib/toting/audit-archive")
+MANIFEST_NAME = "manifest.json"
+MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "12"))
+
+AUDIT_PARTITIONS = Gauge("proof_audit_partitions", "Attached proof_audit partitions")
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(when: datetime) -> datetime:
+    return datetime(when.year, when.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{AUDIT_TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    kind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :t AND relkind IN ('r', 'p')"),
+        {"t": AUDIT_TABLE},
+    ).scalar()
+    return kind == "p"
+
+
+def ensure_partitions(conn: Connection, months_ahead: int = MONTHS_AHEAD, now: datetime | None = None) -> list[str]:
+    """Create the monthly partitions for this month and ``months_ahead`` more.
+
+    Months already covered by an attached partition, such as the legacy
+    table right after the migration, are skipped.
+    """
+    first = month_start(now or datetime.now(timezone.utc))
+    covered = max((upper for _, upper in list_partitions(conn)), default=None)
+    created = []
+    for n in range(months_ahead + 1):
+        lower = add_months(first, n)
+        if covered is not None and lower < covered:
+            continue
+        name = partition_name(lower)
+        exists = conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar()
+        if exists:
+            continue
+        conn.execute(text(
+            f'CREATE TABLE "{name}" PARTITION OF {AUDIT_TABLE} '
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{add_months(lower, 1).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def list_partitions(conn: Connection) -> list[tuple[str, datetime]]:
+    """Return ``(name, upper bound)`` for each attached partition, oldest first."""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :t"
+    ), {"t": AUDIT_TABLE})
+    partitions = []
+    for name, bound in rows:
+        match = _UPPER_BOUND.search(bound or "")
+        if match:
+            partitions.append((name, datetime.fromisoformat(match.group(1)).astimezone(timezone.utc)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def read_manifest(archive_dir: str = ARCHIVE_DIR) -> dict:
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"partitions": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(archive_dir: str, manifest: dict) -> None:
+    path = os.path.join(archive_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_archive(archive_dir: str, name: str, rows: Iterable[dict], upper: datetime) -> dict:
+    """Write ``rows`` to ``<name>.jsonl.gz`` and record it in the manifest."""
+    os.makedirs(archive_dir, exist_ok=True)
+    filename = f"{name}.jsonl.gz"
+    path = os.path.join(archive_dir, filename)
+    count, min_id, max_id = 0, None, None
+    with gzip.open(path + ".tmp", "wt") as f:
+        for row in rows:
+            ts = row["timestamp"]
+            f.write(json.dumps({**row, "timestamp": ts.isoformat() if hasattr(ts, "isoformat") else ts}) + "\n")
+            count += 1
+            min_id = row["id"] if min_id is None else min(min_id, row["id"])
+            max_id = row["id"] if max_id is None else max(max_id, row["id"])
+    os.replace(path + ".tmp", path)
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    entry = {
+        "name": name,
+        "file": filename,
+        "to": upper.isoformat(),
+        "rows": count,
+        "min_id": min_id,
+        "max_id": max_id,
+        "sha256": digest,
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest = read_manifest(archive_dir)
+    manifest["partitions"] = [p for p in manifest["partitions"] if p["name"] != name] + [entry]
+    _write_manifest(archive_dir, manifest)
+    return entry
+
+
+def _partition_rows(conn: Connection, name: str) -> Iterator[dict]:
+    result = conn.execution_options(yield_per=10_000).execute(
+        text(f'SELECT id, circuit_hash, input_hash, proof_root, "timestamp" FROM "{name}" ORDER BY id')
+    )
+    for row in result.mappings():
+        yield dict(row)
+
+
+def archive_partitions(
+    conn: Connection,
+    archive_dir: str = ARCHIVE_DIR,
+    retention_months: int = RETENTION_MONTHS,
+    now: datetime | None = None,
+) -> list[dict]:
+    """Detach, archive and drop partitions that end before the retention window.
+
+    Each partition is written out before it is dropped; if anything fails the
+    surrounding transaction rolls the detach back.
+    """
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    archived = []
+    for name, upper in list_partitions(conn):
+        if upper > cutoff:
+            break
+        conn.execute(text(f'ALTER TABLE {AUDIT_TABLE} DETACH PARTITION "{name}"'))
+        entry = write_archive(archive_dir, name, _partition_rows(conn, name), upper)
+        conn.execute(text(f'DROP TABLE "{name}"'))
+        logging.info(f"Archived {entry['rows']} proof audit rows from {name}")
+        archived.append(entry)
+    return archived
+
+
+def find_archived(proof_root: str, archive_dir: str = ARCHIVE_DIR) -> dict | None:
+    """Look ``proof_root`` up in the archived partitions, newest first."""
+    for entry in reversed(read_manifest(archive_dir)["partitions"]):
+        path = os.path.join(archive_dir, entry["file"])
+        if not os.path.exists(path):
+            logging.warning(f"Archived partition {entry['file']} is missing")
+            continue
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                if proof_root not in line:
+                    continue
+                row = json.loads(line)
+                if row["proof_root"] == proof_root:
+                    return {**row, "archive": entry["file"]}
+    return None
+
+
+def maintain(engine: Engine = default_engine, archive_dir: str = ARCHIVE_DIR) -> dict:
+    """Pre-create upcoming partitions and archive expired ones."""
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return {"created": [], "archived": []}
+        created = ensure_partitions(conn)
+        archived = archive_partitions(conn, archive_dir)
+        AUDIT_PARTITIONS.set(len(list_partitions(conn)))
+    return {"created": created, "archived": [a["name"] for a in archived]}
+
+
+if __name__ == "__main__":
+    print(json.dumps(maintain()))
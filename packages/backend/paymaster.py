@@ -0,0 +1,175 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+from eth_abi import encode as abi_encode
+from eth_account.messages import encode_defunct
+from prometheus_client import Counter
+from web3 import Web3
+
+PAYMASTER_SIGNED = Counter("paymaster_signed_total", "UserOperations signed by the paymaster service")
+PAYMASTER_NONCE_READS = Counter(
+    "paymaster_nonce_reads_total", "senderNonce values read from the chain", ["source"]
+)
+PAYMASTER_VERIFICATIONS = Counter(
+    "paymaster_hash_verifications_total", "Local getHash digests checked against the contract", ["result"]
+)
+
+# UserOperation as declared by the v0.6 EntryPoint.
+USER_OP_TYPE = "(address,uint256,bytes,bytes,uint256,uint256,uint256,uint256,uint256,bytes,bytes)"
+PAYMASTER_AND_DATA_INDEX = 9
+SIGNATURE_LENGTH = 65
+# validUntil / validAfter granted to every sponsored operation.
+VALID_UNTIL = (1 << 48) - 1
+VALID_AFTER = 0
+
+
+def pack_user_op(op: tuple) -> bytes:
+    """Bytes ``VerifyingPaymaster.pack`` copies from calldata.
+
+    That is the ABI encoding of the UserOperation up to, but not including,
+    the length word of ``paymasterAndData``.
+    """
+    encoded = abi_encode([USER_OP_TYPE], [op])[32:]
+    offset = PAYMASTER_AND_DATA_INDEX * 32
+    return encoded[:int.from_bytes(encoded[offset:offset + 32], "big")]
+
+
+def user_op_hash(
+    op: tuple, chain_id: int, paymaster: str, sender_nonce: int,
+    valid_until: int = VALID_UNTIL, valid_after: int = VALID_AFTER,
+) -> bytes:
+    """``VerifyingPaymaster.getHash`` computed without an RPC."""
+    return Web3.keccak(abi_encode(
+        ["bytes", "uint256", "address", "uint256", "uint48", "uint48"],
+        [pack_user_op(op), chain_id, paymaster, sender_nonce, valid_until, valid_after],
+    ))
+
+
+class PaymasterSigner:
+    """Signs UserOperations for the VerifyingPaymaster.
+
+    The digest is computed locally; only the per-sender ``senderNonce`` is
+    read from the contract, cached for ``nonce_ttl`` seconds and fetched in
+    one JSON-RPC batch for a batch of operations. A ``verify_rate`` fraction
+    of digests is compared with the contract's ``getHash``; on a mismatch
+    the contract's value is used and the event is logged.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        address: str,
+        account,
+        chain_id: int,
+        contract: Callable,
+        nonce_ttl: float = 2.0,
+        verify_rate: float = 0.01,
+    ):
+        self.w3 = w3
+        self.address = address
+        self.account = account
+        self.chain_id = chain_id
+        self._contract_factory = contract
+        self._contract = None
+        self.nonce_ttl = nonce_ttl
+        self.verify_rate = verify_rate
+        self._nonces: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def contract(self):
+        if self._contract is None:
+            self._contract = self._contract_factory()
+        return self._contract
+
+    def _timestamps(self, valid_until: int, valid_after: int) -> bytes:
+        return abi_encode(["uint48", "uint48"], [valid_until, valid_after])
+
+    def _with_placeholder(self, op: tuple, valid_until: int, valid_after: int) -> tuple:
+        # The signature offset in the packed head depends on the length of
+        # paymasterAndData, so hash with a placeholder of the final length.
+        placeholder = (
+            bytes.fromhex(self.address[2:]) + self._timestamps(valid_until, valid_after)
+            + b"\x00" * SIGNATURE_LENGTH
+        )
+        return op[:PAYMASTER_AND_DATA_INDEX] + (placeholder,) + op[PAYMASTER_AND_DATA_INDEX + 1:]
+
+    def sender_nonces(self, senders: list[str]) -> dict[str, int]:
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for sender in dict.fromkeys(senders):
+                cached = self._nonces.get(sender)
+                if cached and cached[1] > now:
+                    found[sender] = cached[0]
+                else:
+                    missing.append(sender)
+        PAYMASTER_NONCE_READS.labels("cache").inc(len(found))
+        if not missing:
+            return found
+        if len(missing) == 1:
+            values = [self.contract.functions.senderNonce(missing[0]).call()]
+        else:
+            with self.w3.batch_requests() as batch:
+                for sender in missing:
+                    batch.add(self.contract.functions.senderNonce(sender))
+                values = batch.execute()
+        PAYMASTER_NONCE_READS.labels("rpc").inc(len(missing))
+        expires = time.monotonic() + self.nonce_ttl
+        with self._lock:
+            for sender, value in zip(missing, values):
+                self._nonces[sender] = (int(value), expires)
+                found[sender] = int(value)
+        return found
+
+    def _verify(self, op: tuple, digest: bytes, valid_until: int, valid_after: int) -> bytes:
+        if random.random() >= self.verify_rate:
+            return digest
+        try:
+            expected = bytes(self.contract.functions.getHash(op, valid_until, valid_after).call())
+        except Exception as exc:
+            logging.warning(f"Paymaster getHash verification failed: {exc}")
+            PAYMASTER_VERIFICATIONS.labels("error").inc()
+            return digest
+        if expected != digest:
+            # Probably a stale senderNonce; drop it so the next op re-reads it.
+            logging.error(f"Local paymaster hash {digest.hex()} differs from getHash {expected.hex()}")
+            PAYMASTER_VERIFICATIONS.labels("mismatch").inc()
+            with self._lock:
+                self._nonces.pop(op[0], None)
+            return expected
+        PAYMASTER_VERIFICATIONS.labels("match").inc()
+        return digest
+
+    def sign_many(
+        self, ops: list[tuple], valid_until: int = VALID_UNTIL, valid_after: int = VALID_AFTER
+    ) -> list[str]:
+        """Return ``paymasterAndData`` for each operation, in order.
+
+        Operations from the same sender are validated in nonce order, each
+        bumping ``senderNonce``, so they are signed with consecutive values.
+        """
+        nonces = self.sender_nonces([op[0] for op in ops])
+        sender_offsets: dict[str, int] = {}
+        order = sorted(range(len(ops)), key=lambda i: (ops[i][0], ops[i][1]))
+        timestamps = self._timestamps(valid_until, valid_after)
+        results: list[str] = [""] * len(ops)
+        for i in order:
+            op = self._with_placeholder(ops[i], valid_until, valid_after)
+            sender = op[0]
+            offset = sender_offsets.get(sender, 0)
+            sender_offsets[sender] = offset + 1
+            digest = user_op_hash(op, self.chain_id, self.address, nonces[sender] + offset, valid_until, valid_after)
+            if not offset:
+                # The contract only knows the current nonce.
+                digest = self._verify(op, digest, valid_until, valid_after)
+            signature = self.account.sign_message(encode_defunct(primitive=digest)).signature
+            results[i] = Web3.to_hex(bytes.fromhex(self.address[2:]) + timestamps + bytes(signature))
+        PAYMASTER_SIGNED.inc(len(ops))
+        return results
+
+    def sign(self, op: tuple) -> str:
+        return self.sign_many([op])[0]
@@ -0,0 +1,109 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import SessionLocal, PinOutbox
+from .utils.ipfs import IPFS, IpfsClient
+
+PIN_BATCH_SIZE = int(os.getenv("PIN_BATCH_SIZE", "50"))
+PIN_MAX_ATTEMPTS = int(os.getenv("PIN_MAX_ATTEMPTS", "10"))
+PIN_BACKOFF_BASE = float(os.getenv("PIN_BACKOFF_BASE", "5"))
+PIN_BACKOFF_MAX = float(os.getenv("PIN_BACKOFF_MAX", "3600"))
+
+PIN_BACKLOG = Gauge("ipfs_pin_backlog", "Pins in the outbox that are not pinned yet", ["status"])
+PIN_RESULTS = Counter("ipfs_pins_total", "Outbox pin attempts", ["result"])
+
+
+async def enqueue_pin(db: AsyncSession, meta: str, content: str) -> None:
+    """Add ``content`` to the pin outbox in the caller's transaction.
+
+    ``meta`` is the hex sha256 of the content, i.e. the election's meta
+    hash; identical metadata is only pinned once.
+    """
+    now = datetime.now(timezone.utc)
+    values = dict(
+        meta=meta, content=content, status="pending", attempts=0,
+        next_attempt_at=now, created_at=now, updated_at=now,
+    )
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # A concurrent request with the same metadata must not turn the
+        # unique index into an IntegrityError.
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        await db.execute(insert(PinOutbox).values(**values).on_conflict_do_nothing(index_elements=["meta"]))
+    elif not await db.scalar(select(PinOutbox.id).filter_by(meta=meta)):
+        db.add(PinOutbox(**values))
+
+
+def backoff(attempts: int) -> float:
+    return min(PIN_BACKOFF_MAX, PIN_BACKOFF_BASE * 2 ** (attempts - 1))
+
+
+def process_outbox(
+    session_factory=SessionLocal,
+    client: IpfsClient = IPFS,
+    batch_size: int = PIN_BATCH_SIZE,
+    now: datetime | None = None,
+) -> dict:
+    """Pin one batch of due outbox rows in a single IPFS API request.
+
+    Rows are claimed with ``SKIP LOCKED`` on Postgres so several workers can
+    drain the outbox. A failed batch is retried with exponential backoff;
+    rows that exhaust ``PIN_MAX_ATTEMPTS`` are marked ``failed``.
+    """
+    now = now or datetime.now(timezone.utc)
+    db = session_factory()
+    try:
+        rows = db.scalars(
+            select(PinOutbox)
+            .where(PinOutbox.status == "pending", PinOutbox.next_attempt_at <= now)
+            .order_by(PinOutbox.next_attempt_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        pinned = failed = 0
+        if rows:
+            try:
+                cids = client.pin_many({str(row.id): row.content.encode() for row in rows})
+                error = None
+            except Exception as exc:
+                cids, error = {}, str(exc)
+                logging.warning(f"Pinning {len(rows)} outbox entries failed: {exc}")
+            for row in rows:
+                row.attempts += 1
+                row.updated_at = now
+                cid = cids.get(str(row.id))
+                if cid:
+                    row.status, row.cid, row.error = "pinned", cid, None
+                    pinned += 1
+                    continue
+                row.error = error or "missing from the IPFS API response"
+                if row.attempts >= PIN_MAX_ATTEMPTS:
+                    row.status = "failed"
+                    logging.error(f"Giving up pinning election metadata {row.meta}: {row.error}")
+                else:
+                    row.next_attempt_at = now + timedelta(seconds=backoff(row.attempts))
+                failed += 1
+            PIN_RESULTS.labels("pinned").inc(pinned)
+            PIN_RESULTS.labels("failed").inc(failed)
+        db.commit()
+        counts = dict(db.execute(
+            select(PinOutbox.status, func.count())
+            .where(PinOutbox.status != "pinned")
+            .group_by(PinOutbox.status)
+        ).all())
+        for status in ("pending", "failed"):
+            PIN_BACKLOG.labels(status).set(counts.get(status, 0))
+        return {"pinned": pinned, "failed": failed}
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -1,72 +1,97 @@
 import os
 import json
 import hashlib
-from datetime import datetime
+import logging
+import threading
+import redis
+from datetime import datetime, timezone
 from celery import Celery
 from celery import signals
-from .db import SessionLocal, Circuit, ProofAudit, Base, engine
+from .audit import AUDIT_WRITER
+from .circuits import CIRCUIT_REGISTRY, CIRCUIT_MANIFEST
+from .events import publish_proof_event
+from .partitions import maintain as maintain_partitions
+from .pinning import process_outbox as process_pin_outbox
+from .proof_cache import ProofCache, redis_from_url
+from .prover import ProverPool, StageCallback
+from .scratch import ScratchSpace
 from prometheus_client import Histogram, Counter, Gauge, start_http_server
 import time
 
-# simple in-memory cache (used in tests when Redis unavailable)
-PROOF_CACHE: dict[str, dict] = {}
+BROKER_URL = os.getenv("CELERY_BROKER", "redis://localhost:6379/0")
+BACKEND_URL = os.getenv("CELERY_BACKEND", "redis://localhost:6379/0")
+
+# Finished proofs are shared through the Celery result Redis; when the backend
+# is not Redis (e.g. tests) only the in-process LRU tier is used.
+PROOF_CACHE = ProofCache(
+    BACKEND_URL,
+    max_entries=int(os.getenv("PROOF_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("PROOF_CACHE_TTL", "86400")),
+    redis_max_entries=int(os.getenv("PROOF_CACHE_REDIS_SIZE", "100000")),
+)
 
 TASK_TIME = Histogram('celery_task_duration_seconds', 'Time spent on Celery tasks', ['name'])
 TASK_SUCCESS = Counter('celery_task_success_total', 'Successful Celery tasks', ['name'])
 TASK_FAILURE = Counter('celery_task_failure_total', 'Failed Celery tasks', ['name'])
-QUEUE_LENGTH = Gauge('celery_queue_length', 'Tasks waiting in queue')
+QUEUE_LENGTH = Gauge('celery_queue_length', 'Tasks waiting in queue', ['queue'])
+STAGE_TIME = Histogram(
+    'proof_stage_duration_seconds',
+    'Time from the previous proof stage until this one was reached',
+    ['circuit', 'curve', 'stage'],
+)
+
+# Progress (percent) reported once a proof job reaches each stage, in order.
+PROOF_STAGES = {
+    "queued": 0,
+    "started": 5,
+    "witness": 30,     # witness computed
+    "proving": 35,
+    "exporting": 90,   # proof computed, exporting calldata
+    "persisted": 100,  # cached and audited
+}
 
 if os.getenv('CELERY_METRICS_PORT'):
     start_http_server(int(os.getenv('CELERY_METRICS_PORT')))
 
-# Load default hashes from the compiled circuit manifest
-MANIFEST_PATH = os.getenv("CIRCUIT_MANIFEST", "/app/circuits/manifest.json")
-if not os.path.exists(MANIFEST_PATH):
-    alt = os.path.join(os.getcwd(), "artifacts", "manifest.json")
-    if os.path.exists(alt):
-        MANIFEST_PATH = alt
-DEFAULT_HASHES = {}
-
-if os.path.exists(MANIFEST_PATH):
-    with open(MANIFEST_PATH) as f:
-        manifest_data = json.load(f)
-        for name, curves in manifest_data.items():
-            # Standardize names from manifest (e.g., "voice_check") to API names (e.g., "voice")
-            api_name = name.replace("_check", "")
-            DEFAULT_HASHES.setdefault(api_name, {})
-            for curve, data in curves.items():
-                DEFAULT_HASHES[api_name][curve] = data["hash"]
-else:
-    print(f"Warning: Circuit manifest not found at {MANIFEST_PATH}. Using empty defaults.")
-
 def get_circuit_hash(name: str, curve: str = "bn254") -> str:
-    db = SessionLocal()
-    row = db.query(Circuit).filter_by(name=name, active=1).first()
-    db.close()
-    if row:
-        return row.circuit_hash
-    # Fallback to the loaded manifest defaults
-    if name in DEFAULT_HASHES and curve in DEFAULT_HASHES[name]:
-        return DEFAULT_HASHES[name][curve]
+    # Active DB rows first, then the manifest defaults; both served from memory.
+    circuit_hash = CIRCUIT_REGISTRY.hash_for(name, curve)
+    if circuit_hash:
+        return circuit_hash
     # As a last resort, derive a deterministic hash so tests can run without
     # real manifest entries.
     return hashlib.sha256(f"{name}:{curve}".encode()).hexdigest()
 
-def cache_key(circuit: str, inputs: dict, curve: str) -> str:
-    data = json.dumps(inputs, sort_keys=True).encode()
+def _resolve_hash(circuit: str, curve: str) -> str:
     circuit_hash = get_circuit_hash(circuit, curve)
     if not circuit_hash:
         raise ValueError(f"Could not find hash for circuit '{circuit}' on curve '{curve}'")
+    return circuit_hash
+
+def _digest_key(inputs: dict, circuit_hash: str) -> str:
+    data = json.dumps(inputs, sort_keys=True).encode()
     return hashlib.sha256(data + circuit_hash.encode()).hexdigest()
 
+def cache_key(circuit: str, inputs: dict, curve: str) -> str:
+    return _digest_key(inputs, _resolve_hash(circuit, curve))
+
 def cache_get(circuit: str, inputs: dict, curve: str):
     try:
-        key = cache_key(circuit, inputs, curve)
-        return PROOF_CACHE.get(key)
+        circuit_hash = _resolve_hash(circuit, curve)
     except ValueError:
         return None
-BROKER_URL = os.getenv("CELERY_BROKER", "redis://localhost:6379/0")
-BACKEND_URL = os.getenv("CELERY_BACKEND", "redis://localhost:6379/0")
+    return PROOF_CACHE.get(_digest_key(inputs, circuit_hash), circuit_hash)
+
+def invalidate_circuit(circuit_hash: str) -> None:
+    """Drop cached proofs for a circuit hash that is no longer active."""
+    PROOF_CACHE.invalidate(circuit_hash)
+
+def _on_circuit_hash_change(name: str, old: str | None, new: str | None) -> None:
+    if old:
+        invalidate_circuit(old)
+
+CIRCUIT_REGISTRY.add_listener(_on_circuit_hash_change)
+
 celery_app = Celery('proof', broker=BROKER_URL, backend=BACKEND_URL, task_serializer='json', result_serializer='json', accept_content=['json'])
 if os.getenv("CELERY_TASK_ALWAYS_EAGER"):
     celery_app.conf.task_always_eager = True
@@ -87,15 +112,96 @@ def _dummy_proof(circuit: str, inputs: dict) -> dict:
     pub = [int(h[i:i+8], 16) for i in range(0, 56, 8)]
     return {"proof": proof, "pubSignals": pub}
 
+@signals.worker_init.connect
+def _validate_manifest(**kwargs):
+    CIRCUIT_MANIFEST.validate(strict=os.getenv("CIRCUIT_MANIFEST_STRICT", "").lower() in ("1", "true"))
+
+@signals.before_task_publish.connect
+def _stamp_queued_at(headers=None, **kwargs):
+    # Lets the worker report how long a job waited in the broker.
+    if headers is not None:
+        headers.setdefault("queued_at", time.time())
+
 @signals.task_prerun.connect
 def _start_timer(task_id, task, **kwargs):
     task.__start_time__ = time.time()
+    publish_proof_event(task_id, "running")
 
 @signals.task_postrun.connect
-def _record_time(task_id, task, **kwargs):
+def _record_time(task_id, task, state=None, **kwargs):
     duration = time.time() - getattr(task, '__start_time__', time.time())
     TASK_TIME.labels(task.name).observe(duration)
-    QUEUE_LENGTH.set(len(celery_app.control.inspect().reserved() or []))
+    # The result is already stored, so listeners can fetch it on "done".
+    if state == "SUCCESS":
+        publish_proof_event(task_id, "done", 100)
+    else:
+        publish_proof_event(task_id, "error")
+
+class QueueDepthSampler:
+    """Publishes broker queue lengths on a fixed interval.
+
+    Reads the Redis lists backing each Celery queue directly (``LLEN``), so
+    sampling costs one round-trip per interval and needs no worker replies.
+    """
+
+    def __init__(self, app: Celery, broker_url: str, interval: float = 5.0):
+        self.app = app
+        self.interval = interval
+        self._redis = redis_from_url(broker_url)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _queue_keys(self, queue: str) -> list[str]:
+        # The Redis transport keeps one list per priority step besides the
+        # default one, named "<queue>\x06\x16<priority>".
+        steps = self.app.conf.broker_transport_options.get("priority_steps", [0, 3, 6, 9])
+        return [queue] + [f"{queue}\x06\x16{p}" for p in steps if p]
+
+    def sample(self) -> dict[str, int]:
+        queues = list(self.app.amqp.queues.keys()) or [self.app.conf.task_default_queue]
+        pipe = self._redis.pipeline(transaction=False)
+        for queue in queues:
+            for key in self._queue_keys(queue):
+                pipe.llen(key)
+        lengths = iter(pipe.execute())
+        depths = {}
+        for queue in queues:
+            depths[queue] = sum(next(lengths) for _ in self._queue_keys(queue))
+            QUEUE_LENGTH.labels(queue).set(depths[queue])
+        return depths
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except redis.RedisError as exc:
+                logging.warning(f"Queue depth sampling failed: {exc}")
+
+    def start(self) -> None:
+        if self._redis is None:
+            logging.info("Broker is not Redis; queue depth sampling disabled")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="queue-depth", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+QUEUE_SAMPLER = QueueDepthSampler(
+    celery_app, BROKER_URL, interval=float(os.getenv("CELERY_QUEUE_SAMPLE_INTERVAL", "5"))
+)
+
+@signals.worker_ready.connect
+def _start_queue_sampler(**kwargs):
+    QUEUE_SAMPLER.start()
+
+@signals.worker_shutdown.connect
+def _stop_queue_sampler(**kwargs):
+    QUEUE_SAMPLER.stop()
 
 @signals.task_success.connect
 def _task_success(sender=None, result=None, **kwargs):
@@ -107,63 +213,235 @@ def _task_failure(sender=None, exception=None, **kwargs):
 
 # --- FIX: Removed the first, incomplete @celery_app.task definition ---
 
-def _run_snarkjs_proof(wasm_path: str, zkey_path: str, inputs: dict):
-    """Run snarkjs to generate a Groth16 proof and return (a,b,c,pub)."""
-    import tempfile
-    import subprocess
-    import shutil
+# "pool" keeps warm Node provers with artifacts resident in memory;
+# "subprocess" shells out to the snarkjs CLI for every step.
+PROVER_BACKEND = os.getenv("PROVER_BACKEND", "pool").lower()
+PROVER_POOL = ProverPool(
+    size=int(os.getenv("PROVER_POOL_SIZE", "1")),
+    timeout=float(os.getenv("PROVER_TIMEOUT", "300")),
+)
+# Input/witness/proof files for the snarkjs CLI live here, on tmpfs when available.
+SCRATCH = ScratchSpace(
+    root=os.getenv("PROVER_SCRATCH_DIR") or None,
+    max_bytes=int(os.getenv("PROVER_SCRATCH_MAX_BYTES", str(1 << 30))),
+)
+# Concurrent snarkjs CLI invocations per batch task (subprocess backend only).
+PROOF_BATCH_PARALLELISM = int(os.getenv("PROOF_BATCH_PARALLELISM", str(os.cpu_count() or 1)))
 
-    tmp = tempfile.mkdtemp(prefix="snarkjs_")
-    input_file = os.path.join(tmp, "input.json")
-    wtns_file = os.path.join(tmp, "witness.wtns")
-    proof_file = os.path.join(tmp, "proof.json")
-    public_file = os.path.join(tmp, "public.json")
+@signals.worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    PROVER_POOL.close()
+    AUDIT_WRITER.close()
 
-    with open(input_file, "w") as f:
-        json.dump(inputs, f)
+def _snarkjs_exe() -> str:
+    import shutil
 
     exe = "node_modules/.bin/snarkjs"
     if not shutil.which(exe):
         exe = "snarkjs"
+    return exe
 
-    subprocess.run([exe, "wtns", "calculate", wasm_path, input_file, wtns_file], check=True, capture_output=True)
+
+def _snarkjs_witness(wasm_path: str, inputs: dict, workdir: str) -> str:
+    """Compute the witness for ``inputs`` into ``workdir`` and return its path."""
+    import subprocess
+
+    input_file = os.path.join(workdir, "input.json")
+    wtns_file = os.path.join(workdir, "witness.wtns")
+    with open(input_file, "w") as f:
+        json.dump(inputs, f)
+    subprocess.run([_snarkjs_exe(), "wtns", "calculate", wasm_path, input_file, wtns_file], check=True, capture_output=True)
+    return wtns_file
+
+
+def _snarkjs_prove(zkey_path: str, wtns_file: str, workdir: str, on_stage: StageCallback | None = None):
+    """Prove a computed witness and return (a,b,c,pub)."""
+    import subprocess
+
+    exe = _snarkjs_exe()
+    proof_file = os.path.join(workdir, "proof.json")
+    public_file = os.path.join(workdir, "public.json")
+    if on_stage:
+        on_stage("proving")
     subprocess.run([exe, "groth16", "prove", zkey_path, wtns_file, proof_file, public_file], check=True, capture_output=True)
+    if on_stage:
+        on_stage("exporting")
     out = subprocess.check_output([exe, "groth16", "exportsoliditycalldata", public_file, proof_file])
     params = json.loads(f"[{out.decode().strip()}]")
     return params[0], params[1], params[2], params[3]
 
 
-@celery_app.task
-def generate_proof(circuit: str, inputs: dict, curve: str = "bn254"):
-    """Generate a real zk-SNARK proof using snarkjs when artifacts are available."""
+def _run_snarkjs_proof(wasm_path: str, zkey_path: str, inputs: dict, on_stage: StageCallback | None = None):
+    """Run snarkjs to generate a Groth16 proof and return (a,b,c,pub)."""
+    with SCRATCH.job_dir("snarkjs") as tmp:
+        wtns_file = _snarkjs_witness(wasm_path, inputs, tmp)
+        if on_stage:
+            on_stage("witness")
+        return _snarkjs_prove(zkey_path, wtns_file, tmp, on_stage)
+
+
+def _run_prover(wasm_path: str, zkey_path: str, inputs: dict, on_stage: StageCallback | None = None):
+    """Dispatch a proof to the configured prover backend and return (a,b,c,pub)."""
+    if PROVER_BACKEND == "subprocess":
+        return _run_snarkjs_proof(wasm_path, zkey_path, inputs, on_stage)
+    return PROVER_POOL.prove(wasm_path, zkey_path, inputs, on_stage)
+
+
+def _attempt(fn, *args):
+    """Run one item of a batch, returning the exception instead of raising."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        return e
+
+
+def _run_prover_batch(wasm_path: str, zkey_path: str, inputs_list: list[dict]) -> list:
+    """Prove many inputs for one circuit in parallel.
+
+    With the subprocess backend inputs are handled in chunks of
+    ``PROOF_BATCH_PARALLELISM``, fewer if their scratch directories would
+    not fit ``PROVER_SCRATCH_MAX_BYTES``: every witness in a chunk is
+    computed in parallel before any of its proofs start, mirroring
+    tools/witness-builder, and the chunk's scratch directories are released
+    before the next one.
+    Pool provers do both steps per job, so parallelism is bounded by the pool
+    size. Failed items are returned as exceptions in their slot.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from contextlib import ExitStack
+    from itertools import repeat
+
+    if PROVER_BACKEND != "subprocess":
+        workers = max(1, min(len(inputs_list), PROVER_POOL.size))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(_attempt, repeat(PROVER_POOL.prove), repeat(wasm_path), repeat(zkey_path), inputs_list))
+
+    def prove(witness, workdir):
+        if isinstance(witness, Exception):
+            return witness
+        return _attempt(_snarkjs_prove, zkey_path, witness, workdir)
+
+    workers = max(1, min(len(inputs_list), PROOF_BATCH_PARALLELISM))
+    outcomes: list = []
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        while len(outcomes) < len(inputs_list):
+            # A chunk holds all its directories at once, so it must fit the
+            # scratch cap or it would wait on itself.
+            start = len(outcomes)
+            chunk = inputs_list[start:start + min(workers, SCRATCH.slots())]
+            with ExitStack() as scratch:
+                dirs = [scratch.enter_context(SCRATCH.job_dir("snarkjs")) for _ in chunk]
+                witnesses = list(ex.map(_attempt, repeat(_snarkjs_witness), repeat(wasm_path), chunk, dirs))
+                outcomes.extend(ex.map(prove, witnesses, dirs))
+    return outcomes
+
+
+def _format_proof(circuit: str, params) -> tuple:
+    """Turn snarkjs calldata (a,b,c,pub) into the API proof representation."""
+    a, b, cvals, pub = params
+    if circuit == "eligibility":
+        return {"a": a, "b": b, "c": cvals}, pub
+    ints = [int(x, 0) for x in (a + b[0] + b[1] + cvals + pub)]
+    return "0x" + "".join(i.to_bytes(32, "big").hex() for i in ints), pub
+
+
+def _audit_row(circuit_hash: str, inputs: dict, proof) -> dict:
     data = json.dumps(inputs, sort_keys=True).encode()
+    input_hash = hashlib.sha256(data).hexdigest()
+    proof_to_hash = json.dumps(proof, sort_keys=True) if isinstance(proof, dict) else str(proof)
+    proof_root = hashlib.sha256(proof_to_hash.encode()).hexdigest()
+    return {
+        "circuit_hash": circuit_hash,
+        "input_hash": input_hash,
+        "proof_root": proof_root,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+def _record_audits(rows: list[dict]) -> None:
+    # Buffered and written in bulk; the prover does not wait on Postgres.
+    AUDIT_WRITER.submit(rows)
+
+
+@celery_app.task
+def maintain_audit_partitions():
+    """Pre-create upcoming proof_audit partitions and archive expired ones."""
+    return maintain_partitions()
 
-    manifest = {}
-    if os.path.exists(MANIFEST_PATH):
-        with open(MANIFEST_PATH) as f:
-            manifest = json.load(f)
-    manifest_name = circuit
-    if manifest_name not in manifest:
-        manifest_name = f"{circuit}_check"
+
+@celery_app.task
+def pin_outbox():
+    """Pin due election metadata from the outbox in one batch."""
+    return process_pin_outbox()
+
+
+# Run by `celery beat`; partition maintenance is a no-op until the
+# partitioning migration has run.
+celery_app.conf.beat_schedule = {
+    "maintain-audit-partitions": {
+        "task": maintain_audit_partitions.name,
+        "schedule": float(os.getenv("AUDIT_MAINTENANCE_INTERVAL", "86400")),
+    },
+    # Retries pins that failed or were enqueued while no worker was kicked.
+    "pin-outbox": {
+        "task": pin_outbox.name,
+        "schedule": float(os.getenv("PIN_OUTBOX_INTERVAL", "10")),
+    },
+}
+
+
+class ProofProgress:
+    """Reports the stages of one proof job as it advances.
+
+    Every stage in ``PROOF_STAGES`` that the job reaches is stamped with the
+    Unix time it was reached. Stamps are stored as ``PROGRESS`` task meta for
+    pollers and published as proof events for WebSockets; ``STAGE_TIME``
+    observes the time since the previous stage. Calling the instance with a
+    stage name makes it usable as a prover ``on_stage`` callback.
+    """
+
+    def __init__(self, task, circuit: str, curve: str):
+        self.task = task
+        self.circuit = circuit
+        self.curve = curve
+        self.stages: dict[str, float] = {}
+        headers = task.request.headers or {}
+        queued_at = headers.get("queued_at") or getattr(task.request, "queued_at", None)
+        if queued_at:
+            self.stages["queued"] = float(queued_at)
+        self("started")
+
+    def __call__(self, stage: str) -> None:
+        now = time.time()
+        if self.stages:
+            last = max(self.stages.values())
+            STAGE_TIME.labels(self.circuit, self.curve, stage).observe(max(0.0, now - last))
+        self.stages[stage] = now
+        task_id = self.task.request.id
+        if not task_id:
+            return  # called directly rather than as a task
+        progress = PROOF_STAGES[stage]
+        if stage != "persisted":
+            # The final stamps travel with the task result instead.
+            self.task.update_state(
+                state="PROGRESS",
+                meta={"stage": stage, "progress": progress, "stages": dict(self.stages)},
+            )
+        publish_proof_event(task_id, "running", progress, stage=stage, stages=dict(self.stages))
+
+
+@celery_app.task(bind=True)
+def generate_proof(self, circuit: str, inputs: dict, curve: str = "bn254"):
+    """Generate a real zk-SNARK proof using snarkjs when artifacts are available."""
+    progress = ProofProgress(self, circuit, curve)
+    CIRCUIT_MANIFEST.refresh()
+    artifacts = CIRCUIT_MANIFEST.artifacts(circuit, curve)
 
     proof = None
     pub = []
     try:
-        if manifest_name:
-            with open(MANIFEST_PATH) as f:
-                manifest = json.load(f)
-            if manifest_name in manifest and curve in manifest[manifest_name]:
-                paths = manifest[manifest_name][curve]
-                base = os.path.abspath(os.path.join(os.path.dirname(MANIFEST_PATH), ".."))
-                wasm = os.path.join(base, paths["wasm"])
-                zkey = os.path.join(base, paths["zkey"])
-                if os.path.exists(wasm) and os.path.exists(zkey):
-                    a, b, cvals, pub = _run_snarkjs_proof(wasm, zkey, inputs)
-                    if circuit == "eligibility":
-                        proof = {"a": a, "b": b, "c": cvals}
-                    else:
-                        ints = [int(x, 0) for x in (a + b[0] + b[1] + cvals + pub)]
-                        proof = "0x" + "".join(i.to_bytes(32, "big").hex() for i in ints)
+        if artifacts and artifacts.available:
+            proof, pub = _format_proof(circuit, _run_prover(artifacts.wasm, artifacts.zkey, inputs, progress))
     except Exception as e:
         print(f"snarkjs failed: {e}. Falling back to dummy proof.")
 
@@ -172,25 +450,68 @@ def generate_proof(circuit: str, inputs: dict, curve: str = "bn254"):
         proof, pub = res["proof"], res["pubSignals"]
     result = {"proof": proof, "pubSignals": pub}
 
-    key = cache_key(circuit, inputs, curve)
-    PROOF_CACHE[key] = result
+    circuit_hash = _resolve_hash(circuit, curve)
+    PROOF_CACHE.set(_digest_key(inputs, circuit_hash), result, circuit_hash)
+    _record_audits([_audit_row(circuit_hash, inputs, proof)])
+    progress("persisted")
 
-    circuit_hash = get_circuit_hash(circuit, curve)
-    input_hash = hashlib.sha256(data).hexdigest()
-    proof_to_hash = json.dumps(proof, sort_keys=True) if isinstance(proof, dict) else str(proof)
-    proof_root = hashlib.sha256(proof_to_hash.encode()).hexdigest()
+    return {**result, "stages": progress.stages}
+
+
+@celery_app.task
+def generate_proof_batch(circuit: str, inputs_list: list[dict], curve: str = "bn254"):
+    """Generate proofs for many inputs of one circuit in a single task.
+
+    Inputs are deduplicated within the batch and against the proof cache;
+    only the remaining unique inputs are proved. Results keep the order of
+    ``inputs_list``.
+    """
+    circuit_hash = _resolve_hash(circuit, curve)
+    keys = [_digest_key(inputs, circuit_hash) for inputs in inputs_list]
+
+    done: dict[str, dict] = {}
+    pending: dict[str, dict] = {}
+    for key, inputs in zip(keys, inputs_list):
+        if key in done or key in pending:
+            continue
+        cached = PROOF_CACHE.get(key, circuit_hash)
+        if cached:
+            done[key] = cached
+        else:
+            pending[key] = inputs
+    cached_keys = set(done)
+
+    CIRCUIT_MANIFEST.refresh()
+    artifacts = CIRCUIT_MANIFEST.artifacts(circuit, curve)
+    pending_inputs = list(pending.values())
+    if artifacts and artifacts.available and pending_inputs:
+        outcomes = _run_prover_batch(artifacts.wasm, artifacts.zkey, pending_inputs)
+    else:
+        outcomes = [None] * len(pending_inputs)
+
+    audits = []
+    for key, inputs, outcome in zip(pending, pending_inputs, outcomes):
+        proof = None
+        if isinstance(outcome, Exception):
+            print(f"snarkjs failed: {outcome}. Falling back to dummy proof.")
+        elif outcome is not None:
+            try:
+                proof, pub = _format_proof(circuit, outcome)
+            except Exception as e:
+                print(f"snarkjs failed: {e}. Falling back to dummy proof.")
+        if proof is None:
+            res = _dummy_proof(circuit, inputs)
+            proof, pub = res["proof"], res["pubSignals"]
+        done[key] = {"proof": proof, "pubSignals": pub}
+        PROOF_CACHE.set(key, done[key], circuit_hash)
+        audits.append(_audit_row(circuit_hash, inputs, proof))
+
+    if audits:
+        _record_audits(audits)
 
-    db = SessionLocal()
-    db.add(
-        ProofAudit(
-            circuit_hash=circuit_hash,
-            input_hash=input_hash,
-            proof_root=proof_root,
-            timestamp=datetime.utcnow().isoformat(),
-        )
-    )
-    db.commit()
-    db.close()
-
-    return result
-    
\ No newline at end of file
+    return {
+        "results": [
+            {"index": i, "cached": key in cached_keys, **done[key]}
+            for i, key in enumerate(keys)
+        ]
+    }
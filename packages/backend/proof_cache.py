@@ -0,0 +1,171 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from prometheus_client import Counter
+
+CACHE_HITS = Counter("proof_cache_hits_total", "Proof cache hits", ["tier"])
+CACHE_MISSES = Counter("proof_cache_misses_total", "Proof cache misses")
+CACHE_EVICTIONS = Counter(
+    "proof_cache_evictions_total", "Proof cache evictions", ["tier", "reason"]
+)
+
+# How long to stop talking to Redis after a connection error so a dead
+# Redis does not add a socket timeout to every proof request.
+REDIS_RETRY_AFTER = 30.0
+
+
+def redis_from_url(url: str | None) -> "redis.Redis | None":
+    """Return a Redis client for ``url`` or ``None`` for non-Redis backends."""
+    if not url or not url.startswith(("redis://", "rediss://", "unix://")):
+        return None
+    return redis.Redis.from_url(
+        url, socket_timeout=0.5, socket_connect_timeout=0.5
+    )
+
+
+class ProofCache:
+    """Two-tier cache for finished proofs.
+
+    A bounded in-process LRU sits in front of a Redis tier shared by every API
+    replica and Celery worker. Entries are tagged with the circuit hash they
+    were produced for so a circuit upgrade can drop them in one call.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        max_entries: int = 1024,
+        ttl: int = 86400,
+        redis_max_entries: int = 100_000,
+        prefix: str = "proof-cache",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_max_entries = redis_max_entries
+        self.prefix = prefix
+        self._local: OrderedDict[str, tuple[float, str, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis_from_url(redis_url)
+        self._redis_down_until = 0.0
+
+    # -- helpers -------------------------------------------------------------
+
+    def _redis_key(self, key: str, circuit_hash: str) -> str:
+        return f"{self.prefix}:{circuit_hash}:{key}"
+
+    @property
+    def _lru_key(self) -> str:
+        return f"{self.prefix}:lru"
+
+    def _redis_client(self) -> "redis.Redis | None":
+        if self._redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logging.warning(f"Proof cache Redis tier unavailable: {exc}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    def _local_put(self, key: str, circuit_hash: str, value: dict) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, circuit_hash, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                CACHE_EVICTIONS.labels("local", "size").inc()
+
+    def _local_get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires, _, value = entry
+            if expires < time.monotonic():
+                del self._local[key]
+                CACHE_EVICTIONS.labels("local", "ttl").inc()
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    # -- public API ----------------------------------------------------------
+
+    def get(self, key: str, circuit_hash: str) -> dict | None:
+        value = self._local_get(key)
+        if value is not None:
+            CACHE_HITS.labels("local").inc()
+            return value
+
+        client = self._redis_client()
+        if client is not None:
+            rkey = self._redis_key(key, circuit_hash)
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.get(rkey)
+                pipe.zadd(self._lru_key, {rkey: time.time()}, xx=True)
+                raw, _ = pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed(exc)
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._local_put(key, circuit_hash, value)
+                CACHE_HITS.labels("redis").inc()
+                return value
+
+        CACHE_MISSES.inc()
+        return None
+
+    def set(self, key: str, value: dict, circuit_hash: str) -> None:
+        self._local_put(key, circuit_hash, value)
+
+        client = self._redis_client()
+        if client is None:
+            return
+        rkey = self._redis_key(key, circuit_hash)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.set(rkey, json.dumps(value), ex=self.ttl)
+            pipe.zadd(self._lru_key, {rkey: time.time()})
+            pipe.zcard(self._lru_key)
+            _, _, size = pipe.execute()
+            overflow = size - self.redis_max_entries
+            if overflow > 0:
+                evicted = [k for k, _ in client.zpopmin(self._lru_key, overflow)]
+                if evicted:
+                    client.delete(*evicted)
+                    CACHE_EVICTIONS.labels("redis", "size").inc(len(evicted))
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def invalidate(self, circuit_hash: str) -> None:
+        """Drop every cached proof produced for ``circuit_hash``."""
+        with self._lock:
+            stale = [k for k, (_, h, _) in self._local.items() if h == circuit_hash]
+            for k in stale:
+                del self._local[k]
+        if stale:
+            CACHE_EVICTIONS.labels("local", "invalidated").inc(len(stale))
+
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            keys = list(client.scan_iter(match=self._redis_key("*", circuit_hash)))
+            if keys:
+                client.delete(*keys)
+                client.zrem(self._lru_key, *keys)
+                CACHE_EVICTIONS.labels("redis", "invalidated").inc(len(keys))
+        except redis.RedisError as exc:
+            self._redis_failed(exc)
+
+    def clear(self) -> None:
+        """Drop the in-process tier. The shared Redis tier is left untouched."""
+        with self._lock:
+            self._local.clear()
+
+    def __len__(self) -> int:
+        return len(self._local)
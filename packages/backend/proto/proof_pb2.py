@@ -24,21 +24,25 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bproof.proto\x12\x05proof\"6\n\x0fGenerateRequest\x12\x0f\n\x07\x63ircuit\x18\x01 \x01(\t\x12\x12\n\ninput_json\x18\x02 \x01(\t\"\"\n\x10GenerateResponse\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\x1f\n\rStatusRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"B\n\x0eStatusResponse\x12\r\n\x05state\x18\x01 \x01(\t\x12\r\n\x05proof\x18\x02 \x01(\t\x12\x12\n\npubSignals\x18\x03 \x03(\x03\x32\x82\x01\n\x0cProofService\x12;\n\x08Generate\x12\x16.proof.GenerateRequest\x1a\x17.proof.GenerateResponse\x12\x35\n\x06Status\x12\x14.proof.StatusRequest\x1a\x15.proof.StatusResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0bproof.proto\x12\x05proof\"6\n\x0fGenerateRequest\x12\x0f\n\x07\x63ircuit\x18\x01 \x01(\t\x12\x12\n\ninput_json\x18\x02 \x01(\t\"\"\n\x10GenerateResponse\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\x1f\n\rStatusRequest\x12\x0e\n\x06job_id\x18\x01 \x01(\t\"\xc5\x01\n\x0eStatusResponse\x12\r\n\x05state\x18\x01 \x01(\t\x12\r\n\x05proof\x18\x02 \x01(\t\x12\x12\n\npubSignals\x18\x03 \x03(\x03\x12\r\n\x05stage\x18\x04 \x01(\t\x12\x10\n\x08progress\x18\x05 \x01(\x05\x12\x31\n\x06stages\x18\x06 \x03(\x0b\x32!.proof.StatusResponse.StagesEntry\x1a-\n\x0bStagesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\x32\x82\x01\n\x0cProofService\x12;\n\x08Generate\x12\x16.proof.GenerateRequest\x1a\x17.proof.GenerateResponse\x12\x35\n\x06Status\x12\x14.proof.StatusRequest\x1a\x15.proof.StatusResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'proof_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_STATUSRESPONSE_STAGESENTRY']._loaded_options = None
+  _globals['_STATUSRESPONSE_STAGESENTRY']._serialized_options = b'8\001'
   _globals['_GENERATEREQUEST']._serialized_start=22
   _globals['_GENERATEREQUEST']._serialized_end=76
   _globals['_GENERATERESPONSE']._serialized_start=78
   _globals['_GENERATERESPONSE']._serialized_end=112
   _globals['_STATUSREQUEST']._serialized_start=114
   _globals['_STATUSREQUEST']._serialized_end=145
-  _globals['_STATUSRESPONSE']._serialized_start=147
-  _globals['_STATUSRESPONSE']._serialized_end=213
-  _globals['_PROOFSERVICE']._serialized_start=216
-  _globals['_PROOFSERVICE']._serialized_end=346
+  _globals['_STATUSRESPONSE']._serialized_start=148
+  _globals['_STATUSRESPONSE']._serialized_end=345
+  _globals['_STATUSRESPONSE_STAGESENTRY']._serialized_start=300
+  _globals['_STATUSRESPONSE_STAGESENTRY']._serialized_end=345
+  _globals['_PROOFSERVICE']._serialized_start=348
+  _globals['_PROOFSERVICE']._serialized_end=478
 # @@protoc_insertion_point(module_scope)
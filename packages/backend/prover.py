@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from typing import Callable
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "prover_worker.js")
+
+# Called with the stage name ("witness", "proving", "exporting") as a job advances.
+StageCallback = Callable[[str], None]
+
+
+class ProverError(RuntimeError):
+    """Raised when a prover process fails or times out on a job."""
+
+
+class _ProverProcess:
+    """One warm prover speaking the line-delimited JSON protocol of prover_worker.js."""
+
+    def __init__(self, command: list[str]):
+        self.proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(
+        self,
+        job: dict,
+        timeout: float,
+        on_stage: StageCallback | None = None,
+    ) -> list:
+        # Kill the process if it overruns; the blocked readline then hits EOF.
+        timer = threading.Timer(timeout, self.proc.kill)
+        timer.start()
+        try:
+            msg = self._exchange(job, on_stage)
+        except (OSError, ValueError, EOFError) as exc:
+            # The process is in an unknown state; make sure it gets replaced.
+            self.proc.kill()
+            self.proc.wait()
+            raise ProverError(f"prover failed on job {job['id']}: {exc}") from exc
+        finally:
+            timer.cancel()
+        if not msg.get("ok"):
+            raise ProverError(msg.get("error", "prover failed"))
+        return msg["calldata"]
+
+    def _exchange(self, job: dict, on_stage: StageCallback | None) -> dict:
+        self.proc.stdin.write(json.dumps(job) + "\n")
+        self.proc.stdin.flush()
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise EOFError("prover exited")
+            msg = json.loads(line)
+            if msg.get("id") != job["id"]:
+                continue
+            if "stage" not in msg:
+                return msg
+            if on_stage:
+                on_stage(msg["stage"])
+
+    def close(self) -> None:
+        if not self.alive:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+class ProverPool:
+    """Pool of long-lived prover processes that keep circuit artifacts resident.
+
+    Processes are started lazily on first use so that each forked Celery child
+    owns its own pool. A process that crashes or times out is replaced.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        timeout: float = 300.0,
+        command: list[str] | None = None,
+    ):
+        self.size = size
+        self.timeout = timeout
+        self.command = command or [os.getenv("PROVER_NODE", "node"), WORKER_SCRIPT]
+        self._idle: queue.Queue[_ProverProcess] = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+
+    def _acquire(self) -> _ProverProcess:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Inherited across a fork: the parent's pipes are not ours.
+                    self._idle = queue.Queue()
+                    self._started = 0
+                    self._pid = os.getpid()
+                spawn = self._idle.empty() and self._started < self.size
+                if spawn:
+                    self._started += 1
+            if spawn:
+                try:
+                    return _ProverProcess(self.command)
+                except BaseException:
+                    # A failed spawn (missing binary, EMFILE) must not use up a slot.
+                    with self._lock:
+                        self._started -= 1
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ProverError("no prover process became available")
+            try:
+                # Wake up now and then: a dead process frees a slot without
+                # putting anything on the idle queue.
+                return self._idle.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                continue
+
+    def _release(self, proc: _ProverProcess) -> None:
+        if proc.alive:
+            self._idle.put(proc)
+            return
+        logging.warning("Prover process died; starting a replacement")
+        with self._lock:
+            self._started -= 1
+
+    def prove(
+        self,
+        wasm_path: str,
+        zkey_path: str,
+        inputs: dict,
+        on_stage: StageCallback | None = None,
+    ):
+        """Generate a Groth16 proof and return (a, b, c, pub)."""
+        proc = self._acquire()
+        try:
+            job = {"id": uuid.uuid4().hex, "wasm": wasm_path, "zkey": zkey_path, "inputs": inputs}
+            params = proc.run(job, self.timeout, on_stage)
+            return params[0], params[1], params[2], params[3]
+        finally:
+            self._release(proc)
+
+    def close(self) -> None:
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            proc.close()
+        with self._lock:
+            self._started = 0
@@ -0,0 +1,74 @@
+// Long-lived Groth16 prover driven by packages/backend/prover.py.
+//
+// Reads one JSON job per line on stdin:
+//   {"id": "...", "wasm": "/abs/path.wasm", "zkey": "/abs/path.zkey", "inputs": {...}}
+// and answers with JSON lines on stdout. Stage notifications
+//   {"id": "...", "stage": "witness" | "proving" | "exporting"}
+// precede exactly one final line
+//   {"id": "...", "ok": true, "calldata": [a, b, c, pub]}  or
+//   {"id": "...", "ok": false, "error": "..."}
+//
+// wasm and zkey files stay resident in memory after first use so each job
+// only pays for witness calculation and proving.
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const { execSync } = require("child_process");
+
+function loadSnarkjs() {
+  try {
+    return require("snarkjs");
+  } catch (err) {
+    // The worker image installs snarkjs globally (npm install -g snarkjs).
+    const globalRoot = execSync("npm root -g").toString().trim();
+    return require(path.join(globalRoot, "snarkjs"));
+  }
+}
+
+const snarkjs = loadSnarkjs();
+const artifacts = new Map();
+
+function resident(file) {
+  let data = artifacts.get(file);
+  if (!data) {
+    data = new Uint8Array(fs.readFileSync(file));
+    artifacts.set(file, data);
+  }
+  return { type: "mem", data };
+}
+
+function send(msg) {
+  process.stdout.write(JSON.stringify(msg) + "\n");
+}
+
+async function handle(job) {
+  const wtns = { type: "mem" };
+  await snarkjs.wtns.calculate(job.inputs, resident(job.wasm), wtns);
+  send({ id: job.id, stage: "witness" });
+  send({ id: job.id, stage: "proving" });
+  const { proof, publicSignals } = await snarkjs.groth16.prove(resident(job.zkey), wtns);
+  send({ id: job.id, stage: "exporting" });
+  const calldata = await snarkjs.groth16.exportSolidityCallData(proof, publicSignals);
+  return JSON.parse(`[${calldata}]`);
+}
+
+// Jobs are processed strictly one at a time; the Python pool provides
+// concurrency by running several of these processes.
+let queue = Promise.resolve();
+const rl = readline.createInterface({ input: process.stdin });
+rl.on("line", (line) => {
+  if (!line.trim()) return;
+  queue = queue.then(async () => {
+    let job;
+    try {
+      job = JSON.parse(line);
+      const calldata = await handle(job);
+      send({ id: job.id, ok: true, calldata });
+    } catch (err) {
+      send({ id: job ? job.id : null, ok: false, error: String(err && err.stack ? err.stack : err) });
+    }
+  });
+});
+rl.on("close", () => {
+  queue.then(() => process.exit(0));
+});
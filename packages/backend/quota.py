@@ -0,0 +1,227 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable
+
+import redis
+import redis.asyncio as aioredis
+from prometheus_client import Counter, Gauge
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from .db import SessionLocal, ProofRequest
+from .proof_cache import REDIS_RETRY_AFTER, redis_from_url
+
+QUOTA_CHARGES = Counter("proof_quota_charges_total", "Proof quota charge attempts", ["backend", "result"])
+QUOTA_WRITEBACK_BACKLOG = Gauge("proof_quota_writeback_backlog", "Quota counters waiting to be written to proof_requests")
+
+# KEYS[1] counter; ARGV: amount, limit, ttl and an optional floor the
+# counter is first raised to. Returns the new total, -1 when the charge
+# would exceed the limit, or -2 when the counter has not been seeded yet
+# (nothing is charged in either case).
+CHARGE_SCRIPT = """
+local used = redis.call('GET', KEYS[1])
+if not used then return -2 end
+used = tonumber(used)
+local floor = tonumber(ARGV[4] or '0')
+if floor > used then
+  used = floor
+  redis.call('SET', KEYS[1], used, 'EX', ARGV[3])
+end
+local amount = tonumber(ARGV[1])
+if used + amount > tonumber(ARGV[2]) then return -1 end
+local total = redis.call('INCRBY', KEYS[1], amount)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return total
+"""
+
+
+class QuotaEngine:
+    """Daily proof quotas counted atomically in Redis.
+
+    Each ``(user, day)`` has one counter shared by every API replica; a Lua
+    script checks and increments it in one step so the limit holds across
+    replicas. Counters start from the value in ``proof_requests`` and new
+    totals are written back there by a background thread for auditing.
+    Methods return ``None`` when Redis is unavailable so callers can fall
+    back to the SQL path. Charges made in SQL during an outage are not in
+    Redis, so after one every counter is raised to the SQL count on its
+    next charge.
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None,
+        session_factory=SessionLocal,
+        flush_interval: float = 1.0,
+        ttl: int = 2 * 86400,
+        prefix: str = "quota",
+    ):
+        self.redis_url = redis_url if redis_from_url(redis_url) is not None else None
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis: aioredis.Redis | None = None
+        self._script = None
+        self._down_until = 0.0
+        self._outages = 0
+        # Counters reconciled with proof_requests since the last outage.
+        self._reconciled: set[str] = set()
+        self._pending: dict[tuple[str, str], int] = {}
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stopping = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis_url is not None
+
+    def _client(self):
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            self._script = self._redis.register_script(CHARGE_SCRIPT)
+        return self._redis
+
+    def _key(self, user: str, day: str) -> str:
+        return f"{self.prefix}:{day}:{user}"
+
+    def _available(self) -> bool:
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def _mark_down(self, exc: Exception) -> None:
+        logging.warning(f"Quota Redis unavailable, using SQL quotas: {exc}")
+        self._down_until = time.monotonic() + REDIS_RETRY_AFTER
+        self._outages += 1
+        self._reconciled.clear()
+        # SQL charges start from proof_requests; bring it up to date now.
+        with self._cond:
+            self._cond.notify()
+
+    def _stale(self, key: str) -> bool:
+        return self._outages > 0 and key not in self._reconciled
+
+    async def charge(
+        self,
+        user: str,
+        day: str,
+        amount: int,
+        limit: int,
+        seed: Callable[[], Awaitable[int]],
+    ) -> bool | None:
+        """Charge ``amount`` if it fits under ``limit``; all or nothing.
+
+        ``seed`` returns the count already recorded for the day and is only
+        awaited when the Redis counter does not exist yet.
+        """
+        if not self._available():
+            return None
+        key = self._key(user, day)
+        args = [amount, limit, self.ttl]
+        stale = self._stale(key)
+        if stale:
+            args.append(await seed())
+        try:
+            client = self._client()
+            total = await self._script(keys=[key], args=args)
+            if total == -2:
+                await client.set(key, args[3] if stale else await seed(), ex=self.ttl, nx=True)
+                total = await self._script(keys=[key], args=args)
+        except redis.RedisError as exc:
+            self._mark_down(exc)
+            return None
+        if stale:
+            self._reconciled.add(key)
+        if total < 0:
+            QUOTA_CHARGES.labels("redis", "rejected").inc()
+            return False
+        QUOTA_CHARGES.labels("redis", "charged").inc()
+        self._record(user, day, total)
+        return True
+
+    async def used(self, user: str, day: str) -> int | None:
+        """Return the count for the day, or ``None`` if Redis cannot say."""
+        if not self._available() or self._stale(self._key(user, day)):
+            return None
+        try:
+            value = await self._client().get(self._key(user, day))
+        except redis.RedisError as exc:
+            self._mark_down(exc)
+            return None
+        return int(value) if value is not None else None
+
+    def _record(self, user: str, day: str, total: int) -> None:
+        with self._cond:
+            key = (user, day)
+            self._pending[key] = max(total, self._pending.get(key, 0))
+            QUOTA_WRITEBACK_BACKLOG.set(len(self._pending))
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="quota-writeback", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> None:
+        """Write the latest totals to ``proof_requests``."""
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        db = self.session_factory()
+        retry = {}
+        try:
+            for (user, day), total in pending.items():
+                try:
+                    # Totals only grow, so never lower a newer value.
+                    updated = db.execute(
+                        update(ProofRequest)
+                        .where(ProofRequest.user == user, ProofRequest.day == day, ProofRequest.count < total)
+                        .values(count=total)
+                    ).rowcount
+                    if not updated and not db.query(ProofRequest.id).filter_by(user=user, day=day).first():
+                        db.add(ProofRequest(user=user, day=day, count=total))
+                    db.commit()
+                except SQLAlchemyError as exc:
+                    db.rollback()
+                    logging.error(f"Quota write-back for {user} failed, retrying: {exc}")
+                    retry[(user, day)] = total
+        finally:
+            db.close()
+            with self._cond:
+                for key, total in retry.items():
+                    self._pending[key] = max(total, self._pending.get(key, 0))
+                QUOTA_WRITEBACK_BACKLOG.set(len(self._pending))
+
+    def close(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        thread = self._thread
+        if thread and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout=10)
+        self.flush()
+
+
+QUOTA_ENGINE = QuotaEngine(
+    os.getenv("QUOTA_REDIS_URL") or os.getenv("CELERY_BACKEND", "redis://localhost:6379/0"),
+    flush_interval=int(os.getenv("QUOTA_WRITEBACK_MS", "1000")) / 1000,
+)
+atexit.register(QUOTA_ENGINE.close)
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+import redis
+import redis.asyncio as aioredis
+from prometheus_client import Counter, Gauge
+
+from .proof_cache import redis_from_url
+
+RATE_LIMIT_ALLOWED = Counter("rate_limit_allowed_total", "Requests admitted by the rate limiter", ["group"])
+RATE_LIMIT_REJECTED = Counter(
+    "rate_limit_rejected_total", "Requests rejected by the rate limiter", ["group", "scope"]
+)
+RATE_LIMIT_KEYS = Gauge("rate_limit_tracked_keys", "Clients with a local token bucket")
+RATE_LIMIT_BLOCKED = Gauge("rate_limit_blocked_keys", "Clients over their cluster-wide limit")
+RATE_LIMIT_SYNC_ERRORS = Counter("rate_limit_sync_errors_total", "Failed rate limiter syncs with Redis")
+
+
+class Limit(NamedTuple):
+    rate: float  # tokens added per second
+    burst: int  # bucket capacity
+
+
+# Longest matching path prefix wins; everything else is "default".
+ROUTE_GROUPS = [
+    ("/api/paymaster", "paymaster"),
+    ("/api/zk", "proofs"),
+    ("/elections", "elections"),
+    ("/ws/", "ws"),
+]
+EXEMPT_PATHS = ("/metrics",)
+DEFAULT_LIMITS = {
+    "default": Limit(50, 100),
+    "elections": Limit(20, 40),
+    "paymaster": Limit(5, 10),
+    "proofs": Limit(10, 20),
+    "ws": Limit(2, 5),
+}
+
+
+def parse_limits(spec: str | None) -> dict[str, Limit]:
+    """Parse ``group=rate:burst,...`` over the defaults; a rate of 0 disables a group."""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        group, _, value = item.partition("=")
+        rate, _, burst = value.partition(":")
+        limits[group.strip()] = Limit(float(rate), int(burst or max(1, math.ceil(float(rate)))))
+    return limits
+
+
+def route_group(path: str) -> str | None:
+    if path.startswith(EXEMPT_PATHS):
+        return None
+    for prefix, group in sorted(ROUTE_GROUPS, key=lambda g: -len(g[0])):
+        if path.startswith(prefix):
+            return group
+    return "default"
+
+
+def client_identity(scope: dict, verify: Callable[[str], str | None] | None = None) -> str:
+    """Identify the caller by verified bearer token, else by client IP.
+
+    ``verify`` returns the token's subject, or None when the token does
+    not verify; unverified credentials are ignored so that sending a fresh
+    random token cannot buy a fresh bucket.
+    """
+    headers = dict(scope.get("headers") or [])
+    auth = headers.get(b"authorization", b"")
+    if verify is not None and auth.startswith(b"Bearer "):
+        subject = verify(auth[7:].decode("latin-1"))
+        if subject:
+            return "sub:" + hashlib.sha256(subject.encode()).hexdigest()[:20]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "unsynced")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.unsynced = 0
+
+
+class RateLimiter:
+    """Token buckets per ``(route group, client)``, kept in process memory.
+
+    Every request is decided locally. Every ``sync_interval`` seconds the
+    admitted counts are added to per-window Redis counters in one pipeline,
+    and clients whose cluster-wide count exceeds ``rate * window + burst``
+    are blocked locally until the window ends. Redis therefore sees one
+    round-trip per interval rather than one per request, and an outage only
+    loses the cluster-wide view.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, Limit],
+        redis_url: str | None = None,
+        sync_interval: float = 1.0,
+        window: float = 10.0,
+        max_keys: int = 100_000,
+        prefix: str = "ratelimit",
+    ):
+        self.limits = limits
+        self.redis_url = redis_url if redis_from_url(redis_url) is not None else None
+        self.sync_interval = sync_interval
+        self.window = window
+        self.max_keys = max_keys
+        self.prefix = prefix
+        self._buckets: OrderedDict[tuple[str, str], _Bucket] = OrderedDict()
+        self._blocked: dict[tuple[str, str], float] = {}
+        self._task: asyncio.Task | None = None
+
+    def hit(self, group: str, ident: str, now: float | None = None) -> float:
+        """Take one token; return 0 if admitted, else seconds until retry."""
+        limit = self.limits.get(group) or self.limits["default"]
+        if limit.rate <= 0:
+            return 0.0
+        now = time.time() if now is None else now
+        key = (group, ident)
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                RATE_LIMIT_REJECTED.labels(group, "cluster").inc()
+                return blocked_until - now
+            del self._blocked[key]
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(limit.burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate)
+            bucket.updated = now
+        if bucket.tokens < 1:
+            RATE_LIMIT_REJECTED.labels(group, "local").inc()
+            return (1 - bucket.tokens) / limit.rate
+        bucket.tokens -= 1
+        bucket.unsynced += 1
+        RATE_LIMIT_ALLOWED.labels(group).inc()
+        return 0.0
+
+    def ensure_sync(self) -> None:
+        """Start the Redis sync loop on the running event loop."""
+        if self.redis_url and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._sync_loop())
+
+    async def _sync_loop(self) -> None:
+        client = aioredis.Redis.from_url(self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        try:
+            while True:
+                await asyncio.sleep(self.sync_interval)
+                try:
+                    await self.sync(client)
+                except redis.RedisError as exc:
+                    RATE_LIMIT_SYNC_ERRORS.inc()
+                    logging.warning(f"Rate limiter sync failed: {exc}")
+        finally:
+            await client.aclose()
+
+    async def sync(self, client, now: float | None = None) -> None:
+        """Publish local counts to Redis and pull cluster-wide blocks."""
+        now = time.time() if now is None else now
+        window_index = int(now // self.window)
+        window_end = (window_index + 1) * self.window
+        pending = [(key, b.unsynced) for key, b in self._buckets.items() if b.unsynced]
+        if not pending:
+            self._publish_gauges(now)
+            return
+        pipe = client.pipeline(transaction=False)
+        for (group, ident), count in pending:
+            redis_key = f"{self.prefix}:{group}:{ident}:{window_index}"
+            pipe.incrby(redis_key, count)
+            pipe.expire(redis_key, int(self.window) * 2)
+        results = await pipe.execute()
+        for ((group, ident), count), total in zip(pending, results[::2]):
+            bucket = self._buckets.get((group, ident))
+            if bucket is not None:
+                bucket.unsynced -= count
+            limit = self.limits.get(group) or self.limits["default"]
+            if total > limit.rate * self.window + limit.burst:
+                self._blocked[(group, ident)] = window_end
+        self._publish_gauges(now)
+
+    def _publish_gauges(self, now: float) -> None:
+        self._blocked = {k: until for k, until in self._blocked.items() if until > now}
+        RATE_LIMIT_KEYS.set(len(self._buckets))
+        RATE_LIMIT_BLOCKED.set(len(self._blocked))
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering over-limit requests with 429 + Retry-After.
+
+    WebSocket handshakes over the limit are closed with code 1013 (try again
+    later) before they are accepted.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, verify: Callable[[str], str | None] | None = None):
+        self.app = app
+        self.limiter = limiter
+        self.verify = verify
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        group = route_group(scope["path"])
+        if group is None:
+            return await self.app(scope, receive, send)
+        self.limiter.ensure_sync()
+        retry_after = self.limiter.hit(group, client_identity(scope, self.verify))
+        if not retry_after:
+            return await self.app(scope, receive, send)
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1013})
+            return
+        body = json.dumps({"detail": "rate limit exceeded"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+RATE_LIMITER = RateLimiter(
+    parse_limits(os.getenv("RATE_LIMITS")),
+    redis_url=os.getenv("RATE_LIMIT_REDIS_URL") or os.getenv("CELERY_BACKEND", "redis://localhost:6379/0"),
+    sync_interval=float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "1")),
+    window=float(os.getenv("RATE_LIMIT_WINDOW", "10")),
+)
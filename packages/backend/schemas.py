@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Optional, List
 
 # --- Schemas for ZK Proof Generation ---
@@ -15,6 +16,10 @@ class VoiceInput(BaseModel):
 class BatchTallyInput(BaseModel):
     election_id: int = Field(..., example=1)
 
+class BatchProofInput(BaseModel):
+    # One circuit input payload per proof; all share the circuit in the URL
+    inputs: List[dict] = Field(..., min_length=1, example=[{"credits": [1, 4, 9], "nonce": 1}])
+
 
 # --- Schemas for Election Management ---
 
@@ -48,7 +53,7 @@ class ProofAuditSchema(BaseModel):
     circuit_hash: str
     input_hash: str
     proof_root: str
-    timestamp: str
+    timestamp: datetime
 
     class Config:
         orm_mode = True
@@ -0,0 +1,115 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Gauge
+
+SCRATCH_BYTES = Gauge("prover_scratch_bytes", "Scratch bytes reserved by running proof jobs")
+SCRATCH_JOBS = Gauge("prover_scratch_jobs", "Proof jobs holding a scratch directory")
+
+
+class ScratchFull(RuntimeError):
+    """Raised when no scratch space frees up within the wait timeout."""
+
+
+def _default_root() -> str:
+    # Prefer tmpfs so witness files never touch disk.
+    shm = "/dev/shm"
+    base = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, "toting-scratch")
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ScratchSpace:
+    """Per-job scratch directories with guaranteed cleanup and a size cap.
+
+    Each job reserves the largest job size seen so far (starting at
+    ``job_bytes``) against ``max_bytes``. Jobs wait for space rather than
+    filling the device. The cap applies per process.
+    """
+
+    def __init__(
+        self,
+        root: str | None = None,
+        max_bytes: int = 1 << 30,
+        job_bytes: int = 16 << 20,
+        wait_timeout: float = 60.0,
+    ):
+        self.root = root or _default_root()
+        self.max_bytes = max_bytes
+        self.job_bytes = job_bytes
+        self.wait_timeout = wait_timeout
+        self._reserved = 0
+        self._cond = threading.Condition()
+        self._swept = False
+
+    def _sweep(self) -> None:
+        """Remove directories left behind by processes that no longer exist."""
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(self.root):
+            parts = name.split("-")
+            if len(parts) >= 2 and parts[1].isdigit() and not _pid_alive(int(parts[1])):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        self._swept = True
+
+    def slots(self) -> int:
+        """How many job directories fit under ``max_bytes`` at once."""
+        with self._cond:
+            return max(1, self.max_bytes // min(self.job_bytes, self.max_bytes))
+
+    @contextmanager
+    def job_dir(self, prefix: str = "job") -> Iterator[str]:
+        """Yield a fresh directory that is deleted when the block exits."""
+        with self._cond:
+            if not self._swept:
+                self._sweep()
+            reservation = min(self.job_bytes, self.max_bytes)
+            if not self._cond.wait_for(
+                lambda: self._reserved + reservation <= self.max_bytes,
+                timeout=self.wait_timeout,
+            ):
+                raise ScratchFull(f"scratch space under {self.root} exhausted")
+            self._reserved += reservation
+            SCRATCH_BYTES.set(self._reserved)
+            SCRATCH_JOBS.inc()
+        path = None
+        try:
+            path = tempfile.mkdtemp(prefix=f"{prefix}-{os.getpid()}-", dir=self.root)
+            yield path
+        finally:
+            used = 0
+            if path:
+                used = _dir_size(path)
+                shutil.rmtree(path, ignore_errors=True)
+            with self._cond:
+                self._reserved -= reservation
+                if used > self.job_bytes:
+                    logging.info(f"Scratch job used {used} bytes; raising reservation")
+                    self.job_bytes = used
+                SCRATCH_BYTES.set(self._reserved)
+                SCRATCH_JOBS.dec()
+                self._cond.notify_all()
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+
+from backend.notifications import PushDispatcher
+from backend.utils import ipfs
+
+
+class FakeResponse:
+    """The parts of ``requests.Response`` the IPFS client reads."""
+
+    def __init__(self, content=b"{}", body=None, text=""):
+        self.content = content
+        self.body = body
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def fake_response():
+    return FakeResponse
+
+
+@pytest.fixture
+def ipfs_client():
+    """Build an ``IpfsClient`` with its own cache, optionally stubbing ``session.post``."""
+
+    def make(cache_dir=None, gateways=("https://gw1/ipfs/",), memory_bytes=1024, disk_bytes=1024, post=None):
+        cache = ipfs.ContentCache(str(cache_dir) if cache_dir else None, memory_bytes, disk_bytes)
+        client = ipfs.IpfsClient("https://api/add", list(gateways), cache, hedge_ms=50)
+        if post is not None:
+            client.session.post = post
+        return client
+
+    return make
+
+
+@pytest.fixture
+def push_dispatcher(tmp_path):
+    """Build a ``PushDispatcher`` whose HTTP calls go to ``handler``."""
+    made = []
+
+    def make(handler=None, **kwargs):
+        kwargs.setdefault("batch_window", 0.05)
+        kwargs.setdefault("backoff", 0)
+        dispatcher = PushDispatcher(
+            kwargs.pop("api_url", "https://push/payloads"), "0x" + "1" * 40, "staging", 31337,
+            dead_letter_path=str(tmp_path / "dead.jsonl"),
+            transport=httpx.MockTransport(handler) if handler else None, **kwargs,
+        )
+        made.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in made:
+        dispatcher.close(timeout=1)
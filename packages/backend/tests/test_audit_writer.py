@@ -0,0 +1,72 @@
+import json
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from . import test_main  # noqa: F401 - ensures env setup
+from backend.audit import AuditWriter
+from backend.db import Base, ProofAudit
+
+
+def _row(i):
+    return {
+        "circuit_hash": "c",
+        "input_hash": f"i{i}",
+        "proof_root": f"r{i}",
+        "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_audit_writer_flushes_in_bulk(tmp_path):
+    factory = _session_factory(tmp_path)
+    writer = AuditWriter(factory, batch_size=3, flush_interval=60, spool_path=str(tmp_path / "spool"))
+    writer.submit([_row(1), _row(2)])
+    db = factory()
+    assert db.query(ProofAudit).count() == 0
+    writer.close()
+    assert db.query(ProofAudit).count() == 2
+    db.close()
+
+
+def test_audit_writer_spools_when_db_unreachable(tmp_path):
+    factory = _session_factory(tmp_path)
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}"))
+    spool = tmp_path / "spool.jsonl"
+
+    writer = AuditWriter(broken, spool_path=str(spool), synchronous=True)
+    writer.submit([_row(1), _row(2)])
+    own = tmp_path / f"spool.jsonl.{os.getpid()}"
+    assert len(own.read_text().splitlines()) == 2
+    # a spool left by another (exited) worker process
+    (tmp_path / "spool.jsonl.999999999").write_text(AuditWriter._dump([_row(0)]))
+
+    # the next successful flush replays every spool first
+    writer.session_factory = factory
+    writer.submit([_row(3)])
+    assert not list(tmp_path.glob("spool.jsonl*"))
+    db = factory()
+    assert sorted(r.input_hash for r in db.query(ProofAudit)) == ["i0", "i1", "i2", "i3"]
+    db.close()
+
+
+def test_audit_writer_quarantines_rejected_rows(tmp_path):
+    factory = _session_factory(tmp_path)
+    spool = tmp_path / "spool.jsonl"
+    writer = AuditWriter(factory, spool_path=str(spool), synchronous=True)
+    writer.submit([{**_row(1), "id": 1}])
+    # a duplicate key fails the batch; the other row is still written
+    writer.submit([{**_row(2), "id": 1}, {**_row(3), "id": 3}])
+    db = factory()
+    assert sorted(r.input_hash for r in db.query(ProofAudit)) == ["i1", "i3"]
+    db.close()
+    rejected = [json.loads(line) for line in (tmp_path / "spool.jsonl.rejected").read_text().splitlines()]
+    assert [r["input_hash"] for r in rejected] == ["i2"]
+    assert not (tmp_path / f"spool.jsonl.{os.getpid()}").exists()
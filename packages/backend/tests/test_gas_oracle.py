@@ -0,0 +1,99 @@
+from unittest.mock import MagicMock
+
+from eth_account import Account
+
+from . import test_main
+from backend import main
+from backend.gas_oracle import GasOracle
+from backend.tx_sender import TransactionSender
+
+GWEI = 10**9
+
+
+class FakeFeeHistory:
+    """Serves eth_feeHistory for a chain whose head advances on demand."""
+
+    def __init__(self, head=100):
+        self.head = head
+        self.calls = []
+
+    def block(self, number):
+        # base fee n gwei, tips n/10 .. n/10 + 2 gwei; every tenth block empty
+        return number * GWEI, [number * GWEI // 10 + i * GWEI for i in range(3)], 0.0 if number % 10 == 0 else 0.5
+
+    def fee_history(self, count, newest, percentiles):
+        self.calls.append(count)
+        blocks = [self.block(n) for n in range(self.head - count + 1, self.head + 1)]
+        return {
+            "oldestBlock": self.head - count + 1,
+            "baseFeePerGas": [b[0] for b in blocks] + [(self.head + 1) * GWEI],
+            "reward": [b[1] for b in blocks],
+            "gasUsedRatio": [b[2] for b in blocks],
+        }
+
+
+def _oracle(chain, window=5):
+    w3 = MagicMock()
+    w3.eth.fee_history.side_effect = chain.fee_history
+    return GasOracle(w3, window=window)
+
+
+def test_window_rolls_and_skips_empty_blocks():
+    chain = FakeFeeHistory()
+    oracle = _oracle(chain)
+    assert oracle.snapshot() is None
+    oracle.refresh()
+    chain.head = 102
+    oracle.refresh()
+    assert chain.calls == [5, 4]
+    snapshot = oracle.snapshot()
+    assert sorted(oracle._blocks) == [98, 99, 100, 101, 102]
+    assert snapshot["block"] == 102 and snapshot["baseFee"] == 103 * GWEI
+    # block 100 is empty; the tips come from 98, 99, 101 and 102
+    assert snapshot["tips"] == {50: 9_900_000_000, 95: 11_200_000_000, 99: 12_200_000_000}
+    assert oracle.fees() == {"maxFeePerGas": 2 * 103 * GWEI + 9_900_000_000, "maxPriorityFeePerGas": 9_900_000_000}
+
+
+def test_legacy_chain_uses_gas_price():
+    w3 = MagicMock()
+    w3.eth.fee_history.side_effect = ValueError("method not found")
+    w3.eth.gas_price = 7 * GWEI
+    oracle = GasOracle(w3)
+    oracle.refresh()
+    oracle.refresh()
+    assert w3.eth.fee_history.call_count == 1
+    assert oracle.fees() == {"gasPrice": 7 * GWEI}
+
+
+def test_sender_takes_fees_from_oracle():
+    oracle = _oracle(FakeFeeHistory())
+    oracle.refresh()
+    w3 = MagicMock()
+    sender = TransactionSender(w3, Account.create(), 31337, oracle=oracle)
+    assert sender.fees() == oracle.fees()
+    w3.eth.get_block.assert_not_called()
+
+
+def test_gas_endpoint(monkeypatch):
+    oracle = _oracle(FakeFeeHistory())
+    monkeypatch.setattr(main, "GAS_ORACLE", oracle)
+    assert test_main.client.get("/api/gas").status_code == 503
+    oracle.refresh()
+    r = test_main.client.get("/api/gas")
+    assert r.status_code == 200
+    assert r.json() == {"block": 100, "baseFee": 101.0, "p50": 110.7, "p95": 111.9, "p99": 112.9}
+
+
+def test_paymaster_refuses_fees_far_above_oracle(monkeypatch):
+    oracle = _oracle(FakeFeeHistory())
+    oracle.refresh()
+    monkeypatch.setattr(main, "GAS_ORACLE", oracle)
+    monkeypatch.setattr(main, "PAYMASTER", "0x" + "B" * 40)
+    user_op = {
+        "sender": "0x" + "C" * 40, "nonce": "0x0", "callData": "0x7cb85bf8" + "01" * 32,
+        "callGasLimit": "0x1", "verificationGasLimit": "0x2", "preVerificationGas": "0x3",
+        "maxFeePerGas": hex(10**15), "maxPriorityFeePerGas": "0x5",
+    }
+    r = test_main.client.post("/api/paymaster", json=user_op)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "maxFeePerGas too high"
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import JWTError, jwk, jwt
+
+from backend.oidc import OIDCKeyCache, VerifiedTokenCache, verify_token
+
+
+def _keypair(kid):
+    pem = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = jwk.construct(pem, "RS256").public_key().to_dict()
+    return pem, {**public, "kid": kid, "use": "sig"}
+
+
+class FakeProvider:
+    def __init__(self, *keys):
+        self.keys = list(keys)
+        self.calls = []
+
+    def __call__(self, url, timeout):
+        self.calls.append(url)
+        body = (
+            {"jwks_uri": "https://idp/jwks"}
+            if url.endswith("openid-configuration")
+            else {"keys": self.keys}
+        )
+        return type("Resp", (), {"raise_for_status": lambda self: None, "json": lambda self: body})()
+
+
+def _token(pem, kid, **claims):
+    return jwt.encode({"aud": "client", **claims}, pem, algorithm="RS256", headers={"kid": kid})
+
+
+def test_verified_tokens_are_cached_until_exp():
+    pem, public = _keypair("k1")
+    provider = FakeProvider(public)
+    keys = OIDCKeyCache("https://idp", http_get=provider)
+    tokens = VerifiedTokenCache(max_size=2)
+    token = _token(pem, "k1", sub="alice", exp=time.time() + 60)
+
+    assert verify_token(token, keys, tokens, "client")["sub"] == "alice"
+    assert tokens.get(token) is not None
+    assert len(provider.calls) == 2  # discovery + JWKS, once
+    # an expired entry is evicted rather than served
+    assert tokens.get(token, now=time.time() + 120) is None
+    with pytest.raises(JWTError):
+        verify_token(_token(pem, "k1", exp=time.time() + 60, aud="other"), keys, tokens, "client")
+
+    for sub in ("a", "b", "c"):
+        tokens.put(sub, {"sub": sub})
+    assert tokens.get("a") is None and tokens.get("c") == {"sub": "c"}
+
+
+def test_unknown_kid_refetches_once_within_cooldown():
+    pem1, public1 = _keypair("k1")
+    pem2, public2 = _keypair("k2")
+    provider = FakeProvider(public1)
+    keys = OIDCKeyCache("https://idp", min_refetch_interval=0, http_get=provider)
+    tokens = VerifiedTokenCache(max_size=0)
+    verify_token(_token(pem1, "k1"), keys, tokens, "client")
+
+    # the provider rotates to k2; the first k2 token triggers a re-fetch
+    provider.keys = [public2]
+    assert verify_token(_token(pem2, "k2", sub="bob"), keys, tokens, "client")["sub"] == "bob"
+    assert len(provider.calls) == 4
+
+    keys.min_refetch_interval = 60
+    with pytest.raises(JWTError, match="Signing key not found"):
+        verify_token(_token(pem2, "nope"), keys, tokens, "client")
+    assert len(provider.calls) == 4
@@ -0,0 +1,114 @@
+from eth_abi import encode as abi_encode
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from . import test_main
+from backend import main
+from backend.paymaster import PaymasterSigner, pack_user_op, user_op_hash
+
+ACCOUNT = Account.from_key("0x" + "2" * 64)
+PAYMASTER = "0x" + "B" * 40
+SENDER = "0x" + "C" * 40
+
+
+def _op(sender=SENDER, nonce=0, init_code=b"", call_data=b"\x7c\xb8\x5b\xf8" + b"\x01" * 32):
+    return (sender, nonce, init_code, call_data, 1, 2, 3, 4, 5, b"", b"")
+
+
+class FakeCall:
+    def __init__(self, value):
+        self.value = value
+
+    def call(self):
+        return self.value
+
+
+class FakePaymaster:
+    def __init__(self, nonce=7, hash_override=None):
+        self.nonce = nonce
+        self.hash_override = hash_override
+        self.reads = 0
+        self.functions = self
+
+    def senderNonce(self, sender):
+        self.reads += 1
+        return FakeCall(self.nonce)
+
+    def getHash(self, op, valid_until, valid_after):
+        return FakeCall(self.hash_override or user_op_hash(op, 31337, PAYMASTER, self.nonce, valid_until, valid_after))
+
+
+def _signer(contract, verify_rate=0.0):
+    return PaymasterSigner(None, PAYMASTER, ACCOUNT, 31337, lambda: contract, verify_rate=verify_rate)
+
+
+def _tail(data):
+    return abi_encode(["uint256"], [len(data)]) + data + b"\x00" * (-len(data) % 32)
+
+
+def test_pack_matches_calldata_layout():
+    init_code, call_data, pnd = b"\x01" * 20, b"\x02" * 36, b"\x03" * 149
+    op = (SENDER, 9, init_code, call_data, 1, 2, 3, 4, 5, pnd, b"\x04" * 65)
+    off_init = 11 * 32
+    off_call = off_init + len(_tail(init_code))
+    off_pnd = off_call + len(_tail(call_data))
+    head = abi_encode(
+        ["address", "uint256", "uint256", "uint256", "uint256", "uint256", "uint256", "uint256", "uint256", "uint256", "uint256"],
+        [SENDER, 9, off_init, off_call, 1, 2, 3, 4, 5, off_pnd, off_pnd + len(_tail(pnd))],
+    )
+    assert pack_user_op(op) == head + _tail(init_code) + _tail(call_data)
+
+
+def _recover(op, data, sender_nonce):
+    assert data[:42].lower() == PAYMASTER.lower()
+    placeholder = bytes.fromhex(data[2:42] + data[42:170]) + b"\x00" * 65
+    hashed = op[:9] + (placeholder,) + op[10:]
+    digest = user_op_hash(hashed, 31337, PAYMASTER, sender_nonce)
+    return Account.recover_message(encode_defunct(primitive=digest), signature=bytes.fromhex(data[170:]))
+
+
+def test_signs_locally_with_cached_sender_nonce():
+    contract = FakePaymaster()
+    signer = _signer(contract)
+    op = _op()
+    data = signer.sign(op)
+    assert len(bytes.fromhex(data[2:])) == 20 + 64 + 65
+    assert _recover(op, data, 7) == ACCOUNT.address
+    signer.sign(op)
+    assert contract.reads == 1
+
+
+def test_batch_signs_same_sender_with_consecutive_nonces():
+    contract = FakePaymaster()
+    ops = [_op(nonce=1), _op(nonce=0)]
+    first, second = _signer(contract).sign_many(ops)
+    assert _recover(ops[1], second, 7) == ACCOUNT.address
+    assert _recover(ops[0], first, 8) == ACCOUNT.address
+    assert contract.reads == 1
+
+
+def test_sampled_mismatch_uses_contract_hash():
+    forged = b"\x11" * 32
+    signer = _signer(FakePaymaster(hash_override=forged), verify_rate=1.0)
+    data = signer.sign(_op())
+    recovered = Account.recover_message(encode_defunct(primitive=forged), signature=bytes.fromhex(data[170:]))
+    assert recovered == ACCOUNT.address
+    assert SENDER not in signer._nonces
+
+
+def test_batch_endpoint(monkeypatch):
+    monkeypatch.setattr(main, "PAYMASTER", PAYMASTER)
+    monkeypatch.setattr(main, "PAYMASTER_SIGNER", _signer(FakePaymaster()))
+    user_op = {
+        "sender": SENDER, "nonce": "0x0", "callData": "0x7cb85bf8" + "01" * 32,
+        "callGasLimit": "0x1", "verificationGasLimit": "0x2", "preVerificationGas": "0x3",
+        "maxFeePerGas": "0x4", "maxPriorityFeePerGas": "0x5",
+    }
+    r = test_main.client.post("/api/paymaster/batch", json=[user_op, dict(user_op, nonce="0x1")])
+    assert r.status_code == 200
+    assert [item["paymaster"] for item in r.json()] == [PAYMASTER, PAYMASTER]
+    assert _recover(_op(), r.json()[0]["paymasterAndData"], 7) == ACCOUNT.address
+
+    r = test_main.client.post("/api/paymaster/batch", json=[user_op, dict(user_op, callData="0xdeadbeef")])
+    assert r.status_code == 400
+    assert r.json()["detail"] == "userOp 1: invalid callData"
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from . import test_main  # noqa: F401 - ensures env setup
+from backend import pinning
+from backend.db import Base, PinOutbox
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pins.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _add(factory, content):
+    db = factory()
+    db.add(PinOutbox(
+        meta=hashlib.sha256(content.encode()).hexdigest(), content=content, status="pending",
+        attempts=0, next_attempt_at=NOW, created_at=NOW, updated_at=NOW,
+    ))
+    db.commit()
+    db.close()
+
+
+def test_outbox_pins_due_rows_in_one_request(tmp_path, ipfs_client, fake_response):
+    factory = _session_factory(tmp_path)
+    for content in ('{"a": 1}', '{"b": 2}'):
+        _add(factory, content)
+    requests = []
+
+    def post(url, files, headers, timeout):
+        requests.append(files)
+        return fake_response(text="\n".join(f'{{"Name": "{name}", "Hash": "Qm{name}"}}' for _, (name, _) in files))
+
+    result = pinning.process_outbox(factory, ipfs_client(post=post), now=NOW)
+    assert result == {"pinned": 2, "failed": 0}
+    assert len(requests) == 1 and len(requests[0]) == 2
+    db = factory()
+    assert {(p.status, p.cid) for p in db.query(PinOutbox)} == {("pinned", "Qm1"), ("pinned", "Qm2")}
+    db.close()
+
+
+def test_outbox_backs_off_and_gives_up(tmp_path, monkeypatch, ipfs_client):
+    factory = _session_factory(tmp_path)
+    _add(factory, '{"c": 3}')
+    monkeypatch.setattr(pinning, "PIN_MAX_ATTEMPTS", 2)
+
+    def post(url, files, headers, timeout):
+        raise ConnectionError("infura down")
+
+    client = ipfs_client(post=post)
+    assert pinning.process_outbox(factory, client, now=NOW) == {"pinned": 0, "failed": 1}
+    db = factory()
+    row = db.query(PinOutbox).one()
+    assert row.status == "pending" and row.attempts == 1 and "infura down" in row.error
+    assert row.next_attempt_at.replace(tzinfo=timezone.utc) == NOW + timedelta(seconds=pinning.PIN_BACKOFF_BASE)
+    db.close()
+
+    # not due yet: nothing is attempted
+    assert pinning.process_outbox(factory, client, now=NOW) == {"pinned": 0, "failed": 0}
+    later = NOW + timedelta(seconds=pinning.PIN_BACKOFF_BASE)
+    assert pinning.process_outbox(factory, client, now=later) == {"pinned": 0, "failed": 1}
+    db = factory()
+    assert db.query(PinOutbox).one().status == "failed"
+    db.close()
+
+
+def test_enqueue_pin_ignores_duplicates_without_integrity_error(tmp_path):
+    factory = _session_factory(tmp_path)
+    content = '{"d": 4}'
+    meta = hashlib.sha256(content.encode()).hexdigest()
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pins.db'}")
+        async with async_sessionmaker(engine, autoflush=False)() as db:
+            # Neither call sees the other's row, as with two concurrent requests.
+            await pinning.enqueue_pin(db, meta, content)
+            await pinning.enqueue_pin(db, meta, content)
+            await db.commit()
+        await engine.dispose()
+
+    asyncio.run(run())
+    db = factory()
+    assert db.query(PinOutbox).filter_by(meta=meta).count() == 1
+    db.close()
@@ -2,10 +2,13 @@ import os
 import hashlib
 import json
 
+import pytest
+
 os.environ.setdefault("DATABASE_URL", "sqlite:///test.db")
 os.environ.setdefault("CIRCUIT_MANIFEST", os.path.join(os.path.dirname(__file__), "test_manifest.json"))
 
-from backend import proof
+from backend import proof, proof_cache
+from backend.proof_cache import ProofCache
 
 
 def test_dummy_proof_eligibility():
@@ -39,10 +42,130 @@ def test_cache_key_and_cache_get(monkeypatch):
 
     proof.PROOF_CACHE.clear()
     assert proof.cache_get("eligibility", inputs, "bn254") is None
-    proof.PROOF_CACHE[key] = {"proof": 1}
+    proof.PROOF_CACHE.set(key, {"proof": 1}, "hash")
     assert proof.cache_get("eligibility", inputs, "bn254") == {"proof": 1}
 
+    proof.invalidate_circuit("hash")
+    assert proof.cache_get("eligibility", inputs, "bn254") is None
+
 
 def test_cache_get_bad_hash(monkeypatch):
     monkeypatch.setattr(proof, "get_circuit_hash", lambda *a, **k: "")
     assert proof.cache_get("bad", {"x":0}, "bn254") is None
+
+
+def test_proof_cache_lru_eviction():
+    cache = ProofCache(max_entries=2)
+    cache.set("a", {"proof": "a"}, "h")
+    cache.set("b", {"proof": "b"}, "h")
+    assert cache.get("a", "h") == {"proof": "a"}
+    cache.set("c", {"proof": "c"}, "h")
+    # "b" was least recently used
+    assert cache.get("b", "h") is None
+    assert cache.get("a", "h") == {"proof": "a"}
+    assert len(cache) == 2
+
+
+def test_proof_cache_ttl(monkeypatch):
+    cache = ProofCache(ttl=10)
+    now = [100.0]
+    monkeypatch.setattr(proof_cache.time, "monotonic", lambda: now[0])
+    cache.set("a", {"proof": "a"}, "h")
+    assert cache.get("a", "h") is not None
+    now[0] += 11
+    assert cache.get("a", "h") is None
+
+
+def test_circuit_manifest_index_and_reload(tmp_path):
+    from backend.circuits import CircuitManifest
+
+    art = tmp_path / "artifacts"
+    art.mkdir()
+    (art / "voice_check.wasm").write_bytes(b"")
+    (art / "voice_check.zkey").write_bytes(b"")
+    manifest_file = art / "manifest.json"
+    manifest_file.write_text(json.dumps({
+        "voice_check": {"hash": "h1", "wasm": "artifacts/voice_check.wasm", "zkey": "artifacts/voice_check.zkey"},
+        "eligibility": {"bls12-381": {"hash": "h2", "wasm": "artifacts/missing.wasm", "zkey": "artifacts/missing.zkey"}},
+    }))
+
+    manifest = CircuitManifest(str(manifest_file))
+    voice = manifest.artifacts("voice", "bn254")
+    assert voice.available
+    assert voice.wasm == str(art / "voice_check.wasm")
+    assert not manifest.artifacts("eligibility", "bls12-381").available
+    assert len(manifest.validate()) == 2
+    assert manifest.refresh() is False
+
+    manifest_file.write_text(json.dumps({"voice_check": {"hash": "h3"}}))
+    os.utime(manifest_file, (0, 12345))
+    assert manifest.refresh() is True
+    assert manifest.hashes["voice"] == {"bn254": "h3"}
+    assert manifest.artifacts("eligibility", "bls12-381") is None
+
+
+def test_scratch_space_cleanup_and_cap(tmp_path):
+    from backend.scratch import ScratchSpace, ScratchFull
+
+    scratch = ScratchSpace(root=str(tmp_path / "scratch"), max_bytes=100, job_bytes=60, wait_timeout=0.01)
+    with scratch.job_dir("snarkjs") as d:
+        with open(os.path.join(d, "witness.wtns"), "wb") as f:
+            f.write(b"x" * 10)
+        # a second job would exceed the cap while the first holds its reservation
+        with pytest.raises(ScratchFull):
+            with scratch.job_dir("snarkjs"):
+                pass
+    assert not os.path.exists(d)
+    assert os.listdir(tmp_path / "scratch") == []
+
+
+def test_subprocess_batch_chunks_fit_the_scratch_cap(tmp_path, monkeypatch):
+    from backend.scratch import ScratchSpace
+
+    # room for two job directories, but four parallel workers
+    scratch = ScratchSpace(root=str(tmp_path / "scratch"), max_bytes=100, job_bytes=40, wait_timeout=0.5)
+    monkeypatch.setattr(proof, "SCRATCH", scratch)
+    monkeypatch.setattr(proof, "PROVER_BACKEND", "subprocess")
+    monkeypatch.setattr(proof, "PROOF_BATCH_PARALLELISM", 4)
+    monkeypatch.setattr(proof, "_snarkjs_witness", lambda wasm, inputs, workdir: inputs["x"])
+    monkeypatch.setattr(proof, "_snarkjs_prove", lambda zkey, witness, workdir: witness * 2)
+    assert scratch.slots() == 2
+    assert proof._run_prover_batch("c.wasm", "c.zkey", [{"x": i} for i in range(5)]) == [0, 2, 4, 6, 8]
+
+
+def test_queue_depth_sampler_reads_llen():
+    class FakePipe:
+        def __init__(self, lengths):
+            self.lengths, self.keys = lengths, []
+
+        def llen(self, key):
+            self.keys.append(key)
+
+        def execute(self):
+            return [self.lengths.get(k, 0) for k in self.keys]
+
+    lengths = {"celery": 4, "celery\x06\x163": 2}
+    sampler = proof.QueueDepthSampler(proof.celery_app, "memory://")
+    sampler._redis = type("R", (), {"pipeline": lambda self, transaction=False: FakePipe(lengths)})()
+    assert sampler.sample() == {"celery": 6}
+    assert proof.QUEUE_LENGTH.labels("celery")._value.get() == 6
+
+
+def test_proof_progress_stamps_stages(monkeypatch):
+    from types import SimpleNamespace
+
+    updates, events = [], []
+    request = SimpleNamespace(id="job-1", headers={"queued_at": 1.0})
+    task = SimpleNamespace(request=request, update_state=lambda **kw: updates.append(kw))
+    monkeypatch.setattr(proof, "publish_proof_event", lambda *a, **kw: events.append((a, kw)))
+
+    progress = proof.ProofProgress(task, "voice", "bn254")
+    for stage in ("witness", "proving", "exporting", "persisted"):
+        progress(stage)
+
+    assert list(progress.stages) == list(proof.PROOF_STAGES)
+    assert [u["meta"]["stage"] for u in updates] == ["started", "witness", "proving", "exporting"]
+    assert events[-1] == (("job-1", "running", 100), {"stage": "persisted", "stages": progress.stages})
+    # the queue wait is measured from the publish-time header
+    hist = proof.STAGE_TIME.labels("voice", "bn254", "started")
+    assert hist._sum.get() >= progress.stages["started"] - 1.0
@@ -0,0 +1,66 @@
+import sys
+import textwrap
+
+import pytest
+
+from backend.prover import ProverPool, ProverError
+
+# Speaks the prover_worker.js protocol without needing node or snarkjs.
+FAKE_WORKER = textwrap.dedent(
+    """
+    import json, os, sys
+    for line in sys.stdin:
+        job = json.loads(line)
+        if job["inputs"].get("crash"):
+            sys.exit(1)
+        if job["inputs"].get("fail"):
+            print(json.dumps({"id": job["id"], "ok": False, "error": "bad input"}), flush=True)
+            continue
+        for stage in ("witness", "proving", "exporting"):
+            print(json.dumps({"id": job["id"], "stage": stage}), flush=True)
+        calldata = [["0x1", "0x2"], [["0x3", "0x4"], ["0x5", "0x6"]], ["0x7", "0x8"], [str(os.getpid())]]
+        print(json.dumps({"id": job["id"], "ok": True, "calldata": calldata}), flush=True)
+    """
+)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    p = ProverPool(size=1, timeout=10, command=[sys.executable, str(script)])
+    yield p
+    p.close()
+
+
+def test_pool_reuses_warm_process(pool):
+    stages = []
+    a, b, c, pub = pool.prove("c.wasm", "c.zkey", {"x": 1}, on_stage=stages.append)
+    assert a == ["0x1", "0x2"]
+    assert stages == ["witness", "proving", "exporting"]
+    _, _, _, pub2 = pool.prove("c.wasm", "c.zkey", {"x": 2})
+    assert pub == pub2  # same worker pid served both jobs
+
+
+def test_pool_keeps_process_after_job_error(pool):
+    _, _, _, pub = pool.prove("c.wasm", "c.zkey", {"x": 1})
+    with pytest.raises(ProverError, match="bad input"):
+        pool.prove("c.wasm", "c.zkey", {"fail": True})
+    _, _, _, pub2 = pool.prove("c.wasm", "c.zkey", {"x": 1})
+    assert pub == pub2
+
+
+def test_pool_replaces_crashed_process(pool):
+    _, _, _, pub = pool.prove("c.wasm", "c.zkey", {"x": 1})
+    with pytest.raises(ProverError):
+        pool.prove("c.wasm", "c.zkey", {"crash": True})
+    _, _, _, pub2 = pool.prove("c.wasm", "c.zkey", {"x": 1})
+    assert pub != pub2
+
+
+def test_pool_recovers_slot_after_failed_spawn(tmp_path):
+    pool = ProverPool(size=1, timeout=2, command=[str(tmp_path / "missing-node")])
+    for _ in range(3):
+        with pytest.raises(FileNotFoundError):
+            pool.prove("c.wasm", "c.zkey", {"x": 1})
+    assert pool._started == 0
@@ -1,30 +1,90 @@
-import os
-from unittest.mock import patch, MagicMock
+import json
+import threading
+
 import httpx
 
 from . import test_main  # noqa: F401 - ensures env setup
 from backend import main
+from backend.notifications import coalesce
+
+CHANNEL = "0x" + "1" * 40
+
+
+def test_coalesce_merges_recipients_and_broadcasts():
+    merged = coalesce([
+        ("t", "b", ("0xa",)), ("t", "b", ("0xb", "0xa")), ("t", "other", ("0xc",)),
+        ("x", "y", ("0xd",)), ("x", "y", None),
+    ])
+    assert merged == [("t", "b", ["0xa", "0xb"]), ("t", "other", ["0xc"]), ("x", "y", None)]
+
+
+def test_dispatcher_batches_bursts_into_one_request(tmp_path, push_dispatcher):
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(202)
+
+    push = push_dispatcher(handler)
+    for addr in ("0x" + "2" * 40, "0x" + "3" * 40):
+        assert push.notify("title", "body", [addr]) is True
+    push.close()
+    assert len(requests) == 1
+    assert requests[0]["type"] == 4
+    assert requests[0]["recipients"] == [f"eip155:31337:0x{c * 40}" for c in "23"]
+    assert requests[0]["channel"] == f"eip155:31337:{CHANNEL}"
+    assert not (tmp_path / "dead.jsonl").exists()
+
+
+def test_dispatcher_retries_then_dead_letters(tmp_path, push_dispatcher):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    push = push_dispatcher(handler, max_attempts=3)
+    push.notify("title", "body")
+    push.close()
+    assert len(calls) == 3
+    record = json.loads((tmp_path / "dead.jsonl").read_text())
+    assert record["attempts"] == 3 and record["payload"]["type"] == 1
+
+
+def test_dispatcher_does_not_retry_rejected_payloads(tmp_path, push_dispatcher):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400)
+
+    push = push_dispatcher(handler, max_attempts=3)
+    push.notify("title", "body")
+    push.close()
+    assert len(calls) == 1
+    assert json.loads((tmp_path / "dead.jsonl").read_text())["attempts"] == 1
 
 
-def test_send_push_notification_success(monkeypatch):
-    monkeypatch.setattr(main, "PUSH_CHANNEL", "0x" + "1" * 40)
-    mock_response = MagicMock(status_code=202)
-    mock_response.raise_for_status.return_value = None
-    with patch("backend.main.httpx.post", return_value=mock_response) as mock_post:
-        result = main.send_push_notification("title", "body", ["0x" + "2" * 40])
-        assert result is True
-        mock_response.raise_for_status.assert_called_once()
-        mock_post.assert_called_once()
+def test_first_notify_returns_without_blocking(tmp_path, push_dispatcher):
+    # Real transport against a closed port: delivery fails and is dead-lettered.
+    push = push_dispatcher(api_url="http://127.0.0.1:9/", max_attempts=1, timeout=1)
+    results = []
+    caller = threading.Thread(target=lambda: results.append(push.notify("title", "body")), daemon=True)
+    caller.start()
+    caller.join(2)
+    assert results == [True]
+    push.close(timeout=5)
+    assert json.loads((tmp_path / "dead.jsonl").read_text())["attempts"] == 1
 
 
-def test_send_push_notification_http_error(monkeypatch):
-    monkeypatch.setattr(main, "PUSH_CHANNEL", "0x" + "1" * 40)
-    mock_response = MagicMock(status_code=500)
+def test_send_push_notification_queues(monkeypatch):
+    notified = []
+    monkeypatch.setattr(main.PUSH, "channel", CHANNEL)
+    monkeypatch.setattr(main.PUSH, "notify", lambda *args: notified.append(args) or True)
+    assert main.send_push_notification("title", "body", ["0x" + "2" * 40]) is True
+    assert notified == [("title", "body", ["0x" + "2" * 40])]
 
-    def _raise():
-        raise httpx.HTTPStatusError("boom", request=MagicMock(), response=mock_response)
 
-    mock_response.raise_for_status.side_effect = _raise
-    with patch("backend.main.httpx.post", return_value=mock_response):
-        result = main.send_push_notification("title", "body")
-        assert result is False
+def test_send_push_notification_unconfigured(monkeypatch):
+    monkeypatch.setattr(main.PUSH, "channel", None)
+    assert main.send_push_notification("title", "body") is False
@@ -0,0 +1,90 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.ratelimit import Limit, RateLimiter, RateLimitMiddleware, parse_limits, route_group
+
+
+def _client(limiter, verify=None):
+    app = FastAPI()
+
+    @app.get("/elections")
+    def elections():
+        return []
+
+    @app.get("/metrics")
+    def metrics():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, verify=verify)
+    return TestClient(app)
+
+
+def test_parse_limits_and_route_groups():
+    limits = parse_limits("elections=2:4, ws=0")
+    assert limits["elections"] == Limit(2, 4)
+    assert limits["ws"].rate == 0
+    assert limits["paymaster"] == Limit(5, 10)  # default kept
+    assert route_group("/api/paymaster/batch") == "paymaster"
+    assert route_group("/ws/proofs/abc") == "ws"
+    assert route_group("/auth/initiate") == "default"
+    assert route_group("/metrics") is None
+
+
+def test_token_bucket_returns_429_with_retry_after():
+    limiter = RateLimiter({"default": Limit(1, 2), "elections": Limit(0.5, 2)})
+    client = _client(limiter, verify={"a": "alice", "b": "bob"}.get)
+    headers = {"Authorization": "Bearer a"}
+    assert client.get("/elections", headers=headers).status_code == 200
+    assert client.get("/elections", headers=headers).status_code == 200
+    r = client.get("/elections", headers=headers)
+    assert r.status_code == 429
+    assert 1 <= int(r.headers["Retry-After"]) <= 2
+    # other callers have their own bucket and exempt paths are never limited
+    assert client.get("/elections", headers={"Authorization": "Bearer b"}).status_code == 200
+    assert client.get("/metrics", headers=headers).status_code == 200
+
+
+def test_unverified_tokens_share_the_ip_bucket():
+    client = _client(RateLimiter({"default": Limit(1, 1)}), verify=lambda token: None)
+    statuses = [
+        client.get("/elections", headers={"Authorization": f"Bearer random{i}"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 429, 429]
+
+
+def test_sync_blocks_clients_over_cluster_limit():
+    class FakePipe:
+        def __init__(self, store):
+            self.store, self.ops = store, []
+
+        def incrby(self, key, n):
+            self.ops.append(("incr", key, n))
+
+        def expire(self, key, ttl):
+            self.ops.append(("expire", key, ttl))
+
+        async def execute(self):
+            out = []
+            for op, key, n in self.ops:
+                if op == "incr":
+                    self.store[key] = self.store.get(key, 0) + n
+                    out.append(self.store[key])
+                else:
+                    out.append(True)
+            return out
+
+    store = {}
+    redis = type("R", (), {"pipeline": lambda self, transaction=False: FakePipe(store)})()
+    limiter = RateLimiter({"default": Limit(1, 5)}, window=10)
+    now = 1000.0
+    for _ in range(3):
+        assert limiter.hit("default", "ip:1", now) == 0
+    # another replica already admitted 20 requests for this client this window
+    store["ratelimit:default:ip:1:100"] = 20
+    asyncio.run(limiter.sync(redis, now))
+    assert store["ratelimit:default:ip:1:100"] == 23
+    assert limiter.hit("default", "ip:1", now + 1) == 9.0
+    assert limiter.hit("default", "ip:1", now + 10) == 0  # next window
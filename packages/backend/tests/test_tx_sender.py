@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from eth_account import Account
+from web3 import Web3
+from web3.exceptions import TransactionNotFound, Web3RPCError
+
+from backend.tx_sender import TransactionSender
+
+TX = {"to": Web3.to_checksum_address("0x" + "a" * 40), "gas": 21000}
+
+
+class FakeChain:
+    """Accepts consecutive nonces only, like a node's transaction pool."""
+
+    def __init__(self, nonce=5):
+        self.nonce = nonce
+        self.sent = []
+        self.mined = {}
+        self.calls = {"get_transaction_count": 0, "get_block": 0}
+
+    def w3(self):
+        w3 = MagicMock()
+        eth = w3.eth
+
+        def get_transaction_count(address, block):
+            self.calls["get_transaction_count"] += 1
+            return self.nonce
+
+        def get_block(block):
+            self.calls["get_block"] += 1
+            return {"baseFeePerGas": 100}
+
+        def send_raw_transaction(raw):
+            tx = Account.recover_transaction(raw)  # validates the signature
+            self.sent.append(raw)
+            return bytes([len(self.sent)]) * 32
+
+        def get_transaction_receipt(tx_hash):
+            if tx_hash not in self.mined:
+                raise TransactionNotFound(tx_hash)
+            return self.mined[tx_hash]
+
+        eth.get_transaction_count.side_effect = get_transaction_count
+        eth.get_block.side_effect = get_block
+        eth.max_priority_fee = 10
+        eth.send_raw_transaction.side_effect = send_raw_transaction
+        eth.get_transaction_receipt.side_effect = get_transaction_receipt
+        return w3
+
+
+def _sender(chain, **kw):
+    return TransactionSender(chain.w3(), Account.create(), 31337, **kw)
+
+
+def test_concurrent_sends_get_consecutive_nonces_with_cached_fees():
+    chain = FakeChain()
+    sender = _sender(chain)
+    with ThreadPoolExecutor(8) as pool:
+        hashes = list(pool.map(lambda _: sender.send(TX), range(20)))
+    assert len(set(hashes)) == 20
+    assert sorted(e.tx["nonce"] for e in sender._in_flight.values()) == list(range(5, 25))
+    assert next(iter(sender._in_flight.values())).tx["maxFeePerGas"] == 210
+    # one nonce read and one fee lookup for the whole burst
+    assert chain.calls == {"get_transaction_count": 1, "get_block": 1}
+
+
+def test_nonce_rejection_resyncs_and_retries():
+    chain = FakeChain(nonce=3)
+    sender = _sender(chain)
+    sender.send(TX)
+    # another process used nonces 4 and 5 with the same key
+    chain.nonce = 6
+    original = sender.w3.eth.send_raw_transaction.side_effect
+
+    def reject_stale(raw):
+        if Account.recover_transaction(raw) and sender._nonce == 4:
+            raise Web3RPCError("{'code': -32000, 'message': 'nonce too low'}")
+        return original(raw)
+
+    sender.w3.eth.send_raw_transaction.side_effect = reject_stale
+    sender.send(TX)
+    assert max(sender._in_flight) == 6
+    assert chain.calls["get_transaction_count"] == 2
+
+    sender.w3.eth.send_raw_transaction.side_effect = Web3RPCError("insufficient funds")
+    with pytest.raises(Web3RPCError):
+        sender.send(TX)
+    assert sender._nonce == 7  # not consumed by the failed send
+
+
+def test_stuck_transaction_is_replaced_and_replacement_receipt_found():
+    chain = FakeChain()
+    sender = _sender(chain, replace_after=0)
+    first = sender.send(TX)
+    assert sender.receipt(first) is None  # pending: replaced with higher fees
+    entry = sender._in_flight[5]
+    assert len(entry.hashes) == 2 and entry.tx["nonce"] == 5
+    assert entry.tx["maxFeePerGas"] > 210 and entry.tx["maxPriorityFeePerGas"] > 10
+
+    chain.mined[entry.hashes[1]] = receipt = MagicMock(status=1)
+    assert sender.receipt(first) is receipt
+    assert not sender._in_flight
@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from prometheus_client import Counter, Gauge
+from web3 import Web3
+from web3.exceptions import TransactionNotFound, Web3RPCError
+
+from .gas_oracle import GasOracle
+
+TX_SENT = Counter("tx_sender_sent_total", "Transactions broadcast by the transaction sender", ["kind"])
+TX_NONCE_RESYNCS = Counter("tx_sender_nonce_resyncs_total", "Nonce resyncs after a rejected transaction")
+TX_IN_FLIGHT = Gauge("tx_sender_in_flight", "Broadcast transactions without a receipt yet")
+
+# web3 v7 raises Web3RPCError for JSON-RPC errors, older versions ValueError.
+RPC_ERRORS = (ValueError, Web3RPCError)
+# Node errors meaning our local nonce disagrees with the chain (another
+# process used the key, or a transaction was dropped).
+NONCE_ERRORS = ("nonce too low", "nonce too high", "already known", "replacement transaction underpriced")
+
+
+@dataclass
+class _InFlight:
+    tx: dict
+    hashes: list[str]
+    sent_at: float
+    bumps: int = 0
+    done: bool = False
+
+
+class TransactionSender:
+    """Signs and broadcasts transactions for one key without per-send lookups.
+
+    The nonce is read from the node once and then tracked locally, so
+    concurrent callers get consecutive nonces instead of racing on
+    ``eth_getTransactionCount``. Signing and broadcasting happen under one
+    lock and the nonce only advances once the node accepted the transaction,
+    which keeps the sequence free of gaps. When the node rejects a nonce
+    the sender re-reads it and retries.
+
+    Fees come from the shared ``oracle`` when it has a fresh window;
+    otherwise they are looked up and cached for ``fee_ttl`` seconds:
+    EIP-1559 ``maxFeePerGas`` / ``maxPriorityFeePerGas`` when the chain
+    reports a base fee, legacy ``gasPrice`` otherwise. A transaction still unmined after
+    ``replace_after`` seconds is re-sent with the same nonce and fees raised
+    by ``bump_percent`` (nodes require at least 10%).
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        account,
+        chain_id: int,
+        fee_ttl: float = 5.0,
+        replace_after: float = 60.0,
+        bump_percent: int = 15,
+        max_bumps: int = 5,
+        max_retries: int = 3,
+        oracle: GasOracle | None = None,
+    ):
+        self.w3 = w3
+        self.account = account
+        self.chain_id = chain_id
+        self.fee_ttl = fee_ttl
+        self.replace_after = replace_after
+        self.bump_percent = max(10, bump_percent)
+        self.max_bumps = max_bumps
+        self.max_retries = max_retries
+        self.oracle = oracle
+        self._nonce: int | None = None
+        self._fees: dict | None = None
+        self._fees_expire = 0.0
+        self._lock = threading.RLock()
+        self._in_flight: dict[int, _InFlight] = {}
+        self._by_hash: dict[str, int] = {}
+
+    @property
+    def address(self) -> str:
+        return self.account.address
+
+    def resync(self) -> None:
+        """Forget the local nonce; the next send reads it from the node."""
+        with self._lock:
+            self._nonce = None
+        TX_NONCE_RESYNCS.inc()
+
+    def fees(self) -> dict:
+        """Current fee fields for a transaction, cached for ``fee_ttl`` seconds."""
+        if self.oracle is not None:
+            fees = self.oracle.fees()
+            if fees is not None:
+                return fees
+        now = time.monotonic()
+        with self._lock:
+            if self._fees is not None and now < self._fees_expire:
+                return self._fees
+        base_fee = self.w3.eth.get_block("latest").get("baseFeePerGas")
+        if base_fee is None:
+            fees = {"gasPrice": self.w3.eth.gas_price}
+        else:
+            try:
+                tip = self.w3.eth.max_priority_fee
+            except Exception:
+                tip = Web3.to_wei(1, "gwei")
+            # Two base fees of headroom survive six full blocks of increases.
+            fees = {"maxFeePerGas": 2 * base_fee + tip, "maxPriorityFeePerGas": tip}
+        with self._lock:
+            self._fees, self._fees_expire = fees, now + self.fee_ttl
+        return fees
+
+    def _broadcast(self, tx: dict) -> str:
+        signed = self.account.sign_transaction(tx)
+        raw = getattr(signed, "rawTransaction", None)
+        if raw is None:
+            raw = signed.raw_transaction
+        return Web3.to_hex(self.w3.eth.send_raw_transaction(raw))
+
+    def send(self, tx: dict) -> str:
+        """Fill in nonce, fees and chain id, sign, broadcast and return the hash."""
+        tx = {k: v for k, v in tx.items() if k not in ("nonce", "gasPrice", "maxFeePerGas", "maxPriorityFeePerGas")}
+        tx.update(self.fees(), chainId=self.chain_id)
+        tx.setdefault("from", self.address)
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                if self._nonce is None:
+                    self._nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+                tx["nonce"] = self._nonce
+                try:
+                    tx_hash = self._broadcast(tx)
+                except RPC_ERRORS as exc:
+                    if attempt == self.max_retries or not any(e in str(exc).lower() for e in NONCE_ERRORS):
+                        raise
+                    logging.warning(f"Nonce {tx['nonce']} rejected for {self.address}, resyncing: {exc}")
+                    self.resync()
+                    continue
+                self._nonce += 1
+                self._in_flight[tx["nonce"]] = _InFlight(dict(tx), [tx_hash], time.monotonic())
+                self._by_hash[tx_hash] = tx["nonce"]
+                TX_IN_FLIGHT.set(len(self._in_flight))
+            TX_SENT.labels("new").inc()
+            return tx_hash
+
+    def send_call(self, fn, gas: int) -> str:
+        """Send a contract function call, e.g. ``contract.functions.f(x)``."""
+        # Passing every field stops build_transaction from querying the node.
+        return self.send(fn.build_transaction({
+            "from": self.address,
+            "gas": gas,
+            "chainId": self.chain_id,
+            "nonce": 0,
+            **self.fees(),
+        }))
+
+    def bump(self, tx_hash: str) -> str | None:
+        """Replace an in-flight transaction with a higher-fee copy."""
+        with self._lock:
+            nonce = self._by_hash.get(tx_hash)
+            entry = self._in_flight.get(nonce) if nonce is not None else None
+            if entry is None or entry.done or entry.bumps >= self.max_bumps:
+                return None
+            tx = dict(entry.tx)
+            current = self.fees()
+            for key in ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas"):
+                if key in tx:
+                    bumped = tx[key] * (100 + self.bump_percent) // 100 + 1
+                    tx[key] = max(bumped, current.get(key, 0))
+            try:
+                new_hash = self._broadcast(tx)
+            except RPC_ERRORS as exc:
+                # Usually "nonce too low": one of the versions was mined.
+                logging.warning(f"Could not replace transaction {tx_hash}: {exc}")
+                return None
+            entry.tx, entry.sent_at, entry.bumps = tx, time.monotonic(), entry.bumps + 1
+            entry.hashes.append(new_hash)
+            self._by_hash[new_hash] = nonce
+        TX_SENT.labels("replacement").inc()
+        logging.info(f"Replaced transaction {tx_hash} with {new_hash} (nonce {nonce})")
+        return new_hash
+
+    def poll(self, tx_hash: str) -> tuple[object | None, str]:
+        """Return ``(receipt, hash)`` for ``tx_hash`` or any of its replacements.
+
+        ``hash`` is the mined version, or while unmined the latest broadcast
+        one, so callers can persist it: replacements are only tracked in
+        memory. Replaces the transaction when it has been pending for longer
+        than ``replace_after``. Never blocks on the node beyond single lookups.
+        """
+        with self._lock:
+            nonce = self._by_hash.get(tx_hash)
+            entry = self._in_flight.get(nonce) if nonce is not None else None
+            hashes = list(entry.hashes) if entry is not None else [tx_hash]
+        for candidate in reversed(hashes):
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(candidate)
+            except TransactionNotFound:
+                continue
+            if receipt is not None:
+                self._forget(nonce)
+                return receipt, candidate
+        if entry is not None and time.monotonic() - entry.sent_at >= self.replace_after:
+            return None, self.bump(tx_hash) or hashes[-1]
+        return None, hashes[-1]
+
+    def receipt(self, tx_hash: str):
+        """Return the receipt of ``tx_hash`` or of any replacement, else ``None``."""
+        return self.poll(tx_hash)[0]
+
+    def wait(self, tx_hash: str, timeout: float | None = None, poll: float = 2.0):
+        """Block until ``tx_hash`` (or a replacement) is mined and return its receipt."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while (receipt := self.receipt(tx_hash)) is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Transaction {tx_hash} not mined after {timeout}s")
+            time.sleep(poll)
+        return receipt
+
+    def _forget(self, nonce: int | None) -> None:
+        if nonce is None:
+            return
+        with self._lock:
+            entry = self._in_flight.pop(nonce, None)
+            if entry is not None:
+                entry.done = True
+                for h in entry.hashes:
+                    self._by_hash.pop(h, None)
+            TX_IN_FLIGHT.set(len(self._in_flight))
@@ -1,33 +1,376 @@
-import os
+import asyncio
 import hashlib
 import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
 import requests
-from base58 import b58encode
+from base58 import b58decode, b58encode
+from prometheus_client import Counter, Histogram
+from requests.adapters import HTTPAdapter
 
 IPFS_API_URL = os.getenv("IPFS_API_URL", "https://ipfs.infura.io:5001/api/v0/add")
 IPFS_GATEWAY = os.getenv("IPFS_GATEWAY", "https://ipfs.io/ipfs/")
+# Extra gateways raced against IPFS_GATEWAY; the first valid answer wins.
+IPFS_GATEWAYS = [IPFS_GATEWAY] + [
+    g.strip() for g in os.getenv("IPFS_GATEWAYS", "").split(",") if g.strip() and g.strip() != IPFS_GATEWAY
+]
 IPFS_TOKEN = os.getenv("IPFS_API_TOKEN")
+IPFS_CACHE_DIR = os.getenv("IPFS_CACHE_DIR")
+IPFS_CACHE_MEMORY_BYTES = int(os.getenv("IPFS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+IPFS_CACHE_DISK_BYTES = int(os.getenv("IPFS_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+IPFS_HEDGE_MS = int(os.getenv("IPFS_HEDGE_MS", "200"))
+IPFS_POOL_SIZE = int(os.getenv("IPFS_POOL_SIZE", "20"))
 
+IPFS_CACHE = Counter("ipfs_cache_total", "IPFS content lookups by the tier that answered", ["tier"])
+IPFS_GATEWAY_LATENCY = Histogram(
+    "ipfs_gateway_fetch_seconds", "Successful IPFS gateway fetches", ["gateway"]
+)
+IPFS_GATEWAY_ERRORS = Counter("ipfs_gateway_errors_total", "Failed IPFS gateway fetches", ["gateway"])
 
-def pin_json(data: str) -> str:
-    """Pin JSON data to IPFS and return the CID string."""
-    headers = {}
-    if IPFS_TOKEN:
-        headers["Authorization"] = f"Bearer {IPFS_TOKEN}"
+
+# CIDv0 (base58btc) or CIDv1 in the default base32 multibase.
+_CID = re.compile(r"[1-9A-HJ-NP-Za-km-z]{1,128}|b[a-z2-7]{1,128}")
+
+
+def _sha256_cid(data: bytes) -> str:
+    return b58encode(b"\x12\x20" + hashlib.sha256(data).digest()).decode()
+
+
+def check_cid(cid: str) -> str:
+    if not _CID.fullmatch(cid):
+        raise ValueError(f"invalid CID {cid!r}")
+    return cid
+
+
+def cid_digest(cid: str) -> bytes | None:
+    """The sha256 digest inside a CIDv0, if it is one."""
+    if not cid.startswith("Qm"):
+        return None
     try:
-        resp = requests.post(
-            IPFS_API_URL,
-            files={"file": data.encode()},
-            headers=headers,
-            timeout=10,
+        multihash = b58decode(cid)
+    except ValueError:
+        return None
+    if len(multihash) == 34 and multihash[:2] == b"\x12\x20":
+        return multihash[2:]
+    return None
+
+
+class ContentCache:
+    """Size-bounded memory and disk cache of IPFS content, keyed by CID.
+
+    Content behind a CID never changes, so entries have no TTL; they are
+    only evicted, least recently used first, once a tier exceeds its byte
+    budget. The disk tier is optional and survives restarts.
+    """
+
+    def __init__(self, directory: str | None, memory_bytes: int, disk_bytes: int):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, cid: str) -> str:
+        # The CID becomes a file name; never let it name anything else.
+        return os.path.join(self.directory, check_cid(cid))
+
+    def _remember(self, cid: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if cid in self._memory:
+                self._memory.move_to_end(cid)
+                return
+            self._memory[cid] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def get_memory(self, cid: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(cid)
+            if data is not None:
+                self._memory.move_to_end(cid)
+        return data
+
+    def get_disk(self, cid: str) -> bytes | None:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(cid), "rb") as f:
+                data = f.read()
+            os.utime(self._path(cid))  # mtime doubles as the LRU clock
+        except FileNotFoundError:
+            return None
+        self._remember(cid, data)
+        return data
+
+    def get(self, cid: str) -> bytes | None:
+        data = self.get_memory(cid)
+        if data is not None:
+            IPFS_CACHE.labels("memory").inc()
+            return data
+        data = self.get_disk(cid)
+        IPFS_CACHE.labels("disk" if data is not None else "miss").inc()
+        return data
+
+    def put(self, cid: str, data: bytes) -> None:
+        check_cid(cid)
+        self._remember(cid, data)
+        if not self.directory or len(data) > self.disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(cid)
+        if os.path.exists(path):
+            return
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_used is None:
+                self._disk_used = sum(e.stat().st_size for e in os.scandir(self.directory) if e.is_file())
+            else:
+                self._disk_used += len(data)
+            if self._disk_used > self.disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so the next writes do not each trigger a scan.
+        for _, size, path in entries:
+            if total <= self.disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_used = total
+
+
+class IpfsClient:
+    """IPFS pinning and gateway reads over pooled keep-alive connections.
+
+    Sync methods share one ``requests.Session``; the ``a``-prefixed async
+    variants share an ``httpx.AsyncClient`` per event loop. Reads go through
+    a :class:`ContentCache` and race the configured gateways: the first
+    gateway is asked at once and each further one ``hedge_ms`` later, and
+    the first valid answer wins.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        gateways: list[str],
+        cache: ContentCache,
+        token: str | None = None,
+        hedge_ms: int = 200,
+        pool_size: int = 20,
+        timeout: float = 10.0,
+    ):
+        self.api_url = api_url
+        self.gateways = gateways
+        self.cache = cache
+        self.token = token
+        self.hedge = hedge_ms / 1000
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(gateways) + 1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool_limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._async: tuple[asyncio.AbstractEventLoop, httpx.AsyncClient] | None = None
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # httpx connections belong to the loop that opened them.
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async[0] is not loop:
+            self._async = (loop, httpx.AsyncClient(timeout=self.timeout, limits=self._pool_limits))
+        return self._async[1]
+
+    def _pinned(self, data: bytes, cid: str) -> str:
+        self.cache.put(cid, data)
+        # Also cache under the digest-derived CID that election metadata
+        # hashes resolve to, so the first metadata read is local.
+        self.cache.put(_sha256_cid(data), data)
+        return cid
+
+    def pin(self, data: bytes) -> str:
+        """Pin ``data`` and return its CID; falls back to the sha256 CID."""
+        try:
+            resp = self.session.post(
+                self.api_url, files={"file": data}, headers=self._headers(), timeout=self.timeout
+            )
+            resp.raise_for_status()
+            cid = resp.json()["Hash"]
+        except Exception as exc:
+            logging.warning(f"IPFS pinning failed, using the sha256 CID: {exc}")
+            cid = _sha256_cid(data)
+        return self._pinned(data, cid)
+
+    def pin_many(self, items: dict[str, bytes]) -> dict[str, str]:
+        """Pin several files in one ``add`` request; return ``{name: cid}``.
+
+        Unlike :meth:`pin` there is no fallback: failures raise so callers
+        can retry.
+        """
+        resp = self.session.post(
+            self.api_url,
+            files=[("file", (name, data)) for name, data in items.items()],
+            headers=self._headers(),
+            timeout=self.timeout + len(items) * 0.1,
         )
         resp.raise_for_status()
-        cid = resp.json()["Hash"]
-        return cid
-    except Exception:
-        # deterministic fallback if pinning fails
-        digest = hashlib.sha256(data.encode()).digest()
-        return b58encode(b"\x12\x20" + digest).decode()
+        # The API answers with one JSON object per line, one per file.
+        cids = {}
+        for line in resp.text.splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                if entry.get("Name") in items and entry.get("Hash"):
+                    cids[entry["Name"]] = entry["Hash"]
+                    self.cache.put(entry["Hash"], items[entry["Name"]])
+        return cids
+
+    async def apin(self, data: bytes) -> str:
+        try:
+            resp = await self._async_client().post(
+                self.api_url, files={"file": data}, headers=self._headers()
+            )
+            resp.raise_for_status()
+            cid = resp.json()["Hash"]
+        except Exception as exc:
+            logging.warning(f"IPFS pinning failed, using the sha256 CID: {exc}")
+            cid = _sha256_cid(data)
+        return await asyncio.to_thread(self._pinned, data, cid)
+
+    @staticmethod
+    def _check(data: bytes, sha256: bytes | None) -> bytes:
+        if sha256 is not None and hashlib.sha256(data).digest() != sha256:
+            raise ValueError("content does not match its hash")
+        return data
+
+    def _verified(self, cid: str, data: bytes, sha256: bytes | None) -> bool:
+        """Whether gateway content may be cached for good.
+
+        It must match ``sha256`` or, failing that, the digest in the CID. A
+        CIDv0 of content added as a UnixFS file hashes the DAG node rather
+        than the raw bytes, so such content is served but not cached.
+        """
+        return hashlib.sha256(data).digest() == (sha256 or cid_digest(cid))
+
+    def _cache_verified(self, cid: str, data: bytes, sha256: bytes | None) -> None:
+        if self._verified(cid, data, sha256):
+            self.cache.put(cid, data)
+
+    def get(self, cid: str, sha256: bytes | None = None) -> bytes:
+        """Return the content behind ``cid``, trying gateways in order.
+
+        ``sha256`` (the expected digest of the content) rejects gateway
+        answers that do not match it. Only content matching ``sha256`` or
+        the CID's own digest is cached.
+        """
+        check_cid(cid)
+        data = self.cache.get(cid)
+        if data is not None:
+            return data
+        errors = []
+        for gateway in self.gateways:
+            start = time.perf_counter()
+            try:
+                resp = self.session.get(f"{gateway}{cid}", timeout=self.timeout)
+                resp.raise_for_status()
+                data = self._check(resp.content, sha256)
+            except Exception as exc:
+                IPFS_GATEWAY_ERRORS.labels(gateway).inc()
+                errors.append(f"{gateway}: {exc}")
+                continue
+            IPFS_GATEWAY_LATENCY.labels(gateway).observe(time.perf_counter() - start)
+            self._cache_verified(cid, data, sha256)
+            return data
+        raise IOError(f"all IPFS gateways failed for {cid}: {'; '.join(errors)}")
+
+    async def _afetch(self, gateway: str, cid: str, sha256: bytes | None, delay: float) -> bytes:
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        try:
+            resp = await self._async_client().get(f"{gateway}{cid}")
+            resp.raise_for_status()
+            data = self._check(resp.content, sha256)
+        except Exception:
+            IPFS_GATEWAY_ERRORS.labels(gateway).inc()
+            raise
+        IPFS_GATEWAY_LATENCY.labels(gateway).observe(time.perf_counter() - start)
+        return data
+
+    async def aget(self, cid: str, sha256: bytes | None = None) -> bytes:
+        """Async :meth:`get` that races the gateways with hedged requests."""
+        check_cid(cid)
+        data = self.cache.get_memory(cid)
+        if data is not None:
+            IPFS_CACHE.labels("memory").inc()
+            return data
+        data = await asyncio.to_thread(self.cache.get_disk, cid)
+        if data is not None:
+            IPFS_CACHE.labels("disk").inc()
+            return data
+        IPFS_CACHE.labels("miss").inc()
+        tasks = [
+            asyncio.create_task(self._afetch(gateway, cid, sha256, i * self.hedge))
+            for i, gateway in enumerate(self.gateways)
+        ]
+        errors = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    data = await next_done
+                except Exception as exc:
+                    errors.append(str(exc))
+                    continue
+                await asyncio.to_thread(self._cache_verified, cid, data, sha256)
+                return data
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise IOError(f"all IPFS gateways failed for {cid}: {'; '.join(errors)}")
+
+
+IPFS = IpfsClient(
+    IPFS_API_URL,
+    IPFS_GATEWAYS,
+    ContentCache(IPFS_CACHE_DIR, IPFS_CACHE_MEMORY_BYTES, IPFS_CACHE_DISK_BYTES),
+    token=IPFS_TOKEN,
+    hedge_ms=IPFS_HEDGE_MS,
+    pool_size=IPFS_POOL_SIZE,
+)
+
+
+def pin_json(data: str) -> str:
+    """Pin JSON data to IPFS and return the CID string."""
+    return IPFS.pin(data.encode())
+
+
+async def apin_json(data: str) -> str:
+    """Async :func:`pin_json`."""
+    return await IPFS.apin(data.encode())
 
 
 def cid_from_meta_hash(meta_hex: str) -> str:
@@ -41,8 +384,10 @@ def cid_from_meta_hash(meta_hex: str) -> str:
     return b58encode(b"\x12\x20" + digest).decode()
 
 
-def fetch_json(cid: str) -> dict:
-    url = f"{IPFS_GATEWAY}{cid}"
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    return resp.json()
+def fetch_json(cid: str, sha256: bytes | None = None) -> dict:
+    return json.loads(IPFS.get(cid, sha256))
+
+
+async def afetch_json(cid: str, sha256: bytes | None = None) -> dict:
+    """Async :func:`fetch_json`; cached reads do not touch the network."""
+    return json.loads(await IPFS.aget(cid, sha256))
@@ -10,6 +10,37 @@ export interface Election {
   tally?: string;
 }
 
+interface ElectionJobEvent {
+  state: string;
+  election_id?: number;
+  error?: string;
+}
+
+// Resolves with the job's final event once the creation transaction is processed.
+const waitForElectionJob = (jobId: string): Promise<ElectionJobEvent> =>
+  new Promise((resolve) => {
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const apiBase = process.env.NEXT_PUBLIC_API_BASE;
+    const host = apiBase ? new URL(apiBase).host : window.location.host;
+    const ws = new WebSocket(`${protocol}//${host}/ws/elections/jobs/${jobId}`);
+    let settled = false;
+    const finish = (msg: ElectionJobEvent) => {
+      if (!settled) {
+        settled = true;
+        resolve(msg);
+      }
+    };
+    ws.onmessage = (ev) => {
+      const msg: ElectionJobEvent = JSON.parse(ev.data);
+      if (msg.state === 'done' || msg.state === 'error') {
+        finish(msg);
+        ws.close();
+      }
+    };
+    ws.onerror = () => finish({ state: 'error', error: 'connection lost' });
+    ws.onclose = () => finish({ state: 'error', error: 'connection closed' });
+  });
+
 export default function AdminElectionForm({ onCreated }: { onCreated?: (e: Election) => void }) {
   const { token } = useAuth();
   const { showToast } = useToast();
@@ -36,9 +67,15 @@ export default function AdminElectionForm({ onCreated }: { onCreated?: (e: Elect
       body: JSON.stringify({ metadata: meta, verifier }),
     });
     if (res.ok) {
-      const data: Election = await res.json();
-      mutate(['/elections', token]);
-      onCreated?.(data);
+      // 202: the transaction was broadcast; wait for it to be mined.
+      const { job_id } = await res.json();
+      const job = await waitForElectionJob(job_id);
+      if (job.state === 'done' && job.election_id !== undefined) {
+        mutate(['/elections', token]);
+        onCreated?.({ id: job.election_id, status: 'pending' });
+      } else {
+        showToast({ type: 'error', message: `Failed to create election: ${job.error}` });
+      }
     } else {
       showToast({ type: 'error', message: 'Failed to create election' });
     }
@@ -1,10 +1,14 @@
 import useSWR from 'swr'
 import { apiUrl } from '../lib/api'
 
-const fetcher = (url: string) => fetch(url).then(res => res.json())
+const fetcher = (url: string) =>
+  fetch(url).then(res => {
+    if (!res.ok) throw new Error(`gas estimate unavailable: ${res.status}`)
+    return res.json()
+  })
 
 export default function GasFeeEstimator() {
-  const { data } = useSWR<{p95: number}>(apiUrl('/api/gas'), fetcher, { refreshInterval: 15000 })
+  const { data } = useSWR<{p50: number, p95: number, p99: number}>(apiUrl('/api/gas'), fetcher, { refreshInterval: 15000 })
 
   return (
     <span>{data ? `~${data.p95} gwei` : '...'}</span>
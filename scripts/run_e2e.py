@@ -7,7 +7,11 @@ BASE = os.getenv("BASE_URL", "http://localhost:8000")
 payload = {"metadata": "{\"title\": \"E2E\"}"}
 r = requests.post(f"{BASE}/elections", json=payload)
 r.raise_for_status()
-eid = r.json()["id"]
+job = r.json()["job_id"]
+while (status := requests.get(f"{BASE}/elections/jobs/{job}").json())["status"] == "submitted":
+    time.sleep(1)
+assert status["status"] == "done", status
+eid = status["election_id"]
 
 # 2. login
 r = requests.get(f"{BASE}/auth/callback", params={"user":"e2e@example.com"})
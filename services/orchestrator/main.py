@@ -2,12 +2,20 @@
 import os
 import time
 import subprocess
+import tempfile
 import json
 import math
+import sys
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
 from eth_account import Account
 
+# Share the backend's transaction sender (nonce tracking, fee cache, bumping)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "packages"))
+from backend.tx_sender import TransactionSender
+from backend.gas_oracle import GasOracle
+from backend.notifications import dispatcher_from_env
+
 # --- Configuration ---
 EVM_RPC = os.getenv("EVM_RPC", "http://127.0.0.1:8545")
 MAX_RETRIES = int(os.getenv("EVM_MAX_RETRIES", "0")) # 0 means wait forever
@@ -18,29 +26,14 @@ POLL_INTERVAL_S = 10
 CURVE = os.environ.get("CURVE", "bn254")
 MANIFEST_PATH = "/app/artifacts/manifest.json"
 
-# Push Protocol configuration
-PUSH_API_URL = os.getenv("PUSH_API_URL", "https://backend.epns.io/apis/v1/payloads")
-PUSH_CHANNEL = os.getenv("PUSH_CHANNEL")
-PUSH_ENV = os.getenv("PUSH_ENV", "staging")
+# Push Protocol notifications; queued ones are flushed when the process exits
+PUSH = dispatcher_from_env(CHAIN_ID)
 
 def send_push(title: str, body: str):
-    if not PUSH_CHANNEL:
+    if not PUSH.enabled:
         print("Push Protocol not configured; skipping notification")
         return
-    payload = {
-        "senderType": 0,
-        "type": 1,
-        "identityType": 2,
-        "notification": {"title": title, "body": body},
-        "payload": {"title": title, "body": body, "cta": "", "img": ""},
-        "channel": f"eip155:{CHAIN_ID}:{PUSH_CHANNEL}",
-        "env": PUSH_ENV,
-    }
-    try:
-        import httpx
-        httpx.post(PUSH_API_URL, json=payload, timeout=10)
-    except Exception as exc:
-        print(f"Failed to send push notification: {exc}")
+    PUSH.notify(title, body)
 
 
 # --- Load full ABI from the mounted artifact ---
@@ -171,11 +164,21 @@ def get_tally_input(w3: Web3, mgr, election_id: int) -> dict:
     }
 
 
+def _scratch_root() -> str | None:
+    """Prefer tmpfs for witness files; fall back to the default temp dir."""
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+
+
 def run_snarkjs_proof(wasm_path, zkey_path, tally_input: dict):
     """Generates the ZK proof using snarkjs based on the provided input."""
-    temp_dir = "/tmp/orchestrator_run"
-    os.makedirs(temp_dir, exist_ok=True)
-    
+    # A unique directory per run so concurrent runs never share files; it is
+    # removed as soon as the calldata has been exported.
+    with tempfile.TemporaryDirectory(prefix="orchestrator_", dir=_scratch_root()) as temp_dir:
+        return _run_snarkjs_in(temp_dir, wasm_path, zkey_path, tally_input)
+
+
+def _run_snarkjs_in(temp_dir, wasm_path, zkey_path, tally_input: dict):
     tally_input_file = os.path.join(temp_dir, "tally_input.json")
     proof_file = os.path.join(temp_dir, "proof.json")
     public_file = os.path.join(temp_dir, "public.json")
@@ -205,21 +208,15 @@ def run_snarkjs_proof(wasm_path, zkey_path, tally_input: dict):
     params = json.loads(f"[{params_str}]")
     return (params[0], params[1], params[2], params[3])
 
-def submit_tally(w3: Web3, mgr, acct, proof_data, election_id: int):
+def submit_tally(sender: TransactionSender, mgr, proof_data, election_id: int):
     """Submits the generated proof to the tallyVotes function."""
     a, b, c, pub = proof_data
     print(f"Submitting tally for election #{election_id}...")
-    tx = mgr.functions.tallyVotes(election_id, a, b, c, pub).build_transaction({
-        "from": acct.address,
-        "nonce": w3.eth.get_transaction_count(acct.address),
-        "gas": 4_000_000, # Tallying can be gas-intensive
-        "gasPrice": w3.eth.gas_price,
-        "chainId": CHAIN_ID,
-    })
-    signed = acct.sign_transaction(tx)
-    txh = w3.eth.send_raw_transaction(signed.rawTransaction)
-    print(f"📤 Submitted tallyVotes tx: {txh.hex()}")
-    receipt = w3.eth.wait_for_transaction_receipt(txh)
+    # Tallying can be gas-intensive
+    txh = sender.send_call(mgr.functions.tallyVotes(election_id, a, b, c, pub), gas=4_000_000)
+    print(f"📤 Submitted tallyVotes tx: {txh}")
+    # Re-sent with higher fees if it sits unmined for TX_REPLACE_AFTER seconds
+    receipt = sender.wait(txh)
     print(f"✅ Tally successfully recorded on-chain! Status: {receipt.status}")
     if receipt.status == 0:
         print("❌ Transaction reverted! Check contract logic and proof.")
@@ -230,6 +227,21 @@ def main():
     mgr = w3.eth.contract(address=ELECTION_MANAGER_ADDR, abi=ELECTION_MANAGER_ABI)
     acct = w3.eth.account.from_key(PRIVATE_KEY)
     print(f"Orchestrator address: {acct.address}")
+    oracle = GasOracle(
+        w3,
+        window=int(os.getenv("GAS_ORACLE_WINDOW", "20")),
+        poll_interval=float(os.getenv("GAS_ORACLE_POLL", "2")),
+    )
+    oracle.start()
+    sender = TransactionSender(
+        w3,
+        acct,
+        CHAIN_ID,
+        fee_ttl=float(os.getenv("TX_FEE_TTL", "5")),
+        replace_after=float(os.getenv("TX_REPLACE_AFTER", "60")),
+        bump_percent=int(os.getenv("TX_BUMP_PERCENT", "15")),
+        oracle=oracle,
+    )
 
     end_block = wait_for_election_zero(w3, mgr)
     if end_block is None:
@@ -270,7 +282,7 @@ def main():
         proof_data = run_snarkjs_proof(wasm_path, zkey_path, tally_input_data)
         
         # Submit proof on-chain
-        submit_tally(w3, mgr, acct, proof_data, 0)
+        submit_tally(sender, mgr, proof_data, 0)
         send_push(
             "Tally Completed",
             "Results have been tallied for election 0"